@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmarks utilities.load_pdb (columnar reader) against the original line by line reader on synthetic
+5k, 50k and 500k atom pdb files.
+
+usage: python benchmarks/load_pdb_benchmark.py [natoms ...]
+"""
+
+#Standard Library Imports
+import os
+import sys
+import tempfile
+from timeit import default_timer as timer
+
+# Run from a checkout, the package does not have to be installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+#PHD3 Imports
+from dmdpy.protein import atom, chain, residue, protein
+from dmdpy.utility import utilities, pdbio
+
+RESIDUE = [("N", "N"), ("CA", "C"), ("C", "C"), ("O", "O"), ("CB", "C"), ("H", "H"), ("HA", "H"), ("HB1", "H")]
+
+def write_synthetic_pdb(file_name: str, natoms: int, nchains: int = 4):
+    per_chain = natoms // nchains
+    with open(file_name, 'w') as pdb:
+        number = 1
+        for c in range(nchains):
+            chain_letter = chr(ord('A') + c)
+            for i in range(per_chain):
+                name, element = RESIDUE[i % len(RESIDUE)]
+                resnum = (i // len(RESIDUE)) % 9999 + 1
+                pdb.write('{:<6}{:>5} {:<4} {} {}{:>4}    {:>8.3f}{:>8.3f}{:>8.3f}  1.00  0.00          {:>2}\n'.format(
+                    "ATOM", number % 100000, name if len(name) > 3 else f" {name}", "ALA", chain_letter, resnum,
+                    (i % 97) * 0.731, (i % 89) * 1.013, c * 7.5 + (i % 7) * 0.211, element))
+                number += 1
+
+            pdb.write("TER\n")
+        pdb.write("ENDMDL\n")
+
+def legacy_load_pdb(file: str):
+    chains = []
+    resNum = 0
+    chainLet = ""
+    with open(file, 'r') as pdb:
+        for line in pdb:
+            if "ATOM" == line[0:4] or "HETATM" == line[0:6]:
+                tmpAtom = atom.Atom(line)
+                if chainLet != line[21:22]:
+                    chainLet = line[21:22]
+                    chains.append(chain.Chain(chainLet))
+                    resNum = 0
+
+                if resNum != int(line[22:26]):
+                    resNum = int(line[22:26])
+                    chains[-1].add_residue(residue.Residue(line))
+
+                chains[-1].residues[-1].add_atom(tmpAtom)
+
+    return protein.Protein(file, chains)
+
+def read_columns(file: str):
+    with open(file, 'rb') as pdb:
+        return pdbio.read_pdb_columns(pdb.read())
+
+def best_of(function, file_name: str, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = timer()
+        function(file_name)
+        elapsed = timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or [5000, 50000, 500000]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'atoms':>8} {'legacy (s)':>12} {'load_pdb (s)':>14} {'speedup':>8} {'columns only (s)':>18}")
+        for natoms in sizes:
+            file_name = os.path.join(tmp_dir, f"synthetic_{natoms}.pdb")
+            write_synthetic_pdb(file_name, natoms)
+            repeat = 5 if natoms <= 50000 else 1
+            legacy = best_of(legacy_load_pdb, file_name, repeat)
+            columnar = best_of(utilities.load_pdb, file_name, repeat)
+            columns = best_of(read_columns, file_name, repeat)
+            print(f"{natoms:>8} {legacy:>12.4f} {columnar:>14.4f} {legacy / columnar:>7.2f}x {columns:>18.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Benchmarks Protein.reformat_protein (single pass) against the original index/pop based implementation on a synthetic
+multi-chain pdb with waters and metal ions scattered through every chain, and checks that both give the same protein.
+
+usage: python benchmarks/reformat_benchmark.py [natoms [nchains]]
+"""
+
+#Standard Library Imports
+import os
+import sys
+import tempfile
+from timeit import default_timer as timer
+
+# Run from a checkout, the package does not have to be installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+#PHD3 Imports
+from dmdpy.protein import residue
+from dmdpy.utility import utilities, constants
+
+AMINO_ACID = [("N", "N"), ("CA", "C"), ("C", "C"), ("O", "O"), ("CB", "C"), ("H", "H"), ("HA", "H"), ("HB1", "H")]
+WATER = [("O", "O"), ("H1", "H"), ("H2", "H")]
+
+# DMD names at most 35 metals of an element, spread these over the whole input
+METAL_IONS = ["ZN", "MG", "CA"]
+MAX_METALS = 35
+
+def write_synthetic_pdb(file_name: str, natoms: int, nchains: int):
+    per_chain = natoms // nchains
+    metals_left = {metal: MAX_METALS for metal in METAL_IONS}
+    metal_every = max(1, natoms // (len(METAL_IONS) * MAX_METALS * len(AMINO_ACID)))
+
+    with open(file_name, 'w') as pdb:
+        number = 1
+        for c in range(nchains):
+            chain_letter = chr(ord('A') + c)
+            written = 0
+            resnum = 1
+            while written < per_chain:
+                # Every fifth residue is a water and every so often a metal ion sits in between
+                if resnum % 5 == 0:
+                    resname, atoms = "HOH", WATER
+
+                elif resnum % metal_every == 0 and any(metals_left.values()):
+                    resname = next(metal for metal, left in metals_left.items() if left)
+                    metals_left[resname] -= 1
+                    atoms = [(resname, resname.capitalize())]
+
+                else:
+                    resname, atoms = "ALA", AMINO_ACID
+
+                for name, element in atoms:
+                    i = number + c * 13
+                    pdb.write('{:<6}{:>5} {:<4} {} {}{:>4}    {:>8.3f}{:>8.3f}{:>8.3f}  1.00  0.00          {:>2}\n'.format(
+                        "ATOM" if resname == "ALA" else "HETATM", number % 100000, name if len(name) > 3 else f" {name}",
+                        resname, chain_letter, resnum % 10000, (i % 97) * 1.531, (i % 89) * 1.413, c * 25.0 + (i % 7) * 1.211, element))
+                    number += 1
+                    written += 1
+
+                resnum += 1
+
+            pdb.write("TER\n")
+        pdb.write("ENDMDL\n")
+
+def legacy_reformat(pro):
+    """The original reformat_protein, without relabeling or the bond table"""
+    pro.non_residues.clear()
+    pro.metals.clear()
+
+    res_renum = 1
+    chain_let = 'A'
+
+    chain_num = 0
+    while chain_num < len(pro.chains):
+        atom_renum = 1
+        residue_num = 0
+        while residue_num < len(pro.chains[chain_num].residues):
+            if pro.chains[chain_num].residues[residue_num].name not in constants.AMINO_ACID_RESIDUES:
+                atom_num = 0
+                while atom_num < len(pro.chains[chain_num].residues[residue_num].atoms):
+                    if pro.chains[chain_num].residues[residue_num].atoms[atom_num].element.lower() in constants.METALS:
+                        if pro.chains[chain_num].residues[residue_num].atoms[atom_num].element.lower() == "zn":
+                            if pro.chains[chain_num].residues[residue_num].atoms[atom_num].id.lower() in constants.METALS:
+                                pro.chains[chain_num].residues[residue_num].atoms[atom_num].element = pro.chains[chain_num].residues[residue_num].atoms[atom_num].id.capitalize()
+
+                        pro.metals.append(pro.chains[chain_num].residues[residue_num].atoms.pop(atom_num))
+                        atom_num -= 1
+
+                    atom_num += 1
+
+                if pro.chains[chain_num].residues[residue_num].atoms:
+                    pro.non_residues.append(pro.chains[chain_num].residues.pop(residue_num))
+
+                else:
+                    del pro.chains[chain_num].residues[residue_num]
+
+            else:
+                pro.chains[chain_num].residues[residue_num].number = res_renum
+                pro.chains[chain_num].residues[residue_num].inConstr_number = residue_num + 1
+                for atom in pro.chains[chain_num].residues[residue_num].atoms:
+                    atom.number = atom_renum
+                    atom_renum += 1
+
+                res_renum += 1
+                residue_num += 1
+
+        if not pro.chains[chain_num].residues:
+            del pro.chains[chain_num]
+
+        else:
+            pro.chains[chain_num].name = chain_let
+            chain_let = chr(ord(chain_let) + 1)
+            chain_num += 1
+
+    res_num = 1
+    if pro.non_residues or pro.metals:
+        atom_num = 1
+        if not len(pro.chains):
+            pro.sub_chain.name = 'A'
+
+        else:
+            pro.sub_chain.name = chr(ord(pro.chains[-1].name) + 1)
+
+        pro.metals.sort(key=lambda metal: metal.element)
+
+        cur_metal = ""
+        metal_num = 1
+        for metal in pro.metals:
+            metal.number = atom_num
+            if cur_metal != metal.element:
+                metal_num = 1
+                cur_metal = metal.element
+
+            if len(metal.element) == 1:
+                name = metal.element.upper() + f"{metal_num:02d}"
+
+            else:
+                name = metal.element.upper() + f"{metal_num:01d}"
+
+            if len(name) != 3:
+                name = metal.element.upper() + f"{chr(metal_num-10 + ord('A'))}"
+
+            if metal.element.lower() != "zn":
+                metal.element = 'Zn'
+
+            metal_residue = residue.Residue(name=name, number=res_num)
+            pro.sub_chain.add_residue(metal_residue)
+            metal_residue.add_atom(metal)
+
+            res_num += 1
+            metal_num += 1
+            atom_num += 1
+
+        for res in pro.non_residues:
+            start = 100
+            for atom in res.atoms:
+                atom.id = f"{atom.element.upper()[0]}{start}"
+                start += 1
+
+            pro.sub_chain.add_residue(res)
+            res.number = res_num
+            res.inConstr_number = res_num
+            for atom in res.atoms:
+                atom.number = atom_num
+                atom_num += 1
+
+            res_num += 1
+
+        pro.chains.append(pro.sub_chain)
+
+    pro.clear_cache()
+
+def reformat(pro):
+    """reformat_protein up to (not including) the bond table"""
+    pro.non_residues.clear()
+    pro.metals.clear()
+    pro._partition_residues()
+    pro._build_substrate_chain()
+    pro.clear_cache()
+
+def fingerprint(pro, file_name: str):
+    pro.write_pdb(file_name)
+    with open(file_name) as pdb:
+        lines = pdb.read()
+
+    inConstr = [(res.number, res.inConstr_number) for ch in pro.chains for res in ch.residues]
+    return lines, inConstr, [a.number for a in pro.metals], [res.number for res in pro.non_residues]
+
+def main():
+    natoms = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    nchains = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_name = os.path.join(tmp_dir, "synthetic.pdb")
+        write_synthetic_pdb(file_name, natoms, nchains)
+
+        legacy_protein = utilities.load_pdb(file_name)
+        start = timer()
+        legacy_reformat(legacy_protein)
+        legacy = timer() - start
+
+        new_protein = utilities.load_pdb(file_name)
+        start = timer()
+        reformat(new_protein)
+        single_pass = timer() - start
+
+        start = timer()
+        new_protein.make_bond_table()
+        bonds = timer() - start
+
+        same = fingerprint(legacy_protein, os.path.join(tmp_dir, "legacy.pdb")) == fingerprint(new_protein, os.path.join(tmp_dir, "new.pdb"))
+        print(f"{'atoms':>8} {'chains':>7} {'legacy (s)':>12} {'single pass (s)':>16} {'speedup':>8} {'bond table (s)':>15} {'identical':>10}")
+        print(f"{len(new_protein.get_atoms()):>8} {nchains:>7} {legacy:>12.4f} {single_pass:>16.4f} {legacy / single_pass:>7.2f}x {bonds:>15.4f} {str(same):>10}")
+
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+from .kabsch import *
+from .fluctuation import *
+from .clustering import *
+from .restraints import *
+
+__all__ = [
+        'kabsch',
+        'fluctuation',
+        'clustering',
+        'restraints'
+        ]
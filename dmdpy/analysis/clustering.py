@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+#PHD3 Imports
+from . import kabsch
+from ..utility import pdbio
+
+__all__ = [
+    'Clustering',
+    'condensed_size',
+    'condensed_row',
+    'pairwise_rmsd',
+    'movie_pairwise_rmsd',
+    'gromos',
+    'k_medoids',
+    'write_medoids'
+]
+
+logger = logging.getLogger(__name__)
+
+# Frames on each side of a block of the pairwise matrix handed to a worker, also the number of rows the clustering reads
+# from the matrix at a time
+BLOCK_FRAMES = 256
+
+def condensed_size(n_frames: int):
+    """
+    Length of the condensed (upper triangle, row major, like scipy's pdist) matrix of n_frames. The clustering accepts
+    such a matrix as well as the square one pairwise_rmsd writes, but reading a row of it takes one scattered read per
+    frame before the row, so it is only suited to matrices held in memory.
+    """
+    return n_frames * (n_frames - 1) // 2
+
+def _row_start(n_frames: int, i):
+    """Position of the pair (i, i + 1) in the condensed matrix"""
+    return i * n_frames - i * (i + 1) // 2
+
+def condensed_row(distances, n_frames: int, i: int):
+    """
+    :param distances: condensed pairwise matrix
+    :param n_frames: number of frames of the matrix
+    :param i: frame
+    :return: (n_frames,) distances of frame i to every frame, read from the condensed matrix without expanding it
+    """
+    row = np.zeros(n_frames)
+    if i:
+        # Column i of the rows above it
+        above = np.arange(i)
+        row[:i] = distances[_row_start(n_frames, above) + i - above - 1]
+
+    start = _row_start(n_frames, i)
+    row[i + 1:] = distances[start:start + n_frames - i - 1]
+    return row
+
+def _rows(distances, n_frames: int, frames):
+    """
+    :param distances: square or condensed pairwise matrix
+    :param frames: frames to read the rows of
+    :return: (len(frames), n_frames) float rows, each one a contiguous read of a square matrix
+    """
+    frames = np.asarray(frames, dtype=np.int64)
+    if np.ndim(distances) == 2:
+        return np.asarray(distances[frames], dtype=float)
+
+    return np.stack([condensed_row(distances, n_frames, i) for i in frames.tolist()]) if len(frames) else np.zeros((0, n_frames))
+
+def _row_blocks(distances, n_frames: int, frames, block: int = BLOCK_FRAMES):
+    """Rows of frames read BLOCK_FRAMES at a time, as (frames of the block, rows) pairs"""
+    frames = np.asarray(frames, dtype=np.int64)
+    for start in range(0, len(frames), block):
+        yield frames[start:start + block], _rows(distances, n_frames, frames[start:start + block])
+
+def _centered(frames):
+    centered = np.asarray(frames, dtype=float)
+    return centered - centered.mean(axis=1, keepdims=True)
+
+def _block_rmsd(first, second):
+    """
+    RMSD of every frame of one block against every frame of another, both already centered. The 3x3 covariance of every
+    pair comes from a single matrix product and the whole (B, B) grid goes through one batched SVD, the RMSD follows
+    from the (signed) singular values so no frame has to be rotated.
+    """
+    n_first, n_atoms, _ = first.shape
+    n_second = len(second)
+    covariance = first.transpose(0, 2, 1).reshape(3 * n_first, n_atoms) @ second.transpose(1, 0, 2).reshape(n_atoms, 3 * n_second)
+    u, s, vt = np.linalg.svd(covariance.reshape(n_first, 3, n_second, 3).transpose(0, 2, 1, 3))
+    s[:, :, 2] *= np.sign(np.linalg.det(u) * np.linalg.det(vt))
+    squared = np.einsum('ani,ani->a', first, first)[:, None] + np.einsum('bni,bni->b', second, second)[None, :] - 2 * s.sum(axis=2)
+    return np.sqrt(np.maximum(squared, 0) / first.shape[1])
+
+_shared = {}
+
+def _attach(name: str, shape: tuple):
+    """Initializer of the worker processes, maps the centered coordinates the parent put in shared memory"""
+    memory = shared_memory.SharedMemory(name=name)
+    _shared["memory"] = memory
+    _shared["coords"] = np.ndarray(shape, dtype=float, buffer=memory.buf)
+
+def _block_job(job):
+    first, second, block = job
+    coords = _shared["coords"]
+    return first, second, _block_rmsd(coords[first:first + block], coords[second:second + block])
+
+def pairwise_rmsd(frames, mask=None, workers: int = None, out: str = None, block: int = BLOCK_FRAMES):
+    """
+    All against all RMSD (after optimal superposition) of the frames of a trajectory. The matrix is computed in square
+    blocks of frames spread over a pool of processes which read the coordinates from shared memory instead of each
+    getting a copy.
+
+    :param frames: (F, N, 3) coordinates
+    :param mask: atoms to superpose and compare, None for all of them. Only these atoms are kept in memory.
+    :param workers: number of processes to use, defaults to the number of cores
+    :param out: file to hold the matrix as a memory map, for matrices that do not fit in memory. None keeps it in memory.
+    :param block: frames on each side of a block
+    :return: square (F, F) float32 matrix, symmetric with a zero diagonal. It takes 4F^2 bytes, twice the condensed
+    matrix, but every row is contiguous on disk so the clustering reads a memory mapped one row block by row block.
+    """
+    frames = np.asarray(frames)
+    if mask is not None:
+        frames = frames[:, mask]
+
+    coords = _centered(kabsch._as_coords(frames))
+    n_frames = len(coords)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers < 1 or block < 1:
+        logger.error(f"Invalid number of workers: {workers} or block size: {block}")
+        raise ValueError("workers")
+
+    size = condensed_size(n_frames)
+    if out is not None:
+        distances = np.lib.format.open_memmap(out, mode='w+', dtype=np.float32, shape=(n_frames, n_frames))
+
+    else:
+        distances = np.zeros((n_frames, n_frames), dtype=np.float32)
+
+    jobs = [(first, second, block) for first in range(0, n_frames, block) for second in range(first, n_frames, block)]
+    logger.debug(f"Computing {size} pairwise RMSDs in {len(jobs)} blocks with {min(workers, len(jobs))} workers")
+    if workers == 1 or len(jobs) <= 1:
+        _shared["coords"] = coords
+        try:
+            for job in jobs:
+                _store(distances, *_block_job(job))
+
+        finally:
+            _shared.clear()
+
+    else:
+        memory = shared_memory.SharedMemory(create=True, size=max(coords.nbytes, 1))
+        try:
+            np.ndarray(coords.shape, dtype=float, buffer=memory.buf)[:] = coords
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_attach, initargs=(memory.name, coords.shape)) as pool:
+                for result in pool.map(_block_job, jobs):
+                    _store(distances, *result)
+
+        finally:
+            memory.close()
+            memory.unlink()
+
+    if out is not None:
+        distances.flush()
+
+    return distances
+
+def _store(distances, first: int, second: int, values):
+    """Copies a block and its mirror image into the square matrix"""
+    if first == second:
+        # A block on the diagonal is made symmetric from its upper triangle, with zeros on the diagonal
+        values = np.triu(values, 1)
+        values = values + values.T
+
+    distances[first:first + values.shape[0], second:second + values.shape[1]] = values
+    distances[second:second + values.shape[1], first:first + values.shape[0]] = values.T
+
+def movie_pairwise_rmsd(movie_file: str, atoms=None, start: int = 0, stop: int = None, stride: int = 1, workers: int = None, out: str = None):
+    """
+    The movie is read a chunk of frames at a time (see kabsch.iter_chunks) and only the selected atoms of every frame
+    are kept, so the memory needed is 24 bytes per selected atom per frame (about 70 MB for 10000 frames of 300 backbone
+    atoms) and not that of the whole movie. Select the atoms and frames (stride) to fit that in memory, the matrix itself
+    can go to disk with out.
+
+    :param movie_file: movie pdb or compressed movie
+    :param atoms: selection expression or mask of the atoms to superpose and compare (ie. "backbone"), evaluated on the
+    first selected frame
+    :param out: see pairwise_rmsd
+    :return: (square matrix, frame numbers of the movie the rows correspond to)
+    """
+    topology, frames = kabsch.movie_frames(movie_file, start, stop, stride)
+    mask = None
+    selected = []
+    for chunk in kabsch.iter_chunks(frames, len(topology["id"])):
+        if mask is None and atoms is not None:
+            mask = kabsch.atom_mask(atoms, dict(topology, coords=chunk[0]))
+
+        # Copied so that a view does not keep the whole chunk alive
+        selected.append(chunk if mask is None else chunk[:, mask].copy())
+
+    if not selected:
+        logger.error(f"No frames selected from {movie_file}")
+        raise ValueError(movie_file)
+
+    frames = np.concatenate(selected)
+    del selected
+    frame_numbers = list(range(start, start + stride * len(frames), stride))
+    return pairwise_rmsd(frames, workers=workers, out=out), frame_numbers
+
+class Clustering:
+    """
+    Result of clustering the frames of a trajectory
+
+    labels: cluster of every frame
+    medoids: frame of every cluster with the smallest summed distance to the rest of it (the cluster center for GROMOS)
+    sizes: number of frames in every cluster
+
+    Clusters are numbered from the largest to the smallest.
+    """
+
+    __slots__ = ['labels', 'medoids', 'sizes']
+
+    def __init__(self, labels, medoids: list):
+        sizes = np.bincount(labels, minlength=len(medoids))
+        order = np.argsort(-sizes, kind='stable')
+        rank = np.empty(len(order), dtype=int)
+        rank[order] = np.arange(len(order))
+
+        self.labels = rank[labels]
+        self.medoids = [medoids[i] for i in order.tolist()]
+        self.sizes = sizes[order]
+
+    def __len__(self):
+        return len(self.medoids)
+
+    def members(self, cluster: int):
+        """Frames of a cluster"""
+        return np.flatnonzero(self.labels == cluster)
+
+def gromos(distances, n_frames: int, cutoff: float):
+    """
+    GROMOS clustering (Daura et al. 1999): the frame with the most neighbours within the cutoff becomes the center of a
+    cluster made of it and those neighbours, which are then taken out, until every frame is in a cluster. The matrix is
+    read BLOCK_FRAMES rows at a time so it can stay on disk.
+
+    :param distances: square (see pairwise_rmsd) or condensed pairwise matrix
+    :param n_frames: number of frames of the matrix
+    :param cutoff: neighbour cutoff (Angstroms)
+    :return: Clustering
+    """
+    neighbours = np.zeros(n_frames, dtype=int)
+    for frames, rows in _row_blocks(distances, n_frames, np.arange(n_frames)):
+        neighbours[frames] = np.count_nonzero(rows <= cutoff, axis=1) - 1
+
+    labels = np.full(n_frames, -1)
+    centers = []
+    remaining = np.ones(n_frames, dtype=bool)
+    while remaining.any():
+        center = int(np.argmax(np.where(remaining, neighbours, -1)))
+        members = np.flatnonzero(remaining & (_rows(distances, n_frames, [center])[0] <= cutoff))
+        members = np.union1d(members, [center])
+        labels[members] = len(centers)
+        centers.append(center)
+        remaining[members] = False
+
+        # Frames still left lose the neighbours that were just taken out
+        for _, rows in _row_blocks(distances, n_frames, members):
+            neighbours[remaining] -= np.count_nonzero(rows[:, remaining] <= cutoff, axis=0)
+
+    logger.debug(f"GROMOS clustering with cutoff {cutoff} gave {len(centers)} clusters")
+    return Clustering(labels, centers)
+
+def k_medoids(distances, n_frames: int, k: int, max_iter: int = 100, seed: int = None):
+    """
+    k-medoids clustering by alternating assignment and medoid update, seeded like k-means++. Only the rows of the
+    medoids and BLOCK_FRAMES rows of the members of one cluster at a time are read.
+
+    :param distances: square (see pairwise_rmsd) or condensed pairwise matrix
+    :param n_frames: number of frames of the matrix
+    :param k: number of clusters
+    :param max_iter: most assignment/update rounds
+    :param seed: seed of the initial medoids
+    :return: Clustering
+    """
+    if not 0 < k <= n_frames:
+        logger.error(f"Cannot make {k} clusters out of {n_frames} frames")
+        raise ValueError("k")
+
+    rng = np.random.default_rng(seed)
+    medoids = [int(rng.integers(n_frames))]
+    nearest = _rows(distances, n_frames, medoids)[0]
+    while len(medoids) < k:
+        weights = nearest**2
+        new = int(rng.choice(n_frames, p=weights / weights.sum())) if weights.sum() > 0 else int(np.argmax(np.isin(np.arange(n_frames), medoids, invert=True)))
+        medoids.append(new)
+        nearest = np.minimum(nearest, _rows(distances, n_frames, [new])[0])
+
+    labels = None
+    for iteration in range(max_iter):
+        labels = np.argmin(_rows(distances, n_frames, medoids), axis=0)
+        labels[medoids] = np.arange(k)
+
+        updated = []
+        for cluster in range(k):
+            members = np.flatnonzero(labels == cluster)
+            totals = np.concatenate([rows[:, members].sum(axis=1) for _, rows in _row_blocks(distances, n_frames, members)])
+            updated.append(int(members[int(np.argmin(totals))]))
+
+        if updated == medoids:
+            break
+
+        medoids = updated
+
+    logger.debug(f"k-medoids clustering with k={k} finished after {iteration + 1} rounds")
+    return Clustering(labels, medoids)
+
+def write_medoids(movie_file: str, clustering: Clustering, frame_numbers: list = None, directory: str = "./", prefix: str = "cluster"):
+    """
+    Writes the medoid of every cluster out as a pdb (cluster_0.pdb is the largest cluster)
+
+    :param movie_file: movie the matrix was computed from
+    :param clustering: Clustering
+    :param frame_numbers: frame of the movie of every row of the matrix, as returned by movie_pairwise_rmsd
+    :param directory: where to write the pdbs
+    :param prefix: start of the names of the pdbs
+    :return: list of the pdbs written
+    """
+    file_names = []
+    for cluster, medoid in enumerate(clustering.medoids):
+        frame = frame_numbers[medoid] if frame_numbers is not None else medoid
+        topology, frames = kabsch.movie_frames(movie_file, frame, frame + 1)
+        coords = next(kabsch.iter_chunks(frames, len(topology["id"])))[0]
+
+        file_name = os.path.join(directory, f"{prefix}_{cluster}.pdb")
+        pdbio.columns_to_protein(f"{prefix}_{cluster}", dict(topology, coords=coords)).write_pdb(file_name)
+        logger.debug(f"Wrote frame {frame} ({clustering.sizes[cluster]} frames) to {file_name}")
+        file_names.append(file_name)
+
+    return file_names
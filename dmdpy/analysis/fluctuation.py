@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import itertools
+import logging
+import numpy as np
+
+#PHD3 Imports
+from . import kabsch
+from ..utility import pdbio, trajectory
+
+__all__ = [
+    'TrajectoryStatistics',
+    'residue_index',
+    'trajectory_statistics',
+    'movie_statistics'
+]
+
+logger = logging.getLogger(__name__)
+
+def residue_index(columns: dict):
+    """
+    :param columns: topology of the structure (chain and resnum of every atom)
+    :return: (residue (0, 1, ...) of every atom, "chain:resnum" label of every residue). A new residue starts wherever
+    the chain or the residue number changes, the same way pdbs are read into a Protein.
+    """
+    chains = np.asarray(columns["chain"])
+    resnums = np.asarray(columns["resnum"])
+    new_residue = np.ones(len(chains), dtype=bool)
+    new_residue[1:] = (chains[1:] != chains[:-1]) | (resnums[1:] != resnums[:-1])
+    firsts = np.flatnonzero(new_residue)
+    return np.cumsum(new_residue) - 1, [f"{chains[i]}:{resnums[i]}" for i in firsts.tolist()]
+
+class TrajectoryStatistics:
+    """
+    Running statistics over the frames of a trajectory, fed one chunk of frames at a time so that memory does not grow
+    with the length of the trajectory (apart from the radius of gyration series, one float per frame).
+
+    Every chunk is superposed onto the reference, then its mean and sum of squared deviations are merged into the
+    running ones (Welford / Chan et al.), which is numerically stable however many frames are seen. The radius of
+    gyration is taken on the frames as they are, it does not depend on the superposition.
+    """
+
+    __slots__ = ['reference', 'fit_mask', 'rg_mask', 'n_frames', '_mean', '_m2', '_rg']
+
+    def __init__(self, reference, fit_mask=None, rg_mask=None):
+        """
+        :param reference: (N, 3) coordinates every frame is superposed onto
+        :param fit_mask: atoms the superposition is fitted on, None for all of them
+        :param rg_mask: atoms the radius of gyration is taken over, None for all of them
+        """
+        self.reference = np.asarray(reference, dtype=float)
+        self.fit_mask = fit_mask
+        self.rg_mask = rg_mask
+        self.n_frames = 0
+        self._mean = np.zeros(self.reference.shape)
+        self._m2 = np.zeros(self.reference.shape)
+        self._rg = []
+
+    def update(self, frames):
+        """
+        :param frames: (F, N, 3) coordinates, or a single (N, 3) frame
+        """
+        frames = np.asarray(frames, dtype=float)
+        if frames.ndim == 2:
+            frames = frames[None]
+
+        if not len(frames):
+            return
+
+        subset = frames if self.rg_mask is None else frames[:, self.rg_mask]
+        centered = subset - subset.mean(axis=1, keepdims=True)
+        self._rg.append(np.sqrt(np.einsum('fni,fni->f', centered, centered) / subset.shape[1]))
+
+        fitted = kabsch.superpose(self.reference, frames, self.fit_mask)
+        n_chunk = len(fitted)
+        chunk_mean = fitted.mean(axis=0)
+        deviations = fitted - chunk_mean
+        chunk_m2 = np.einsum('fni,fni->ni', deviations, deviations)
+
+        total = self.n_frames + n_chunk
+        delta = chunk_mean - self._mean
+        self._mean += delta * (n_chunk / total)
+        self._m2 += chunk_m2 + delta**2 * (self.n_frames * n_chunk / total)
+        self.n_frames = total
+
+    @property
+    def average(self):
+        """(N, 3) average of the superposed frames"""
+        return self._mean.copy()
+
+    @property
+    def msf(self):
+        """(N,) mean square fluctuation of every atom about its average position"""
+        if not self.n_frames:
+            logger.error("No frames have been added")
+            raise ValueError("n_frames")
+
+        return self._m2.sum(axis=1) / self.n_frames
+
+    @property
+    def rmsf(self):
+        """(N,) root mean square fluctuation of every atom"""
+        return np.sqrt(self.msf)
+
+    @property
+    def radius_of_gyration(self):
+        """(F,) radius of gyration of every frame"""
+        return np.concatenate(self._rg) if self._rg else np.zeros(0)
+
+    def residue_rmsf(self, columns: dict, mask=None):
+        """
+        :param columns: topology of the trajectory
+        :param mask: atoms to include, ie. only the heavy atoms, None for all of them
+        :return: dictionary of "chain:resnum" -> RMSF over the residue's atoms (root of their mean MSF), in chain order
+        """
+        residues, labels = residue_index(columns)
+        msf = self.msf
+        if mask is not None:
+            residues, msf = residues[mask], msf[mask]
+
+        counts = np.bincount(residues, minlength=len(labels))
+        sums = np.bincount(residues, weights=msf, minlength=len(labels))
+        return {labels[i]: float(np.sqrt(sums[i] / counts[i])) for i in np.flatnonzero(counts).tolist()}
+
+    def average_protein(self, columns: dict, name: str = "average"):
+        """
+        :param columns: topology of the trajectory
+        :return: Protein with the average coordinates, can be written out with write_pdb
+        """
+        return pdbio.columns_to_protein(name, dict(columns, coords=self.average))
+
+def trajectory_statistics(frames, reference=None, columns: dict = None, fit_atoms=None, rg_atoms=None):
+    """
+    Goes through the frames of a trajectory once, in chunks (see kabsch.iter_chunks)
+
+    :param frames: (F, N, 3) array or memory map, Trajectory, or an iterable of (N, 3) frames
+    :param reference: Protein or (N, 3) coordinates to superpose onto, defaults to the first frame
+    :param columns: topology of the trajectory, needed when the atoms are given as selection expressions
+    :param fit_atoms: selection expression or mask of the atoms the superposition is fitted on (ie. "backbone")
+    :param rg_atoms: selection expression or mask of the atoms for the radius of gyration (ie. "protein")
+    :return: TrajectoryStatistics
+    """
+    if reference is None:
+        if isinstance(frames, trajectory.Trajectory):
+            frames = frames.coords
+
+        if isinstance(frames, np.ndarray):
+            if not len(frames):
+                logger.error("Trajectory has no frames")
+                raise ValueError("frames")
+
+            reference = kabsch._as_coords(frames[:1])[0]
+
+        else:
+            # The first frame is read off the iterator to serve as the reference, then fed in with the rest
+            frames = iter(frames)
+            try:
+                first = next(frames)
+
+            except StopIteration:
+                logger.error("Trajectory has no frames")
+                raise ValueError("frames")
+
+            reference = kabsch._as_coords(np.asarray(first)[None])[0]
+            frames = itertools.chain([first], frames)
+
+    reference = kabsch._reference_coords(reference)
+    statistics = TrajectoryStatistics(reference, _mask(fit_atoms, columns, reference), _mask(rg_atoms, columns, reference))
+    for chunk in kabsch.iter_chunks(frames, len(reference)):
+        statistics.update(chunk)
+
+    logger.debug(f"Accumulated statistics over {statistics.n_frames} frames")
+    return statistics
+
+def _mask(atoms, columns, reference):
+    if columns is not None:
+        return kabsch.atom_mask(atoms, dict(columns, coords=reference))
+
+    if isinstance(atoms, str):
+        logger.error(f"Selection '{atoms}' needs the topology of the trajectory")
+        raise ValueError(atoms)
+
+    return kabsch.atom_mask(atoms, {"id": reference})
+
+def movie_statistics(movie_file: str, reference=None, fit_atoms=None, rg_atoms=None, start: int = 0, stop: int = None, stride: int = 1):
+    """
+    :param movie_file: movie pdb or compressed movie, ie. the movie.pdb of a reformatted protein's run
+    :param reference: Protein or (N, 3) coordinates to superpose onto, defaults to the first selected frame
+    :param fit_atoms: selection expression or mask of the atoms the superposition is fitted on
+    :param rg_atoms: selection expression or mask of the atoms for the radius of gyration
+    :return: (TrajectoryStatistics, topology of the movie) the topology gives residue_rmsf its chain and residue numbers
+    """
+    topology, frames = kabsch.movie_frames(movie_file, start, stop, stride)
+    if reference is not None and len(kabsch._reference_coords(reference)) != len(topology["id"]):
+        logger.error(f"{movie_file} has {len(topology['id'])} atoms but the reference does not")
+        raise ValueError(movie_file)
+
+    return trajectory_statistics(frames, reference, topology, fit_atoms, rg_atoms), topology
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+#PHD3 Imports
+from ..protein import selection
+from ..utility import trajectory
+
+__all__ = [
+    'atom_mask',
+    'fit',
+    'rmsd',
+    'superpose',
+    'iter_chunks',
+    'trajectory_rmsd',
+    'movie_frames',
+    'movie_rmsd',
+    'movie_rmsds'
+]
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the float64 coordinates worked on at once, the number of frames per chunk follows from the atom count
+CHUNK_BYTES = 64 * 2**20
+
+def atom_mask(atoms, columns: dict):
+    """
+    :param atoms: None for every atom, a selection expression (ie. "backbone", "not element H", "within 8 of resname
+    ZN1") or a boolean mask
+    :param columns: topology of the structure (see Protein.get_columns), with its coordinates for distance selections
+    :return: boolean mask over the atoms, None for every atom
+    """
+    if atoms is None:
+        return None
+
+    if isinstance(atoms, str):
+        return selection.Selection(atoms).mask(None, columns)
+
+    mask = np.asarray(atoms, dtype=bool)
+    if mask.shape != (len(columns["id"]),):
+        logger.error(f"Mask of shape {mask.shape} does not match the {len(columns['id'])} atoms")
+        raise ValueError("mask")
+
+    return mask
+
+def fit(reference, frames):
+    """
+    Optimal superposition (Kabsch) of a batch of frames onto a reference, one batched SVD of the 3x3 covariance
+    matrices for the whole batch
+
+    :param reference: (N, 3) coordinates
+    :param frames: (F, N, 3) coordinates
+    :return: (rotations (F, 3, 3), frame centroids (F, 3), reference centroid (3,), rmsd (F,)). A frame is superposed
+    with (frame - frame centroid) @ rotation + reference centroid
+    """
+    reference = np.asarray(reference, dtype=float)
+    frames = np.asarray(frames, dtype=float)
+    if frames.shape[1:] != reference.shape:
+        logger.error(f"Frames of shape {frames.shape[1:]} do not match the reference of shape {reference.shape}")
+        raise ValueError("frames")
+
+    reference_centroid = reference.mean(axis=0)
+    frame_centroids = frames.mean(axis=1)
+    centered_reference = reference - reference_centroid
+    centered = frames - frame_centroids[:, None, :]
+
+    u, _, vt = np.linalg.svd(np.einsum('fni,nj->fij', centered, centered_reference))
+
+    # A reflection is turned into the closest proper rotation by flipping the smallest singular direction
+    sign = np.sign(np.linalg.det(u) * np.linalg.det(vt))
+    u[:, :, 2] *= sign[:, None]
+    rotations = u @ vt
+
+    # The residuals are taken from the rotated frames rather than from the singular values, which lose precision to
+    # cancellation for nearly identical structures
+    residuals = centered @ rotations - centered_reference
+    return rotations, frame_centroids, reference_centroid, np.sqrt(np.einsum('fni,fni->f', residuals, residuals) / len(reference))
+
+def rmsd(reference, frames, mask=None):
+    """
+    :param reference: (N, 3) coordinates
+    :param frames: (F, N, 3) coordinates, or a single (N, 3) frame
+    :param mask: boolean mask of the atoms to superpose and compare, None for all of them
+    :return: RMSD after optimal superposition of every frame (a float for a single frame)
+    """
+    frames = np.asarray(frames, dtype=float)
+    single = frames.ndim == 2
+    if single:
+        frames = frames[None]
+
+    reference = np.asarray(reference, dtype=float)
+    if mask is not None:
+        reference, frames = reference[mask], frames[:, mask]
+
+    values = fit(reference, frames)[3]
+    return float(values[0]) if single else values
+
+def superpose(reference, frames, mask=None):
+    """
+    :param reference: (N, 3) coordinates
+    :param frames: (F, N, 3) coordinates
+    :param mask: atoms the superposition is fitted on, every atom is moved
+    :return: (F, N, 3) superposed coordinates
+    """
+    frames = np.asarray(frames, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    if mask is None:
+        rotations, frame_centroids, reference_centroid, _ = fit(reference, frames)
+
+    else:
+        rotations, frame_centroids, reference_centroid, _ = fit(reference[mask], frames[:, mask])
+
+    return (frames - frame_centroids[:, None, :]) @ rotations + reference_centroid
+
+def iter_chunks(frames, n_atoms: int):
+    """
+    Groups frames into float64 (F, N, 3) chunks of at most CHUNK_BYTES
+
+    :param frames: (F, N, 3) array or memory map, Trajectory, or an iterable of (N, 3) frames
+    :param n_atoms: number of atoms in a frame
+    :return: generator of chunks
+    """
+    chunk_frames = max(1, CHUNK_BYTES // (24 * max(n_atoms, 1)))
+    if isinstance(frames, trajectory.Trajectory):
+        frames = frames.coords
+
+    if isinstance(frames, np.ndarray):
+        for start in range(0, len(frames), chunk_frames):
+            yield _as_coords(frames[start:start + chunk_frames])
+
+        return
+
+    chunk = []
+    for frame in frames:
+        chunk.append(frame)
+        if len(chunk) == chunk_frames:
+            yield _as_coords(np.stack(chunk))
+            chunk = []
+
+    if chunk:
+        yield _as_coords(np.stack(chunk))
+
+def _as_coords(chunk):
+    # The float32 trajectory cache is rounded back to the precision of the pdb it came from
+    if chunk.dtype == np.float32:
+        return np.round(chunk.astype(float), trajectory.PDB_COORD_DECIMALS)
+
+    return np.asarray(chunk, dtype=float)
+
+def trajectory_rmsd(reference, frames, mask=None):
+    """
+    RMSD of every frame of a trajectory to a reference, streamed in chunks so that memory use does not depend on the
+    length of the trajectory
+
+    :param reference: (N, 3) coordinates
+    :param frames: see iter_chunks
+    :param mask: boolean mask of the atoms to superpose and compare, None for all of them
+    :return: (F,) RMSD of every frame
+    """
+    reference = np.asarray(reference, dtype=float)
+    values = [rmsd(reference, chunk, mask) for chunk in iter_chunks(frames, len(reference))]
+    return np.concatenate(values) if values else np.zeros(0)
+
+def movie_frames(movie_file: str, start: int = 0, stop: int = None, stride: int = 1):
+    """
+    Topology and coordinates of a movie, from the compressed movie or from the memory mapped trajectory cache of a
+    movie pdb (written the first time it is needed)
+
+    :return: (topology dictionary, frames) where frames can be passed to iter_chunks
+    """
+    if trajectory.is_compressed_movie(movie_file):
+        return trajectory.read_compressed_topology(movie_file), (coords for _, coords in trajectory.iter_compressed_coords(movie_file, start, stop, stride))
+
+    cached = trajectory.load_trajectory(movie_file)
+    return cached.topology, cached.coords[start:stop:stride]
+
+def movie_rmsd(movie_file: str, reference, atoms=None, start: int = 0, stop: int = None, stride: int = 1):
+    """
+    :param movie_file: movie pdb or compressed movie
+    :param reference: Protein or (N, 3) coordinates with the atoms in the same order as the movie
+    :param atoms: selection expression or mask of the atoms to superpose and compare, evaluated on the movie's topology
+    at the reference coordinates
+    :return: (F,) RMSD of every selected frame to the reference
+    """
+    reference = _reference_coords(reference)
+    topology, frames = movie_frames(movie_file, start, stop, stride)
+    if len(topology["id"]) != len(reference):
+        logger.error(f"{movie_file} has {len(topology['id'])} atoms but the reference has {len(reference)}")
+        raise ValueError(movie_file)
+
+    mask = atom_mask(atoms, dict(topology, coords=reference))
+    return trajectory_rmsd(reference, frames, mask)
+
+def movie_rmsds(movie_files: list, reference, atoms=None, workers: int = None, stride: int = 1):
+    """
+    RMSD curves of many movies at once across a pool of processes. A movie that cannot be read does not stop the rest
+    of the batch.
+
+    :param movie_files: movies to go through
+    :param reference: Protein or (N, 3) coordinates shared by every movie
+    :param atoms: selection expression or mask (see movie_rmsd)
+    :param workers: number of processes to use, defaults to the number of cores
+    :param stride: use every stride-th frame
+    :return: (list of RMSD arrays in the same order as movie_files with None for the movies that failed, dictionary of
+    movie -> error message for the movies that failed)
+    """
+    movie_files = list(movie_files)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers < 1:
+        logger.error(f"Invalid number of workers: {workers}")
+        raise ValueError("workers")
+
+    # Only the coordinates of the reference are sent to the workers
+    reference = _reference_coords(reference)
+    jobs = [(movie_file, reference, atoms, stride) for movie_file in movie_files]
+
+    workers = min(workers, len(movie_files))
+    logger.debug(f"Computing the RMSD of {len(movie_files)} movies with {workers} workers")
+    if workers <= 1:
+        results = [_movie_rmsd(job) for job in jobs]
+
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_movie_rmsd, jobs))
+
+    curves = []
+    errors = {}
+    for movie_file, (values, error) in zip(movie_files, results):
+        if error is not None:
+            logger.warning(f"Could not compute the RMSD of {movie_file}: {error}")
+            errors[movie_file] = error
+
+        curves.append(values)
+
+    return curves, errors
+
+def _movie_rmsd(job):
+    """Worker for movie_rmsds, errors are returned rather than raised so that one bad movie does not end the pool"""
+    movie_file, reference, atoms, stride = job
+    try:
+        return movie_rmsd(movie_file, reference, atoms, stride=stride), None
+
+    except (IOError, ValueError) as error:
+        return None, f"{type(error).__name__}: {error}"
+
+def _reference_coords(reference):
+    if hasattr(reference, "get_coords"):
+        return np.array(reference.get_coords(), dtype=float)
+
+    return np.asarray(reference, dtype=float).reshape(-1, 3)
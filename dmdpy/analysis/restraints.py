@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import json
+import logging
+import numpy as np
+
+#PHD3 Imports
+from . import kabsch
+from .. import setupjob
+
+__all__ = [
+    'DistanceMonitor',
+    'restraint_monitor',
+    'monitor_movie'
+]
+
+logger = logging.getLogger(__name__)
+
+class DistanceMonitor:
+    """
+    Distances between pairs of atoms over a trajectory. The pairs are resolved to index arrays once, so the distances
+    of every pair in a whole chunk of frames are a single gather and subtraction.
+
+    Each pair has a reference distance and a tolerance, like the AtomPairRel lines of inConstr: a frame violates the
+    restraint when its distance is further than the tolerance from the reference.
+    """
+
+    __slots__ = ['labels', 'first', 'second', 'reference', 'tolerance', '_distances']
+
+    def __init__(self, first, second, reference, tolerance, labels: list):
+        """
+        :param first: index of the first atom of every pair
+        :param second: index of the second atom of every pair
+        :param reference: distance every pair is held at
+        :param tolerance: how far every pair may stray from its reference distance
+        :param labels: name of every pair for the reports
+        """
+        self.first = np.asarray(first, dtype=int)
+        self.second = np.asarray(second, dtype=int)
+        self.reference = np.asarray(reference, dtype=float)
+        self.tolerance = np.asarray(tolerance, dtype=float)
+        self.labels = list(labels)
+        self._distances = []
+
+    def __len__(self):
+        return len(self.labels)
+
+    def update(self, frames):
+        """
+        :param frames: (F, N, 3) coordinates, or a single (N, 3) frame
+        """
+        frames = np.asarray(frames, dtype=float)
+        if frames.ndim == 2:
+            frames = frames[None]
+
+        self._distances.append(np.linalg.norm(frames[:, self.first] - frames[:, self.second], axis=2))
+
+    @property
+    def distances(self):
+        """(F, P) distance of every pair in every frame"""
+        return np.concatenate(self._distances) if self._distances else np.zeros((0, len(self)))
+
+    @property
+    def deviations(self):
+        """(F, P) distance of every pair from its reference"""
+        return self.distances - self.reference
+
+    def violated(self, slack: float = 0.0):
+        """
+        :param slack: allowance on top of the tolerance, ie. for the 0.001 Angstrom rounding of the movie coordinates
+        :return: (F, P) whether every pair is outside of its tolerance in every frame
+        """
+        return np.abs(self.deviations) > self.tolerance + slack
+
+    def violations(self, slack: float = 0.0):
+        """
+        :return: list of (frame, pair label, distance, deviation) for every violation, in frame order
+        """
+        distances = self.distances
+        frames, pairs = np.nonzero(np.abs(distances - self.reference) > self.tolerance + slack)
+        return [(frame, self.labels[pair], float(distances[frame, pair]), float(distances[frame, pair] - self.reference[pair]))
+                for frame, pair in zip(frames.tolist(), pairs.tolist())]
+
+    def summary(self, slack: float = 0.0):
+        """
+        :return: list with a dictionary for every pair of its reference, tolerance, smallest, largest and mean distance,
+        largest deviation and number of frames in violation
+        """
+        distances = self.distances
+        if not len(distances):
+            logger.error("No frames have been added")
+            raise ValueError("distances")
+
+        deviations = np.abs(distances - self.reference)
+        violated = np.count_nonzero(deviations > self.tolerance + slack, axis=0)
+        return [{"pair": label,
+                 "reference": float(self.reference[p]),
+                 "tolerance": float(self.tolerance[p]),
+                 "min": float(distances[:, p].min()),
+                 "max": float(distances[:, p].max()),
+                 "mean": float(distances[:, p].mean()),
+                 "max deviation": float(deviations[:, p].max()),
+                 "violated frames": int(violated[p])} for p, label in enumerate(self.labels)]
+
+    def report(self, slack: float = 0.0):
+        """Logs every pair, with a warning for those that were violated, and returns the summary"""
+        summary = self.summary(slack)
+        for pair in summary:
+            message = (f"{pair['pair']}: {pair['mean']:.3f} ({pair['min']:.3f} - {pair['max']:.3f}) reference "
+                       f"{pair['reference']:.3f} +/- {pair['tolerance']}")
+            if pair["violated frames"]:
+                logger.warning(f"{message} violated in {pair['violated frames']} frames")
+
+            else:
+                logger.info(message)
+
+        return summary
+
+def restraint_monitor(pro, parameters):
+    """
+    Resolves the pairs setupDMDjob restrains into a DistanceMonitor: the "Restrict Displacement" pairs (with the same
+    selectors as dmdinput.json) and, with "Restrict Metal Ligands" on, every metal to the atoms bonded to its ligands.
+    The reference distances are taken from pro.
+
+    :param pro: the reformatted Protein the run started from (ie. initial.pdb), its atoms in the order of the movie
+    :param parameters: dmdinput.json parameters, or the name of the file to read them from
+    :return: DistanceMonitor
+    """
+    if isinstance(parameters, str):
+        try:
+            with open(parameters) as inp:
+                parameters = json.load(inp)
+
+        except IOError:
+            logger.exception(f"Error reading in {parameters}")
+            raise
+
+    pairs = []
+    if parameters.get("Restrict Displacement"):
+        pairs.extend(setupjob.displacement_pairs(pro, parameters["Restrict Displacement"]))
+
+    if parameters.get("Restrict Metal Ligands"):
+        if pro.metals and not any(a.bonds for a in pro.get_atoms()):
+            pro.make_bond_table()
+
+        # An atom bonded to two ligands of the same metal is restrained (and monitored) once
+        seen = set()
+        for _, metal_pairs in setupjob.metal_ligand_restraints(pro):
+            for pair in metal_pairs:
+                if (id(pair[0]), id(pair[1])) not in seen:
+                    seen.add((id(pair[0]), id(pair[1])))
+                    pairs.append(pair)
+
+    position = {id(a): k for k, a in enumerate(pro.get_atoms())}
+    first = [position[id(a)] for a, _, _ in pairs]
+    second = [position[id(b)] for _, b, _ in pairs]
+    coords = np.asarray(pro.get_coords(), dtype=float).reshape(-1, 3)
+    reference = np.linalg.norm(coords[first] - coords[second], axis=1) if pairs else np.zeros(0)
+
+    logger.debug(f"Monitoring {len(pairs)} restrained pairs")
+    return DistanceMonitor(first, second, reference, [float(tolerance) for _, _, tolerance in pairs],
+                           [f"{a.label()}-{b.label()}" for a, b, _ in pairs])
+
+def monitor_movie(movie_file: str, monitor: DistanceMonitor, start: int = 0, stop: int = None, stride: int = 1):
+    """
+    Streams the frames of a movie through a monitor
+
+    :param movie_file: movie pdb or compressed movie
+    :param monitor: DistanceMonitor, ie. from restraint_monitor
+    :return: the monitor
+    """
+    topology, frames = kabsch.movie_frames(movie_file, start, stop, stride)
+    n_atoms = len(topology["id"])
+    if len(monitor) and max(monitor.first.max(), monitor.second.max()) >= n_atoms:
+        logger.error(f"{movie_file} has {n_atoms} atoms, fewer than the monitored pairs need")
+        raise ValueError(movie_file)
+
+    for chunk in kabsch.iter_chunks(frames, n_atoms):
+        monitor.update(chunk)
+
+    return monitor
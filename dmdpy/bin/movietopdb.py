@@ -26,6 +26,8 @@ def main():
     parser.add_argument("pdbfile", type=str, nargs=1, help="initial pdb file (typically initial.pdb)")
     parser.add_argument("moviefile", type=str, nargs=1, help="Movie file from piDMD")
     parser.add_argument("-o", dest="outputFile", default=["movie.pdb"], type=str, nargs=1, required=False, help="Output for movie file")
+    parser.add_argument("-z", dest="compress", action="store_true", required=False, help="Write a compressed movie instead of a pdb")
+    parser.add_argument("-e", dest="echoFile", default=[None], type=str, nargs=1, required=False, help="Echo file of the run, gives the frame index the time of every frame")
 
     args = parser.parse_args()
 
@@ -40,7 +42,7 @@ def main():
     logger.debug("Passing parameters...")
     try:
         logger.debug("Passing args to the function in utilities")
-        utilities.make_movie(args.pdbfile[0], args.moviefile[0], args.outputFile[0])
+        utilities.make_movie(args.pdbfile[0], args.moviefile[0], args.outputFile[0], compress=args.compress, echo_file=args.echoFile[0])
 
     except OSError:
         logger.error("Error creating movie file")
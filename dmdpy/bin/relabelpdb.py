@@ -22,44 +22,51 @@ def main():
 
     logger.debug("Parsing Arguments")
 
-    parser = argparse.ArgumentParser(description="Relabels a pdb to a new atom labeling scheme")
-    parser.add_argument("pdbfile", type=str, nargs=1, help="PDB file to edit")
+    parser = argparse.ArgumentParser(description="Relabels pdbs to a new atom labeling scheme")
+    parser.add_argument("pdbfile", type=str, nargs="+", help="PDB file(s) to edit")
     parser.add_argument("scheme", type=str, nargs=1, help="Scheme to convert to")
-    parser.add_argument("-o", dest="outputFile", default="", type=str, nargs=1, required=False, help="PDB file to write to")
+    parser.add_argument("-o", dest="outputFile", default="", type=str, nargs=1, required=False, help="PDB file to write to (only with a single pdb)")
 
     args = parser.parse_args()
 
-    if not os.path.isfile(args.pdbfile[0]):
-        logger.error(f"Could not find pdb: {args.pdbfile[0]}")
+    if args.outputFile != "" and len(args.pdbfile) > 1:
+        logger.error("Can only specify an output file when relabeling a single pdb")
         sys.exit(1)
 
+    for pdbfile in args.pdbfile:
+        if not os.path.isfile(pdbfile):
+            logger.error(f"Could not find pdb: {pdbfile}")
+            sys.exit(1)
+
     logger.debug("Proper Arguments Passed")
 
-    try:
-        protein = utilities.load_pdb(args.pdbfile[0])
+    # The label table is only read and compiled once, for the first pdb
+    for pdbfile in args.pdbfile:
+        try:
+            protein = utilities.load_pdb(pdbfile)
 
-    except IOError:
-        logger.error("Error in loading in the PDB file provided")
-        sys.exit(1)
+        except IOError:
+            logger.error(f"Error in loading in the PDB file provided: {pdbfile}")
+            sys.exit(1)
 
-    logger.debug("Relabeling")
-    try:
-        protein.relabel(args.scheme[0])
+        logger.debug(f"Relabeling {pdbfile}")
+        try:
+            protein.relabel(args.scheme[0])
 
-    except ValueError:
-        logger.error("Error in relabeling the protein")
-        sys.exit(1)
+        except ValueError:
+            logger.error(f"Error in relabeling the protein: {pdbfile}")
+            sys.exit(1)
 
-    if args.outputFile != "":
-        logger.debug(f"Changing protein name to {args.outputFile[0]}")
-        protein.name = args.outputFile[0]
+        if args.outputFile != "":
+            logger.debug(f"Changing protein name to {args.outputFile[0]}")
+            protein.name = args.outputFile[0]
 
-    try:
-        protein.write_pdb()
+        try:
+            protein.write_pdb()
 
-    except IOError:
-        logger.error("Error writing the protein to pdb file")
-        sys.exit(1)
+        except IOError:
+            logger.error(f"Error writing the protein to pdb file: {protein.name}")
+            sys.exit(1)
 
     logger.debug("Finished")
 
@@ -21,8 +21,11 @@ import numpy as np
 #PHD3 Imports
 import dmdpy.protein as protein
 import dmdpy.utility.utilities as utilities
+import dmdpy.utility.trajectory as trajectory
 from dmdpy.setupjob import setupDMDjob
 from dmdpy.utility.exceptions import Propka_Error, ParameterError
+from dmdpy.utility.echo import EchoData
+from dmdpy.utility.progress import ProgressMonitor
 from dmdpy.titrate import titrate_protein
 from dmdpy.bin import submitdmd
 
@@ -36,7 +39,7 @@ class dmd_simulation:
 
     __slots__=["_submit_directory", "_scratch_directory", "_config", "_cores",
             "_time_to_run", "_timer_went_off",  "_start_time",
-            "_parameter_file", "_raw_parameters", "_commands", "_src_files" ,"_titration", "_resub"]
+            "_parameter_file", "_raw_parameters", "_commands", "_src_files" ,"_titration", "_resub", "_echo"]
 
     def __init__(self, cores: int = 1, run_dir: str='./', time=-1, pro: protein.Protein=None, parameters: dict=None):
 
@@ -49,6 +52,7 @@ class dmd_simulation:
         self._timer_went_off = False
         self._start_time = 0
         self._resub = False
+        self._echo = None
 
 
         # Want to make sure that we make the scratch directory!!
@@ -120,13 +124,9 @@ class dmd_simulation:
             sj.full_setup()
 
         if os.path.isfile(self._raw_parameters["Echo File"]):
-            with open(self._raw_parameters["Echo File"]) as echofile:
-                lines = []
-                for line in echofile:
-                    lines.append(line)
-
-                last_line = lines[-1].split()
-                self._start_time = int(float(last_line[0]))
+            self._echo = EchoData(self._raw_parameters["Echo File"])
+            if len(self._echo):
+                self._start_time = int(float(self._echo["time"][-1]))
                 logger.debug(f"Last recorded time: {self._start_time}")
 
         if self._raw_parameters["Remaining Commands"]:
@@ -232,12 +232,13 @@ class dmd_simulation:
 
                 if os.path.isfile(updated_parameters["Echo File"]) and os.path.isfile(updated_parameters["Restart File"]):
                     #We can do the propka eval
+                    compress = updated_parameters.get("Compress Movie", False)
+                    movie_pdb = "movie.dmdz" if compress else "movie.pdb"
                     if os.path.isfile(updated_parameters["Movie File"]):
-                        utilities.make_movie("initial.pdb", updated_parameters["Movie File"], "_tmpMovie.pdb")
+                        utilities.make_movie("initial.pdb", updated_parameters["Movie File"], "_tmpMovie.pdb", cache=False)
                         #Append to movie
-                        with open("_tmpMovie.pdb", 'r') as tmpMovie, open("movie.pdb", 'a') as movie:
-                            for line in tmpMovie:
-                                movie.write(line)
+                        trajectory.append_frames(movie_pdb, "_tmpMovie.pdb", compress=compress)
+                        trajectory.write_frame_index(movie_pdb, updated_parameters["Echo File"])
 
                         last_frame = utilities.last_frame("_tmpMovie.pdb")
                         
@@ -259,34 +260,31 @@ class dmd_simulation:
                     try:
                         updated_parameters["Custom protonation states"] = self._titration.evaluate_pkas(last_frame)
 
-                    except Propka_Error:
-                        #grab last initial.pdb, echo and movie.pdb and place over current initial, echo, and movie.pdb and
-                        #add updated_parameters to list
+                    except Propka_Error as propka_error:
+                        #truncate the echo and movie back to the last recorded step and add updated_parameters to list,
+                        #only once: failing again before the next recorded step cannot go further back
                         logger.warning("Going back one iteration")
-                        if not os.path.isfile("_last_echo") or not os.path.isfile("_last_movie.pdb"):
+                        if not os.path.isfile(updated_parameters["Echo File"]) or not os.path.isfile(trajectory.step_index_file(movie_pdb)):
                             logger.error("Cannot go back a step!")
-                            raise 
-                        
-                        shutil.move("_last_echo", updated_parameters["Echo File"])
-                        last_frame = utilities.last_frame("_last_movie.pdb")
-                        shutil.move("_last_movie.pdb", updated_parameters["Movie File"])
-                        
+                            raise
+
+                        try:
+                            trajectory.rollback_step(movie_pdb, updated_parameters["Echo File"])
+
+                        except ValueError:
+                            logger.error("Cannot go back a step!")
+                            raise propka_error
+
+                        last_frame = utilities.last_frame(movie_pdb)
+
                         self._titration._step -=1
                         repeat = True
                         updated_parameters["Custom protonation states"] = self._titration.evaluate_pkas(last_frame)
 
                     else:
-                        if os.path.isfile("_last_movie.pdb"):
-                            os.remove("_last_movie.pdb")
-
-                        if os.path.isfile("movie.pdb"):
-                            shutil.copy("movie.pdb", "_last_movie.pdb")
-                        
-                        if os.path.isfile("_last_echo"):
-                            os.remove("_last_echo")
-                        
-                        if os.path.isfile(updated_parameters["Echo File"]):
-                            shutil.copy(updated_parameters["Echo File"], "_last_echo")
+                        #Only the sizes of the movie and echo are recorded, going back is then just a truncation
+                        if os.path.isfile(movie_pdb) and os.path.isfile(updated_parameters["Echo File"]):
+                            trajectory.record_step(movie_pdb, updated_parameters["Echo File"])
 
 
                     sj = setupDMDjob(parameters=updated_parameters, pro=last_frame)
@@ -387,7 +385,12 @@ class dmd_simulation:
 
         logger.info(f"[Restart File]     ==>> {'False' if state_file == 'state' else 'True'}")
 
+        # The echo file is followed in the background while pdmd runs, see dmd_status.json for the live progress
+        monitor = ProgressMonitor(parameters["Echo File"], start_time, start_time + parameters["Time"])
+        monitor.start()
+
         #Now we execute the command to run the dmd
+        state = "failed"
         try:
             with open("dmd.out", 'a') as dmd_out:
                 logger.info(f"[Issuing command]  ==>> pdmd.linux -i dmd_start -s {state_file} -p param -c outConstr -m {self._cores} -fa")
@@ -397,10 +400,17 @@ class dmd_simulation:
                     while shell.poll() is None:
                         dmd_out.write(shell.stdout.readline().strip() + '\n')
 
+            if shell.returncode == 0:
+                state = "finished"
+
         except OSError:
             logger.exception("Error calling pdmd.linux")
             raise
 
+        finally:
+            # Whatever ends the run (including an interrupt), the monitor thread is stopped with the last status
+            monitor.stop(state)
+
     @staticmethod
     def get_echo_data(echo_file):
         if not os.path.isfile(echo_file):
@@ -421,43 +431,49 @@ class dmd_simulation:
 
     @staticmethod
     def get_average_potential_energy(echo_file):
-        energies = dmd_simulation.get_echo_data(echo_file)
-
-        energies = np.array([float(line[4]) for line in energies])
-        return [np.average(energies), np.std(energies)]
+        stats = EchoData(echo_file).stats("potential")
+        return [stats["mean"], stats["std"]]
 
     @staticmethod
     def get_average_kinetic_energy(echo_file):
-        energies = dmd_simulation.get_echo_data(echo_file)
-
-        energies = np.array([float(line[5]) for line in energies])
-        return [np.average(energies), np.std(energies)]
+        stats = EchoData(echo_file).stats("kinetic")
+        return [stats["mean"], stats["std"]]
 
     @staticmethod
     def get_average_temp_energy(echo_file):
-        energies = dmd_simulation.get_echo_data(echo_file)
-
-        energies = np.array([float(line[1]) for line in energies])
-        return [np.average(energies), np.std(energies)]
+        stats = EchoData(echo_file).stats("temperature")
+        return [stats["mean"], stats["std"]]
 
     @staticmethod
     def get_average_pressure_energy(echo_file):
-        energies = dmd_simulation.get_echo_data(echo_file)
-
-        energies = np.array([float(line[2]) for line in energies])
-        return [np.average(energies), np.std(energies)]
+        stats = EchoData(echo_file).stats("pressure")
+        return [stats["mean"], stats["std"]]
 
     def print_summary(self, sim_time, wall_time):
-        pot_energy = self.get_average_potential_energy(self._raw_parameters['Echo File'])
-        kinetic = self.get_average_kinetic_energy(self._raw_parameters['Echo File'])
-        pressure = self.get_average_pressure_energy(self._raw_parameters['Echo File'])
-        temperature = self.get_average_temp_energy(self._raw_parameters['Echo File'])
-        
-        logger.info(f"[Ave. Pot. Energy] ==>> {pot_energy[0]:.5f} ({pot_energy[1]:.5f}) kcal/mol")
-        logger.info(f"[Ave. Kin. Energy] ==>> {kinetic[0]:.5f} ({kinetic[1]:.5f}) kcal/mol")
-        logger.info(f"[Ave. Tot. Energy] ==>> {(pot_energy[0] + kinetic[0]) / 2.0:.5f} kcal/mol")
-        logger.info(f"[Ave. Pressure   ] ==>> {pressure[0]:.5f} ({pressure[1]:.5f})")
-        logger.info(f"[Ave. Temperature] ==>> {temperature[0]:.5f} ({temperature[1]:.5f})")
+        # Only the lines written since the last summary are read, and only the current command is summarized
+        if self._echo is None or self._echo.echo_file != self._raw_parameters['Echo File']:
+            self._echo = EchoData(self._raw_parameters['Echo File'])
+
+        else:
+            self._echo.update()
+
+        # pdmd.linux can exit before writing a single line for this command, there is nothing to average then
+        if not self._echo.select(self._start_time).any():
+            logger.warning(f"No lines in {self._echo.echo_file} from time {self._start_time}, skipping the averages")
+
+        else:
+            summary = self._echo.summary(start_time=self._start_time)
+            pot_energy = [summary["potential"]["mean"], summary["potential"]["std"]]
+            kinetic = [summary["kinetic"]["mean"], summary["kinetic"]["std"]]
+            pressure = [summary["pressure"]["mean"], summary["pressure"]["std"]]
+            temperature = [summary["temperature"]["mean"], summary["temperature"]["std"]]
+
+            logger.info(f"[Ave. Pot. Energy] ==>> {pot_energy[0]:.5f} ({pot_energy[1]:.5f}) kcal/mol")
+            logger.info(f"[Ave. Kin. Energy] ==>> {kinetic[0]:.5f} ({kinetic[1]:.5f}) kcal/mol")
+            logger.info(f"[Ave. Tot. Energy] ==>> {(pot_energy[0] + kinetic[0]) / 2.0:.5f} kcal/mol")
+            logger.info(f"[Ave. Pressure   ] ==>> {pressure[0]:.5f} ({pressure[1]:.5f})")
+            logger.info(f"[Ave. Temperature] ==>> {temperature[0]:.5f} ({temperature[1]:.5f})")
+
         logger.info(f"[Est. Phys. Time ] ==>> {sim_time*0.0000488882} ns")
         logger.info(f"Time elapsed during DMD simulation: {datetime.timedelta(seconds = int(wall_time))}")
 
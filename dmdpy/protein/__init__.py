@@ -2,7 +2,10 @@ from .atom import *
 from .chain import *
 from .protein import *
 from .residue import *
+from .bonding import *
+from .selection import *
+from .labeling import *
 
 __all__ = [
-        'atom', 'residue', 'chain', 'protein'
+        'atom', 'residue', 'chain', 'protein', 'bonding', 'selection', 'labeling'
         ]
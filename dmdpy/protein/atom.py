@@ -10,6 +10,7 @@ import copy
 
 #PHD3 Imports
 from ..utility import constants
+from . import bonding
 
 __all__=[
     'Atom'
@@ -17,20 +18,20 @@ __all__=[
 
 class Atom:
 
-    __slots__ = ['element', 'coords', 'id', 'residue', 'chain', 'number', 'bonds', 'freeze']
+    __slots__ = ['element', 'coords', '_id', 'residue', 'chain', 'number', '_bonds', '_graph', '_bond_index', 'freeze']
 
     def __init__(self, line: str = None, element: str = None, coords: np.array = None, id=None, number=None):
 
         if line is None:
             self.element = element
             self.coords = coords
-            self.id = id
+            self._id = id
             self.number = number
 
         elif line is not None:
             self.element = line[76:78].strip().lower()
             self.coords = np.array([float(line[30:38]), float(line[38:46]), float(line[46:54])])
-            self.id = line[12:16].strip().upper()
+            self._id = line[12:16].strip().upper()
             self.number = int(line[6:11])
             #Fix the formatting
             self.element = self.element.capitalize()
@@ -42,7 +43,46 @@ class Atom:
         self.residue = None
         self.chain = None
         self.freeze = False
-        self.bonds = []
+        self._bonds = None
+        self._graph = None
+        self._bond_index = None
+
+    @property
+    def id(self):
+        return self._id
+
+    @id.setter
+    def id(self, value):
+        # The residue looks its atoms up by id, renaming one has to drop that lookup
+        self._id = value
+        if getattr(self, 'residue', None) is not None:
+            self.residue._atom_index = None
+
+    @property
+    def bonds(self):
+        """Atoms bonded to this one, a view into the protein's BondGraph when the atom is in one, otherwise a list"""
+        if self._graph is not None:
+            return bonding.BondView(self._graph, self._bond_index)
+
+        if self._bonds is None:
+            self._bonds = []
+
+        return self._bonds
+
+    def bond_graph(self):
+        return self._graph
+
+    def attach_bond_graph(self, graph, index: int):
+        self._graph = graph
+        self._bond_index = index
+        self._bonds = None
+
+    def detach_bond_graph(self):
+        """Leaves the bond graph, keeping the current bonds as a plain list"""
+        if self._graph is not None:
+            self._bonds = list(self.bonds)
+            self._graph = None
+            self._bond_index = None
 
 
     def write_inConstr(self):
@@ -87,6 +127,12 @@ class Atom:
                 self.id = actual_res_name.upper()
 
     def add_bond(self, atom):
+        if self._graph is not None and self._graph is atom._graph:
+            self._graph.add_bond(self._bond_index, atom._bond_index)
+            return
+
+        self.detach_bond_graph()
+        atom.detach_bond_graph()
         self.bonds.append(atom)
         atom.bonds.append(self)
     
@@ -98,14 +144,25 @@ class Atom:
         result = cls.__new__(cls)
         memo[id(self)] = result
 
-        result.element = copy.deepcopy(self.element, memo)
-        result.coords = copy.deepcopy(self.coords, memo)
-        result.id = copy.deepcopy(self.id, memo)
-        result.number = copy.deepcopy(self.number, memo)
-        result.bonds = copy.copy(bonds)
-        result.freeze = copy.deepcopy(self.freeze, memo)
-        result.residue = self.residue
-        result.chain = self.chain
+        result.element = self.element
+        result.coords = np.array(self.coords, dtype=float)
+        result.id = self.id
+        result.number = self.number
+        result.freeze = self.freeze
+
+        # The copy belongs to the copies of its residue and chain when those are part of the same deepcopy, otherwise
+        # to nothing until it is added to a residue
+        result.residue = memo.get(id(self.residue))
+        result.chain = memo.get(id(self.chain))
+
+        # Only bonds to atoms that were copied as well are kept, each is linked up when its second atom is copied
+        result._graph = None
+        result._bond_index = None
+        result._bonds = []
+        for bonded in self.bonds:
+            copied = memo.get(id(bonded))
+            if copied is not None:
+                result._bonds.append(copied)
+                copied.bonds.append(result)
 
         return result
-
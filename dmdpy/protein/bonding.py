@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import logging
+import numpy as np
+
+#PHD3 Imports
+from ..utility import constants, spatial
+
+__all__ = [
+    'COVALENT_RADII',
+    'RESIDUE_BONDS',
+    'perceive_bonds',
+    'BondGraph',
+    'BondView'
+]
+
+logger = logging.getLogger(__name__)
+
+# Covalent radii in Angstrom, the same ones openbabel uses to connect atoms
+COVALENT_RADII = {
+    'h': 0.31, 'li': 1.28, 'be': 0.96, 'b': 0.84, 'c': 0.76, 'n': 0.71, 'o': 0.66, 'f': 0.57, 'na': 1.66, 'mg': 1.41,
+    'al': 1.21, 'si': 1.11, 'p': 1.07, 's': 1.05, 'cl': 1.02, 'k': 2.03, 'ca': 1.76, 'sc': 1.70, 'ti': 1.60,
+    'v': 1.53, 'cr': 1.39, 'mn': 1.39, 'fe': 1.32, 'co': 1.26, 'ni': 1.24, 'cu': 1.32, 'zn': 1.22, 'ga': 1.22,
+    'ge': 1.20, 'as': 1.19, 'se': 1.20, 'br': 1.20, 'rb': 2.20, 'sr': 1.95, 'y': 1.90, 'zr': 1.75, 'nb': 1.64,
+    'mo': 1.54, 'tc': 1.47, 'ru': 1.46, 'rh': 1.42, 'pd': 1.39, 'ag': 1.45, 'cd': 1.44, 'in': 1.42, 'sn': 1.39,
+    'sb': 1.39, 'te': 1.38, 'i': 1.39, 'cs': 2.44, 'ba': 2.15, 'la': 2.07, 'ce': 2.04, 'pr': 2.03, 'nd': 2.01,
+    'pm': 1.99, 'sm': 1.98, 'eu': 1.98, 'gd': 1.96, 'tb': 1.94, 'dy': 1.92, 'ho': 1.92, 'er': 1.89, 'tm': 1.90,
+    'yb': 1.87, 'lu': 1.87, 'hf': 1.75, 'ta': 1.70, 'w': 1.62, 're': 1.51, 'os': 1.44, 'ir': 1.41, 'pt': 1.36,
+    'au': 1.36, 'hg': 1.32, 'tl': 1.45, 'pb': 1.46, 'bi': 1.48
+}
+
+# Used for any element not in COVALENT_RADII
+DEFAULT_RADIUS = 1.5
+
+# Two atoms are bonded when they are further apart than MIN_BOND_DISTANCE but no further than the sum of their
+# covalent radii plus BOND_TOLERANCE (the same rule as openbabel)
+BOND_TOLERANCE = 0.45
+MIN_BOND_DISTANCE = 0.4
+
+# Elements a metal is coordinated by, a metal within bonding distance of anything else (ie. the ring carbons next to
+# the nitrogen of a histidine) is not bonded to it
+METAL_DONORS = ('n', 'o', 's', 'se', 'f', 'cl', 'br', 'i')
+
+_BACKBONE = [("N", "CA"), ("CA", "C"), ("C", "O")]
+_CB = _BACKBONE + [("CA", "CB")]
+_RING6 = [("CB", "CG"), ("CG", "CD1"), ("CG", "CD2"), ("CD1", "CE1"), ("CD2", "CE2"), ("CE1", "CZ"), ("CE2", "CZ")]
+
+# Heavy atom bonds within each standard residue, hydrogens are placed on their closest heavy atom instead
+RESIDUE_BONDS = {
+    "ALA": _CB,
+    "ARG": _CB + [("CB", "CG"), ("CG", "CD"), ("CD", "NE"), ("NE", "CZ"), ("CZ", "NH1"), ("CZ", "NH2")],
+    "ASN": _CB + [("CB", "CG"), ("CG", "OD1"), ("CG", "ND2")],
+    "ASP": _CB + [("CB", "CG"), ("CG", "OD1"), ("CG", "OD2")],
+    "CYS": _CB + [("CB", "SG")],
+    "GLN": _CB + [("CB", "CG"), ("CG", "CD"), ("CD", "OE1"), ("CD", "NE2")],
+    "GLU": _CB + [("CB", "CG"), ("CG", "CD"), ("CD", "OE1"), ("CD", "OE2")],
+    "GLY": _BACKBONE,
+    "HIS": _CB + [("CB", "CG"), ("CG", "ND1"), ("CG", "CD2"), ("ND1", "CE1"), ("CD2", "NE2"), ("CE1", "NE2")],
+    "ILE": _CB + [("CB", "CG1"), ("CB", "CG2"), ("CG1", "CD1")],
+    "LEU": _CB + [("CB", "CG"), ("CG", "CD1"), ("CG", "CD2")],
+    "LYS": _CB + [("CB", "CG"), ("CG", "CD"), ("CD", "CE"), ("CE", "NZ")],
+    "MET": _CB + [("CB", "CG"), ("CG", "SD"), ("SD", "CE")],
+    "PHE": _CB + _RING6,
+    "PRO": _CB + [("CB", "CG"), ("CG", "CD"), ("CD", "N")],
+    "SER": _CB + [("CB", "OG")],
+    "THR": _CB + [("CB", "OG1"), ("CB", "CG2")],
+    "TRP": _CB + [("CB", "CG"), ("CG", "CD1"), ("CG", "CD2"), ("CD1", "NE1"), ("NE1", "CE2"), ("CD2", "CE2"),
+                  ("CD2", "CE3"), ("CE2", "CZ2"), ("CE3", "CZ3"), ("CZ2", "CH2"), ("CZ3", "CH2")],
+    "TYR": _CB + _RING6 + [("CZ", "OH")],
+    "VAL": _CB + [("CB", "CG1"), ("CB", "CG2")]
+}
+
+# Names the naming schemes in atom_label.csv use for the same heavy atom
+ATOM_ALIASES = {
+    "ILE": {"CD": "CD1"}
+}
+
+# Carboxylate oxygens of the C-terminus, bonded to C
+TERMINAL_OXYGENS = ("OXT", "OT1", "OT2", "OC1", "OC2", "O1", "O2")
+
+_TEMPLATE_ATOMS = {name: {atom_id for bond in bonds for atom_id in bond} | set(TERMINAL_OXYGENS)
+                   for name, bonds in RESIDUE_BONDS.items()}
+
+def _bond_limit(radii, i, j):
+    return radii[i] + radii[j] + BOND_TOLERANCE
+
+def perceive_bonds(pro):
+    """
+    Finds the bonds of a protein without leaving python. Heavy atoms of standard residues are connected from the
+    residue templates in RESIDUE_BONDS, consecutive residues of a chain through C-N when they are close enough to be
+    bonded. Everything else (hydrogens, ligands, metals, disulfides and any atom a template does not know) is connected
+    by the covalent radius rule over a cell grid, after which every hydrogen keeps only its closest partner. Metals are
+    only bonded to the donor atoms in METAL_DONORS.
+
+    :param pro: Protein, the indices are into pro.get_atoms()
+    :return: (i, j) numpy arrays of bonded atom indices, i < j, sorted
+    """
+    atoms = pro.get_atoms()
+    coords = pro.get_coords()
+    n_atoms = len(atoms)
+    if not n_atoms:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    elements = [atom.element.lower() for atom in atoms]
+    radii = np.array([COVALENT_RADII.get(element, DEFAULT_RADIUS) for element in elements])
+    hydrogen = np.array([element == 'h' for element in elements])
+    metal = np.array([element in constants.METALS for element in elements])
+    donor = np.array([element in METAL_DONORS for element in elements])
+
+    # Heavy atoms whose bonds all come from a template
+    templated = np.zeros(n_atoms, dtype=bool)
+    template_i = []
+    template_j = []
+    peptide_i = []
+    peptide_j = []
+
+    position = 0
+    for chain in pro.chains:
+        previous_c = None
+        for residue in chain.residues:
+            bonds = RESIDUE_BONDS.get(residue.name)
+            if bonds is None:
+                position += len(residue.atoms)
+                previous_c = None
+                continue
+
+            aliases = ATOM_ALIASES.get(residue.name, {})
+            names = {}
+            for offset, atom in enumerate(residue.atoms):
+                names.setdefault(aliases.get(atom.id, atom.id), position + offset)
+
+            for name, index in names.items():
+                if name in _TEMPLATE_ATOMS[residue.name] and not hydrogen[index]:
+                    templated[index] = True
+
+            for first, second in bonds:
+                if first in names and second in names:
+                    template_i.append(names[first])
+                    template_j.append(names[second])
+
+            if "C" in names:
+                for oxygen in TERMINAL_OXYGENS:
+                    if oxygen in names:
+                        template_i.append(names["C"])
+                        template_j.append(names[oxygen])
+
+            if previous_c is not None and "N" in names:
+                peptide_i.append(previous_c)
+                peptide_j.append(names["N"])
+
+            previous_c = names.get("C")
+            position += len(residue.atoms)
+
+    # Residues that are not next to each other in space are not linked
+    peptide_i = np.array(peptide_i, dtype=np.int64)
+    peptide_j = np.array(peptide_j, dtype=np.int64)
+    if len(peptide_i):
+        linked = np.linalg.norm(coords[peptide_i] - coords[peptide_j], axis=1) <= _bond_limit(radii, peptide_i, peptide_j)
+        peptide_i, peptide_j = peptide_i[linked], peptide_j[linked]
+
+    # Covalent radius rule for everything the templates do not cover
+    cutoff = 2 * radii.max() + BOND_TOLERANCE
+    distance_i, distance_j, distances = spatial.SpatialIndex(coords).pairs(cutoff)
+    sulfur = np.array([element == 's' for element in elements])
+    keep = (distances > MIN_BOND_DISTANCE) & (distances <= _bond_limit(radii, distance_i, distance_j))
+    keep &= ~(templated[distance_i] & templated[distance_j]) | (sulfur[distance_i] & sulfur[distance_j])
+    keep &= ~(hydrogen[distance_i] & hydrogen[distance_j])
+    keep &= ~(metal[distance_i] | metal[distance_j]) | (metal[distance_i] & donor[distance_j]) | (donor[distance_i] & metal[distance_j])
+    distance_i, distance_j, distances = distance_i[keep], distance_j[keep], distances[keep]
+
+    # A hydrogen only ever has one bond, keep the shortest
+    h_pairs = np.flatnonzero(hydrogen[distance_i] | hydrogen[distance_j])
+    if len(h_pairs):
+        h_atoms = np.where(hydrogen[distance_i[h_pairs]], distance_i[h_pairs], distance_j[h_pairs])
+        ordered = np.lexsort((distances[h_pairs], h_atoms))
+        longer = np.zeros(len(ordered), dtype=bool)
+        longer[1:] = h_atoms[ordered][1:] == h_atoms[ordered][:-1]
+
+        keep = np.ones(len(distance_i), dtype=bool)
+        keep[h_pairs[ordered[longer]]] = False
+        distance_i, distance_j = distance_i[keep], distance_j[keep]
+
+    i = np.concatenate((np.array(template_i, dtype=np.int64), peptide_i, distance_i))
+    j = np.concatenate((np.array(template_j, dtype=np.int64), peptide_j, distance_j))
+    pairs = np.unique(np.stack((np.minimum(i, j), np.maximum(i, j)), axis=1), axis=0)
+
+    logger.debug(f"Found {len(pairs)} bonds between {n_atoms} atoms")
+    return pairs[:, 0], pairs[:, 1]
+
+class BondGraph:
+    """
+    Bonds of a set of atoms as a symmetric CSR adjacency: the neighbours of atom k are
+    indices[indptr[k]:indptr[k + 1]]. The atoms themselves are kept in atoms, in the order the indices refer to. Every
+    atom in the graph sees its bonds through Atom.bonds as a BondView, so existing code that treats the bonds as a list
+    keeps working.
+
+    Single bond edits (add_bond, remove_bond, clear_atom) are only recorded, the adjacency is rebuilt once for all of
+    them the next time it is read.
+    """
+
+    __slots__ = ['atoms', '_indptr', '_indices', '_pending']
+
+    def __init__(self, atoms: list, i, j):
+        self.atoms = atoms
+        # (i, j) with i < j -> whether the bond is there after the edits that are not in the adjacency yet
+        self._pending = {}
+        self._set_pairs(np.asarray(i, dtype=np.int64), np.asarray(j, dtype=np.int64))
+
+        for index, atom in enumerate(atoms):
+            atom.attach_bond_graph(self, index)
+
+    def _set_pairs(self, i, j):
+        # Both directions of every bond, sorted by the first atom so each atom's neighbours are one slice
+        first = np.concatenate((i, j))
+        second = np.concatenate((j, i))
+        order = np.lexsort((second, first))
+        self._indices = second[order]
+        self._indptr = np.zeros(len(self.atoms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(first, minlength=len(self.atoms)), out=self._indptr[1:])
+
+    def _flush(self):
+        """Applies the recorded edits to the adjacency"""
+        if not self._pending:
+            return
+
+        pending = self._pending
+        self._pending = {}
+        n_atoms = len(self.atoms)
+        edited = np.array(list(pending), dtype=np.int64).reshape(-1, 2)
+        present = np.array(list(pending.values()), dtype=bool)
+        i, j = self._pairs()
+        keys = i * n_atoms + j
+        edited_keys = edited[:, 0] * n_atoms + edited[:, 1]
+        keys = np.union1d(keys[~np.isin(keys, edited_keys[~present])], edited_keys[present])
+        self._set_pairs(keys // n_atoms, keys % n_atoms)
+
+    @property
+    def indptr(self):
+        self._flush()
+        return self._indptr
+
+    @property
+    def indices(self):
+        self._flush()
+        return self._indices
+
+    def __len__(self):
+        """Number of bonds"""
+        return len(self.indices) // 2
+
+    def neighbours(self, index: int):
+        """Indices of the atoms bonded to an atom"""
+        return self.indices[self.indptr[index]:self.indptr[index + 1]]
+
+    def degree(self):
+        """Number of bonds of every atom"""
+        return np.diff(self.indptr)
+
+    def pairs(self):
+        """
+        :return: (i, j) arrays with every bond once, i < j
+        """
+        self._flush()
+        return self._pairs()
+
+    def _pairs(self):
+        first = np.repeat(np.arange(len(self.atoms)), np.diff(self._indptr))
+        once = first < self._indices
+        return first[once], self._indices[once]
+
+    def has_bond(self, index_i: int, index_j: int):
+        """Whether two atoms are bonded, without rebuilding the adjacency for edits that are still recorded"""
+        key = (min(index_i, index_j), max(index_i, index_j))
+        if key in self._pending:
+            return self._pending[key]
+
+        return bool(np.any(self._indices[self._indptr[index_i]:self._indptr[index_i + 1]] == index_j))
+
+    def neighbours_of(self, indices):
+        """
+        Neighbours of many atoms at once
+
+        :param indices: atoms to look at
+        :return: (position in indices each neighbour belongs to, neighbour) arrays
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        owner, positions = spatial.concatenated_ranges(self.indptr[indices], self.indptr[indices + 1])
+        return owner, self.indices[positions]
+
+    def components(self):
+        """
+        Connected components, found by repeatedly hooking the larger root of every bond onto the smaller one and then
+        pointer jumping until every atom points at its root
+
+        :return: array with the component label (0, 1, ...) of every atom, components are numbered by their first atom
+        """
+        i, j = self.pairs()
+        parent = np.arange(len(self.atoms))
+        while True:
+            root_i, root_j = parent[i], parent[j]
+            differ = root_i != root_j
+            if not np.any(differ):
+                break
+
+            np.minimum.at(parent, np.maximum(root_i, root_j)[differ], np.minimum(root_i, root_j)[differ])
+            while True:
+                jumped = parent[parent]
+                if np.array_equal(jumped, parent):
+                    break
+
+                parent = jumped
+
+        return np.unique(parent, return_inverse=True)[1].reshape(-1)
+
+    def add_bond(self, index_i: int, index_j: int):
+        self._pending[(min(index_i, index_j), max(index_i, index_j))] = True
+
+    def add_bonds(self, index_i, index_j):
+        """Adds many bonds with a single rebuild of the adjacency, bonds that are already there are kept once"""
+        index_i = np.asarray(index_i, dtype=np.int64)
+        index_j = np.asarray(index_j, dtype=np.int64)
+        i, j = self.pairs()
+        pairs = np.stack((np.concatenate((i, np.minimum(index_i, index_j))), np.concatenate((j, np.maximum(index_i, index_j)))), axis=1)
+        pairs = np.unique(pairs, axis=0)
+        self._set_pairs(pairs[:, 0], pairs[:, 1])
+
+    def remove_bond(self, index_i: int, index_j: int):
+        self._pending[(min(index_i, index_j), max(index_i, index_j))] = False
+
+    def clear_atom(self, index: int):
+        """Removes every bond of an atom"""
+        bonded = set(self._indices[self._indptr[index]:self._indptr[index + 1]].tolist())
+        bonded.update(i if j == index else j for i, j in self._pending if index in (i, j))
+        for other in bonded:
+            self.remove_bond(index, other)
+
+    def subgraph(self, keep):
+        """
+        Graph over the atoms in keep with the bonds between them, the atoms are attached to the new graph. Atoms that are
+        left out are detached with their current bonds as a plain list.
+
+        :param keep: boolean mask over atoms
+        :return: BondGraph
+        """
+        keep = np.asarray(keep, dtype=bool)
+        for index in np.flatnonzero(~keep).tolist():
+            self.atoms[index].detach_bond_graph()
+
+        renumber = np.cumsum(keep) - 1
+        i, j = self.pairs()
+        both = keep[i] & keep[j]
+        return BondGraph([atom for atom, kept in zip(self.atoms, keep.tolist()) if kept], renumber[i[both]], renumber[j[both]])
+
+class BondView:
+    """List-like view of the bonds of one atom in a BondGraph"""
+
+    __slots__ = ['graph', 'index']
+
+    def __init__(self, graph: BondGraph, index: int):
+        self.graph = graph
+        self.index = index
+
+    def __iter__(self):
+        atoms = self.graph.atoms
+        return iter([atoms[k] for k in self.graph.neighbours(self.index).tolist()])
+
+    def __len__(self):
+        return int(self.graph.indptr[self.index + 1] - self.graph.indptr[self.index])
+
+    def __getitem__(self, item):
+        return list(self)[item]
+
+    def __contains__(self, atom):
+        if atom.bond_graph() is self.graph:
+            return self.graph.has_bond(self.index, atom._bond_index)
+
+        return any(bonded is atom for bonded in self)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def _index_of(self, atom):
+        if atom.bond_graph() is not self.graph:
+            raise ValueError(f"{atom} is not in the same bond graph")
+
+        return atom._bond_index
+
+    def append(self, atom):
+        self.graph.add_bond(self.index, self._index_of(atom))
+
+    def remove(self, atom):
+        if atom not in self:
+            raise ValueError(f"{atom} is not bonded")
+
+        self.graph.remove_bond(self.index, self._index_of(atom))
+
+    def clear(self):
+        self.graph.clear_atom(self.index)
@@ -36,10 +36,7 @@ class Chain:
         result = cls.__new__(cls)
         memo[id(self)] = result
 
-        result.name = copy.deepcopy(self.name, memo)
-        for res in self.residues:
-            copy_res = copy.deepcopy(res)
-            result.add_residue(copy_res)
-
+        result.name = self.name
+        result.residues = [copy.deepcopy(res, memo) for res in self.residues]
         return result
 
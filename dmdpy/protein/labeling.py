@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import csv
+import logging
+import pkg_resources
+
+#PHD3 Imports
+
+__all__ = [
+    'LabelTable',
+    'ResidueLabels',
+    'label_table'
+]
+
+logger = logging.getLogger(__name__)
+
+# The compiled atom_label.csv, shared by every protein in the process
+_label_table = None
+
+def label_table():
+    """
+    :return: LabelTable of dmdpy/resources/atom_label.csv, read the first time it is asked for
+    """
+    global _label_table
+    if _label_table is None:
+        _label_table = LabelTable(pkg_resources.resource_filename('dmdpy.resources', 'atom_label.csv'))
+
+    return _label_table
+
+class ResidueLabels:
+    """
+    The rows of atom_label.csv for one residue (and optionally a terminus) compiled for lookups. Every atom name knows
+    the naming schemes it appears in as a bitmask, so the schemes that contain a whole set of names are the AND of
+    their masks, and the first of those is the one the residue uses. The scheme found for a set of names is remembered.
+    """
+
+    __slots__ = ['rows', 'scheme_bits', 'positions', '_every_scheme', '_schemes']
+
+    def __init__(self, rows: list, n_schemes: int):
+        self.rows = tuple(tuple(row) for row in rows)
+        self.scheme_bits = {}
+        self.positions = {}
+        for position, row in enumerate(self.rows):
+            for scheme, name in enumerate(row):
+                self.scheme_bits[name] = self.scheme_bits.get(name, 0) | (1 << scheme)
+                self.positions.setdefault((scheme, name), position)
+
+        self._every_scheme = (1 << n_schemes) - 1
+        self._schemes = {}
+
+    def scheme(self, names):
+        """
+        :param names: atom names of the residue
+        :return: index of the first scheme that has every one of the names, None if there is none
+        """
+        key = frozenset(names)
+        if key not in self._schemes:
+            bits = self._every_scheme
+            for name in key:
+                bits &= self.scheme_bits.get(name, 0)
+
+            self._schemes[key] = (bits & -bits).bit_length() - 1 if bits else None
+
+        return self._schemes[key]
+
+    def missing(self, names):
+        """First of the names that is in no scheme at all, or that rules out the last scheme left"""
+        bits = self._every_scheme
+        for name in names:
+            bits &= self.scheme_bits.get(name, 0)
+            if not bits:
+                return name
+
+        return None
+
+    def target(self, scheme: int, name: str, column: int):
+        """
+        :return: what the atom called name in scheme is called in the scheme at column
+        """
+        return self.rows[self.positions[(scheme, name)]][column]
+
+class LabelTable:
+    """
+    atom_label.csv grouped by residue. The lookups for each residue/terminus pair are compiled the first time that pair
+    is relabeled.
+    """
+
+    __slots__ = ['schemes', '_rows', '_compiled']
+
+    def __init__(self, file_name: str):
+        self._rows = {}
+        try:
+            with open(file_name) as csvfile:
+                csvreader = csv.reader(csvfile)
+                self.schemes = next(csvreader)[1:]
+                for row in csvreader:
+                    self._rows.setdefault(row[0], []).append(row[1:])
+
+        except IOError:
+            logger.exception(f"Could not read the label table: {file_name}")
+            raise
+
+        self._compiled = {}
+        logger.debug(f"Loaded in {file_name}")
+
+    def __contains__(self, residue_name: str):
+        return residue_name in self._rows
+
+    def scheme_index(self, scheme: str):
+        """
+        :return: column of a naming scheme
+        """
+        try:
+            return self.schemes.index(scheme)
+
+        except ValueError:
+            raise ValueError("Format key not found in atom_label.csv")
+
+    def residue_labels(self, residue_name: str, terminus: str = None):
+        """
+        :param residue_name: three letter name of the residue
+        :param terminus: None, "NTERM" or "CTERM", the rows of the terminus are added to the residue's
+        :return: ResidueLabels, None if the residue is not in the table
+        """
+        if residue_name not in self._rows:
+            return None
+
+        key = (residue_name, terminus)
+        if key not in self._compiled:
+            rows = self._rows[residue_name] + (self._rows[terminus] if terminus is not None else [])
+            self._compiled[key] = ResidueLabels(rows, len(self.schemes))
+
+        return self._compiled[key]
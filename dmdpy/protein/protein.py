@@ -5,24 +5,128 @@ Date    ==>> April 16, 2020
 """
 
 #Standard Library Imports
+import copy
+import gc
 import logging
-import pkg_resources
-import csv
 import os
+import weakref
 import numpy as np
 from subprocess import Popen, PIPE
 
 #PHD3 Imports
-from ..utility import constants
-from . import chain, residue
+from ..utility import constants, pdbio, spatial
+from . import atom, chain, residue, bonding, selection, labeling
 
 __all__=[
     'Protein'
 ]
 
+class _Topology:
+    """
+    Frozen snapshot of everything about a protein but its coordinates: the chain/residue/atom hierarchy as flat
+    tuples, the substrate chain, metals and non-residues as positions in it and the bonds as index pairs. Clones share
+    the snapshot of the protein they came from and only build their own objects from it when they are needed.
+    """
+
+    __slots__ = ['chains', 'chain_ends', 'residues', 'residue_ends', 'atoms', 'sub_chain', 'metals', 'non_residues', 'bonds']
+
+    def __init__(self, pro):
+        chains = pro.chains
+        residues = [res for ch in chains for res in ch.residues]
+        atoms = [a for res in residues for a in res.atoms]
+
+        self.chains = tuple(ch.name for ch in chains)
+        self.chain_ends = tuple(np.cumsum([len(ch.residues) for ch in chains]).tolist())
+        self.residues = tuple((res.name, res.number, res.inConstr_number) for res in residues)
+        self.residue_ends = tuple(np.cumsum([len(res.atoms) for res in residues]).tolist())
+        self.atoms = tuple((a.element, a.id, a.number, a.freeze) for a in atoms)
+
+        # The substrate chain is normally the last chain, when it is not it is (almost always) empty and is copied
+        chain_position = next((k for k, ch in enumerate(chains) if ch is pro.sub_chain), None)
+        self.sub_chain = chain_position if chain_position is not None else copy.deepcopy(pro.sub_chain)
+
+        # Metals and non-residues outside of the chains have no coordinates to come back with and are left out
+        atom_position = {id(a): k for k, a in enumerate(atoms)}
+        residue_position = {id(res): k for k, res in enumerate(residues)}
+        self.metals = tuple(atom_position[id(a)] for a in pro.metals if id(a) in atom_position)
+        self.non_residues = tuple(residue_position[id(res)] for res in pro.non_residues if id(res) in residue_position)
+
+        # Bonds in the bond graph as well as any kept as plain lists on the atoms
+        bond_i, bond_j = [], []
+        graph = pro.get_bond_graph()
+        if graph is not None:
+            bond_i, bond_j = graph.pairs()
+
+        list_i, list_j = [], []
+        for k, a in enumerate(atoms):
+            if a.bond_graph() is None:
+                for bonded in a.bonds:
+                    if atom_position.get(id(bonded), -1) > k:
+                        list_i.append(k)
+                        list_j.append(atom_position[id(bonded)])
+
+        pairs = np.stack((np.concatenate((bond_i, list_i)), np.concatenate((bond_j, list_j))), axis=1).astype(np.int64)
+        self.bonds = np.unique(pairs, axis=0) if (graph is not None or list_i) else None
+
+    def build(self, pro):
+        """
+        Creates the chains, residues and atoms of the snapshot on a protein, the atoms get the rows of pro.coords as
+        their coordinates
+        """
+        # None of the objects created here can be garbage, so don't let the collector rescan the growing graph
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            atoms = []
+            for (element, id, number, freeze), row in zip(self.atoms, pro.coords):
+                new_atom = atom.Atom(element=element, coords=row, id=id, number=number)
+                new_atom.freeze = freeze
+                atoms.append(new_atom)
+
+            residues = []
+            start = 0
+            for (name, number, inConstr_number), end in zip(self.residues, self.residue_ends):
+                res = residue.Residue(name=name, number=number)
+                res.inConstr_number = inConstr_number
+                res.atoms = atoms[start:end]
+                for a in res.atoms:
+                    a.residue = res
+
+                residues.append(res)
+                start = end
+
+            chains = []
+            start = 0
+            for name, end in zip(self.chains, self.chain_ends):
+                ch = chain.Chain(name)
+                ch.residues = residues[start:end]
+                for res in ch.residues:
+                    res.chain = ch
+                    for a in res.atoms:
+                        a.chain = ch
+
+                chains.append(ch)
+                start = end
+
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        pro.chains = chains
+        pro.sub_chain = chains[self.sub_chain] if isinstance(self.sub_chain, int) else copy.deepcopy(self.sub_chain)
+        pro.metals = [atoms[k] for k in self.metals]
+        pro.non_residues = [residues[k] for k in self.non_residues]
+        pro._atoms = atoms
+        if self.bonds is not None:
+            pro._bond_graph = bonding.BondGraph(atoms, self.bonds[:, 0], self.bonds[:, 1])
+
 class Protein:
 
-    __slots__ = ['chains', '_logger', 'non_residues', 'metals', 'name', 'sub_chain', 'coords']
+    __slots__ = ['chains', '_logger', 'non_residues', 'metals', 'name', 'sub_chain', 'coords', '_atoms', '_index', '_spatial', '_bond_graph',
+                 '_topology', '_pending', '_shared', '_clones', '__weakref__']
+
+    # Attributes a clone only fills in from its topology when one of them is first used
+    _LAZY = ('chains', 'non_residues', 'metals', 'sub_chain')
 
     def __init__(self, name: str, chains: [chain.Chain]):
 
@@ -35,244 +139,461 @@ class Protein:
         self.metals = []
         self.sub_chain = chain.Chain()
         self.coords = None
+        self._atoms = None
+        self._index = None
+        self._spatial = None
+        self._bond_graph = None
+        self._topology = None
+        self._pending = None
+        self._shared = False
+        self._clones = []
 
         self._logger.debug(f"Created protein {str(self)}")
 
+    def __getattr__(self, name):
+        # Only reached for attributes that are not set, which for a clone means its hierarchy has not been built yet
+        if name in Protein._LAZY and object.__getattribute__(self, '_pending') is not None:
+            self._materialize()
+            return getattr(self, name)
+
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def clone(self, name: str = None):
+        """
+        Independent copy of the protein. The copy shares the topology snapshot and the coordinate array of this protein,
+        so cloning does not depend on the number of atoms. The chains, residues and atoms of the copy are only created
+        the first time they are used, and the copy only takes its own coordinate array when it is first written to or
+        when its atoms are built. Coordinate only work (get_coords, distances_to, aa_rmsd, spatial_index, ...) on a clone
+        never builds its atoms or copies the array.
+
+        The snapshot is taken when the protein is first cloned and kept until clear_cache is called, which has to be done
+        after editing the atoms by hand (as for any other change to the atoms). This protein is left as it is, its array
+        and the coords of its atoms stay writable. Before set_coords, translate or center change it, the clones still
+        sharing the array take their copy. Writing to the array or the coords of an atom directly is not seen in time,
+        so set the coordinates through those methods (or clone afterwards) while clones are around.
+
+        :param name: name of the copy, defaults to the name of this protein
+        :return: Protein
+        """
+        if self._topology is None and self._pending is None:
+            self._topology = _Topology(self)
+
+        # The clone only gets a read-only view, writing to it has to go through _own_coords
+        coords = self.get_coords().view()
+        coords.flags.writeable = False
+
+        result = Protein.__new__(Protein)
+        result._logger = self._logger
+        result.name = self.name if name is None else name
+        result.coords = coords
+        result._atoms = None
+        result._index = None
+        result._spatial = self._spatial
+        result._bond_graph = None
+        result._topology = self._topology if self._pending is None else self._pending
+        result._pending = result._topology
+        result._shared = True
+        result._clones = []
+        self._clones.append(weakref.ref(result))
+        return result
+
+    def _materialize(self):
+        # The atoms get writable views of the coordinates, so a clone copies the shared array before building them
+        self._own_coords()
+        topology = self._pending
+        self._pending = None
+        topology.build(self)
+        self._logger.debug(f"Built the atoms of clone {self.name}")
+
+    def _release_clones(self):
+        """Has the clones that still share the coordinate array take their own copy of it"""
+        clones = self._clones
+        self._clones = []
+        for reference in clones:
+            clone = reference()
+            if clone is not None and clone._shared:
+                clone._own_coords()
+
+    def _own_coords(self):
+        """The coordinate array, safe to write to: clones sharing it copy it first and a shared one is copied"""
+        self._release_clones()
+        coords = self.get_coords()
+        if self._shared:
+            self.coords = coords.copy()
+            self._shared = False
+            if self._pending is None:
+                for atom, row in zip(self.get_atoms(), self.coords):
+                    atom.coords = row
+
+        return self.coords
+
     def reformat_protein(self, relabel_protein=True):
         # This is the BIG BIG BIG function that fixes EVERYTHING of a pdb for DMD
         # Don't question why it does things, it needs to
-        
+
         self.non_residues.clear()
         self.metals.clear()
 
-        res_renum = 1
-        chain_let = 'A'
+        self._partition_residues()
+        self._build_substrate_chain()
 
-        chain_num = 0
-        self._logger.debug("Looping over the chains")
-        while chain_num < len(self.chains):
+        # Atoms have been moved around and renumbered
+        self.clear_cache()
+
+        if relabel_protein:
+            self._logger.debug("Relabeling the protein")
+            self.relabel()
+        
+        else: #relabel calls make_bond_table already
+            self._logger.debug("Making the bond table for the protein")
+            self.make_bond_table()
+
+    def _partition_residues(self):
+        """
+        One pass over the chains that keeps the amino acids in place and renumbers them, pulls the metals out of every
+        other residue into self.metals and what is left of those residues into self.non_residues. Chains left without
+        residues are dropped and the rest are lettered from A.
+        """
+        amino_acids = set(constants.AMINO_ACID_RESIDUES)
+        metals = set(constants.METALS)
+
+        chains = []
+        res_renum = 1
+        for ch in self.chains:
+            kept = []
             atom_renum = 1
-            residue_num = 0
-            while residue_num < len(self.chains[chain_num].residues):
+            for res in ch.residues:
                 # Case where we have a non-residue/metal, most likely substrate
-                if self.chains[chain_num].residues[residue_num].name not in constants.AMINO_ACID_RESIDUES:
-                    atom_num = 0
-                    while atom_num < len(self.chains[chain_num].residues[residue_num].atoms):
-                        # Remove metal from this, and make it its own residue essentially
-                        if self.chains[chain_num].residues[residue_num].atoms[atom_num].element.lower() in constants.METALS:
-                            self._logger.debug(f"Found a metal: {self.chains[chain_num].residues[residue_num].atoms[atom_num]} in residue {self.chains[chain_num].residues[residue_num]}")
-                            
-                            if self.chains[chain_num].residues[residue_num].atoms[atom_num].element.lower() == "zn":
-                                if self.chains[chain_num].residues[residue_num].atoms[atom_num].id.lower() in constants.METALS:
-                                    self.chains[chain_num].residues[residue_num].atoms[atom_num].element = self.chains[chain_num].residues[residue_num].atoms[atom_num].id.capitalize()
-
-                            self.metals.append(self.chains[chain_num].residues[residue_num].atoms.pop(atom_num))
-                            atom_num -= 1
-
-                        atom_num += 1
-
-                    self._logger.debug(f"Removing residue: {self.chains[chain_num].residues[residue_num]}")
-                    if self.chains[chain_num].residues[residue_num].atoms:
-                        self.non_residues.append(self.chains[chain_num].residues.pop(residue_num))
-
-                    else:
-                        del self.chains[chain_num].residues[residue_num]
-
-                else:
-                    # update residue, and atomic numbering for normal atoms
-                    self._logger.debug(f"Renumbering residue: {self.chains[chain_num].residues[residue_num]} to {res_renum} and its atoms starting at {atom_renum}")
-                    self.chains[chain_num].residues[residue_num].number = res_renum
-                    self.chains[chain_num].residues[residue_num].inConstr_number = residue_num + 1
-                    for atom in self.chains[chain_num].residues[residue_num].atoms:
-                        atom.number = atom_renum
-                        atom_renum += 1
-
-                    res_renum += 1
-                    residue_num += 1
-                    self._logger.debug("Finished renumbering")
-
-            if not self.chains[chain_num].residues:
-                self._logger.debug(f"Removing chain: {self.chains[chain_num]}")
-                del self.chains[chain_num]
+                if res.name not in amino_acids:
+                    # Remove metal from this, and make it its own residue essentially
+                    remaining = []
+                    for atom in res.atoms:
+                        element = atom.element.lower()
+                        if element in metals:
+                            if element == "zn" and atom.id.lower() in metals:
+                                atom.element = atom.id.capitalize()
 
-            else:
-                self.chains[chain_num].name = chain_let
-                chain_let = chr(ord(chain_let) + 1)
-                chain_num += 1
+                            self.metals.append(atom)
 
-        #Now we add in the non-residues and the metals into a new chain!
-        res_num = 1
-        if self.non_residues or self.metals:
-            self._logger.debug("Rearranging the non-residue substrates and metals")
-            self._logger.debug("Creating a substrate/metal chain")
-            atom_num = 1
+                        else:
+                            remaining.append(atom)
 
-            # in the event that we have only substrate
-            if not len(self.chains):
-                self.sub_chain.name = 'A'
+                    res.atoms[:] = remaining
+                    res._atom_index = None
+                    if remaining:
+                        self.non_residues.append(res)
 
-            else:
-                self.sub_chain.name = chr(ord(self.chains[-1].name) + 1)
+                    continue
 
-            # Want to sort the metals!
-            self.metals.sort(key=lambda metal: metal.element)
+                # update residue, and atomic numbering for normal atoms
+                res.number = res_renum
+                res.inConstr_number = len(kept) + 1
+                for atom in res.atoms:
+                    atom.number = atom_renum
+                    atom_renum += 1
 
-            cur_metal = ""
-            metal_num = 1
-            for metal in self.metals:
-                metal.number = atom_num
-                if cur_metal != metal.element:
-                    metal_num = 1
-                    cur_metal = metal.element
+                res_renum += 1
+                kept.append(res)
 
-                if len(metal.element) == 1:
-                    name = metal.element.upper() + f"{metal_num:02d}"
+            ch.residues[:] = kept
+            if kept:
+                ch.name = chr(ord('A') + len(chains))
+                chains.append(ch)
 
-                elif len(metal.element) == 2:
-                    name = metal.element.upper() + f"{metal_num:01d}"
+        self._logger.debug(f"Kept {len(chains)} chains and {res_renum - 1} residues, found {len(self.metals)} metals and {len(self.non_residues)} non-residues")
+        self.chains[:] = chains
 
-                else:
-                    self._logger.error(f"Encountered a metal with an unusual element ID: {metal}")
-                    raise ValueError
+    def _build_substrate_chain(self):
+        """Gives every metal a residue of its own and appends them, followed by the non-residues, as a new last chain"""
+        if not self.non_residues and not self.metals:
+            return
 
-                if len(name) != 3:
-                    if metal_num > 35:
-                        self._logger.error(f"The name for this is too long: {metal} with name: {name}")
-                        raise ValueError
+        self._logger.debug("Creating a substrate/metal chain")
 
-                    name = metal.element.upper() + f"{chr(metal_num-10 + ord('A'))}"
+        # in the event that we have only substrate
+        if not len(self.chains):
+            self.sub_chain.name = 'A'
 
-                # DMD does not know how to handle any other metal but zinc
-                if metal.element.lower() != "zn":
-                    metal.element = 'Zn'
+        else:
+            self.sub_chain.name = chr(ord(self.chains[-1].name) + 1)
 
-                metal_residue = residue.Residue(name=name, number=res_num)
-                self._logger.debug(f"Adding metal {metal_residue} as a residue to substrate chain")
-                self.sub_chain.add_residue(metal_residue)
-                metal_residue.add_atom(metal)
+        # Want to sort the metals!
+        self.metals.sort(key=lambda metal: metal.element)
 
-                res_num += 1
-                metal_num += 1
-                atom_num += 1
+        res_num = 1
+        atom_num = 1
+        cur_metal = ""
+        metal_num = 1
+        for metal in self.metals:
+            metal.number = atom_num
+            if cur_metal != metal.element:
+                metal_num = 1
+                cur_metal = metal.element
 
-            # Issue with assigning chain to atom
-            for res in self.non_residues:
-                start = 100
-                for atom in res.atoms:
-                    atom.id = f"{atom.element.upper()[0]}{start}"
-                    start += 1
+            if len(metal.element) == 1:
+                name = metal.element.upper() + f"{metal_num:02d}"
 
-                self._logger.debug(f"Adding residue {res} to substrate chain")
-                self.sub_chain.add_residue(res)
-                res.number = res_num
-                res.inConstr_number = res_num
-                for atom in res.atoms:
-                    atom.number = atom_num
-                    atom_num += 1
+            elif len(metal.element) == 2:
+                name = metal.element.upper() + f"{metal_num:01d}"
 
-                res_num += 1
+            else:
+                self._logger.error(f"Encountered a metal with an unusual element ID: {metal}")
+                raise ValueError
 
-            self._logger.debug("Adding substrate chain to master chain")
-            self.chains.append(self.sub_chain)
+            if len(name) != 3:
+                if metal_num > 35:
+                    self._logger.error(f"The name for this is too long: {metal} with name: {name}")
+                    raise ValueError
 
-        if relabel_protein:
-            self._logger.debug("Relabeling the protein")
-            self.relabel()
-        
-        else: #relabel calls make_bond_table already
-            self._logger.debug("Making the bond table for the protein")
-            self.make_bond_table()
+                name = metal.element.upper() + f"{chr(metal_num-10 + ord('A'))}"
+
+            # DMD does not know how to handle any other metal but zinc
+            if metal.element.lower() != "zn":
+                metal.element = 'Zn'
+
+            metal_residue = residue.Residue(name=name, number=res_num)
+            self.sub_chain.add_residue(metal_residue)
+            metal_residue.add_atom(metal)
+
+            res_num += 1
+            metal_num += 1
+            atom_num += 1
+
+        # Issue with assigning chain to atom
+        for res in self.non_residues:
+            start = 100
+            for atom in res.atoms:
+                atom.id = f"{atom.element.upper()[0]}{start}"
+                start += 1
+
+            self.sub_chain.add_residue(res)
+            res.number = res_num
+            res.inConstr_number = res_num
+            for atom in res.atoms:
+                atom.number = atom_num
+                atom_num += 1
+
+            res_num += 1
+
+        self._logger.debug("Adding substrate chain to master chain")
+        self.chains.append(self.sub_chain)
 
     def get_atom(self, identifier):
-        for chain in self.chains:
-            if chain.name == identifier[0]:
-                for residue in chain.residues:
-                    if residue.number == identifier[1]:
-                        for atom in residue.atoms:
-                            if atom.id == identifier[2]:
-                                return atom
+        atom = self._find((identifier[0], identifier[1], identifier[2]))
+        if atom is None:
+            self._logger.error(f"Could not find requested atom {identifier}")
+            raise ValueError
 
-        self._logger.error(f"Could not find requested atom {identifier}")
-        raise ValueError
+        return atom
 
     def get_residue(self, identifier):
-        for chain in self.chains:
-            if chain.name == identifier[0]:
-                for residue in chain.residues:
-                    if residue.number == identifier[1]:
-                        return residue
+        residue = self._find((identifier[0], identifier[1]))
+        if residue is None:
+            self._logger.error("Could not find requested residue")
+            raise ValueError
 
-        self._logger.error("Could not find requested residue")
-        raise ValueError
+        return residue
 
     def get_chain(self, identifier):
-        for chain in self.chains:
-            if chain.name == identifier:
-                return chain
+        chain = self._find((identifier,))
+        if chain is None:
+            self._logger.error("Could not find the requested chain")
+            raise ValueError
+
+        return chain
+
+    def _build_index(self):
+        """
+        Maps (chain,), (chain, resnum) and (chain, resnum, atom id) to the position of the first chain, residue or atom
+        that matches, in the same order the linear scans used to search in
+        """
+        index = {}
+        for chain_pos, chain in enumerate(self.chains):
+            index.setdefault((chain.name,), (chain_pos,))
+            for residue_pos, residue in enumerate(chain.residues):
+                index.setdefault((chain.name, residue.number), (chain_pos, residue_pos))
+                for atom_pos, atom in enumerate(residue.atoms):
+                    index.setdefault((chain.name, residue.number, atom.id), (chain_pos, residue_pos, atom_pos))
+
+        self._index = index
+
+    def _resolve(self, key, path):
+        """Follows a path from the index, returns the object it leads to if that still matches the key"""
+        try:
+            found = self.chains[path[0]]
+            if found.name != key[0]:
+                return None
+
+            if len(path) > 1:
+                found = found.residues[path[1]]
+                if found.number != key[1]:
+                    return None
+
+            if len(path) > 2:
+                found = found.atoms[path[2]]
+                if found.id != key[2]:
+                    return None
+
+        except IndexError:
+            return None
+
+        return found
+
+    def _find(self, key):
+        """
+        Looks up a chain, residue or atom through the index. The index is built the first time it is needed and again
+        after it is dropped (clear_cache, reformat_protein, relabel). A hit is checked against the protein, so renumbering
+        or moving things around without clear_cache costs one rebuild, a miss costs none. An atom that was renamed since
+        (see Atom.id) is found through the index of its residue.
+
+        :param key: (chain,), (chain, resnum) or (chain, resnum, atom id)
+        :return: the chain, residue or atom, None if there is none
+        """
+        if self._index is None:
+            self._build_index()
+
+        try:
+            path = self._index.get(key)
+
+        except TypeError:
+            return None
 
-        self._logger.error("Could not find the requested chain")
-        raise ValueError
+        if path is not None:
+            found = self._resolve(key, path)
+            if found is None:
+                self._build_index()
+                path = self._index.get(key)
+                found = self._resolve(key, path) if path is not None else None
+
+            return found
+
+        if len(key) == 3:
+            res = self._find(key[:2])
+            if res is not None:
+                try:
+                    found = res.get_atom(key[2])
 
-    def write_pdb(self, name=None, exclude_sub_chain=False):
+                except ValueError:
+                    return None
+
+                # The atom was renamed after the index was built
+                self._index = None
+                return found
+
+        return None
+
+    def select(self, expression: str):
+        """
+        Atoms matching a selection expression, ie. "chain A and resid 10-40 and not element H" (see selection.Selection)
+
+        :return: list of atoms in the order of get_atoms
+        """
+        return selection.Selection(expression).atoms(self)
+
+    def write_pdb(self, name=None, exclude_sub_chain=False, frames=None):
+        """
+        Writes the protein out to a pdb. Every line is formatted in one pass and written as a single buffer.
+
+        :param name: pdb to write, defaults to the name of the protein
+        :param exclude_sub_chain: leave out the substrate/metal chain
+        :param frames: optional iterable of (N, 3) coordinate arrays (in the order of get_atoms), one model is written
+        for each of them instead of the current coordinates
+        """
         if name is None:
             name = self.name
 
         self._logger.debug(f"Writing out pdb: {name}")
+
+        # TER after every chain but the last, and after every residue of the substrate/metal chain
+        residues = []
+        ter_after = []
+        for chain in self.chains[:-1]:
+            residues.extend(chain.residues)
+            ter_after.append(sum(len(r.atoms) for r in residues))
+
+        if self.sub_chain.residues:
+            if not exclude_sub_chain:
+                for residue in self.sub_chain.residues:
+                    residues.append(residue)
+                    ter_after.append(ter_after[-1] + len(residue.atoms) if ter_after else len(residue.atoms))
+
+        else:
+            residues.extend(self.chains[-1].residues)
+            ter_after.append(sum(len(r.atoms) for r in residues))
+
+        # The written atoms are the first ones of get_atoms unless the substrate chain lives outside of self.chains
+        if not self.sub_chain.residues or self.chains[-1] is self.sub_chain:
+            columns = self.get_columns()
+            n_written = ter_after[-1] if ter_after else 0
+            columns = {key: value[:n_written] for key, value in columns.items()}
+            rows = slice(0, n_written)
+
+        else:
+            columns = self.get_columns(residues)
+            rows = None
+
+        template = pdbio.pdb_template(columns, ter_after)
+
+        if frames is None:
+            frames = [columns["coords"]]
+
+        elif rows is not None:
+            frames = (np.asarray(coords)[rows] for coords in frames)
+
         try:
-            with open(name, 'w') as pdb:
-                for chain in self.chains[:-1]:
-                    for residue in chain.residues:
-                        for atom in residue.atoms:
-                            pdb.write(atom.pdb_line())
-                    pdb.write('TER\n')
-
-                if self.sub_chain.residues:
-                    if not exclude_sub_chain:
-                        for residue in self.sub_chain.residues:
-                            for atom in residue.atoms:
-                                pdb.write(atom.pdb_line())
-                            pdb.write('TER\n')
-
-                else:
-                    for residue in self.chains[-1].residues:
-                        for atom in residue.atoms:
-                            pdb.write(atom.pdb_line())
-                    pdb.write('TER\n')
-
-                pdb.write('ENDMDL\n')
+            pdbio.write_pdb_models(name, template, frames)
 
         except IOError:
             self._logger.exception(f"Error writing out to file {self.name}")
             raise
 
+    def get_columns(self, residues=None):
+        """
+        Topology and coordinates of the protein as arrays, laid out like utilities.read_pdb_columns
+
+        :param residues: residues to include, defaults to every residue in chain order
+        :return: dictionary of numpy arrays with the keys number, id, resname, resnum, chain, element and coords
+        """
+        if residues is None:
+            residues = [r for c in self.chains for r in c.residues]
+            coords = self.get_coords()
+
+        else:
+            coords = np.array([a.coords for r in residues for a in r.atoms], dtype=float).reshape(-1, 3)
+
+        counts = [len(r.atoms) for r in residues]
+        return {
+            "number": np.array([a.number for r in residues for a in r.atoms]),
+            "id": np.array([a.id for r in residues for a in r.atoms], dtype=str),
+            "resname": np.repeat(np.array([r.name for r in residues], dtype=str), counts),
+            "chain": np.repeat(np.array([r.chain.name for r in residues], dtype=str), counts),
+            "resnum": np.repeat(np.array([r.number for r in residues], dtype=int), counts),
+            "element": np.array([a.element for r in residues for a in r.atoms], dtype=str),
+            "coords": coords
+        }
+
     def relabel(self, format: str="DMD"):
 
         #Need to make the bond table
         self.make_bond_table()
 
-        atom_label_dict = {}
-        with open(pkg_resources.resource_filename('dmdpy.resources', 'atom_label.csv')) as csvfile:
-            csvreader = csv.reader(csvfile)
-            schemenames = next(csvreader)[1:]
-            try:
-                newid = schemenames.index(format)
-
-            except ValueError:
-                raise ValueError("Format key not found in atom_label.csv")
-
-            for row in csvreader:
-                if row[0] in atom_label_dict:
-                    atom_label_dict[row[0]].append(row[1:])
+        table = labeling.label_table()
+        newid = table.scheme_index(format)
 
-                else:
-                    atom_label_dict[row[0]] = [row[1:]]
+        def rename_atoms(residue, labels, atoms):
+            # Find the column that has the current naming scheme present
+            scheme = labels.scheme([atom.id for atom in atoms])
+            if scheme is None:
+                raise ValueError(f"Could not find the naming scheme for {residue.name}{residue.number} {labels.missing([atom.id for atom in atoms])}")
 
-        self._logger.debug("Loaded in the atom_label.csv file")
+            for atom in atoms:
+                atom.id = labels.target(scheme, atom.id, newid)
 
         def rename_residue(residue, terminus: str = None):
 
             # Checks for any amino acids/molecules not in the csv file first!
-            if residue.name not in atom_label_dict.keys():
+            labels = table.residue_labels(residue.name, terminus)
+            if labels is None:
                 self._logger.warning(f"Residue: {residue.name}{residue.number} not in atom_label.csv!")
                 return
 
@@ -298,140 +619,89 @@ class Protein:
                 except:
                     self._logger.warn("Protein does not have a carbonly at c-terminus")
 
-            #Find the column that has the current naming scheme present
-            self._logger.debug("Checking for the scheme id")
-            for schemeid in range(len(schemenames)):
-                scheme = []
-                nterm_scheme = []
-                for namelist in atom_label_dict[residue.name]:
-                    self._logger.debug(f"Adding scheme name: {namelist[schemeid]}")
-                    scheme.append(namelist[schemeid])
-
-                if terminus is not None:
-                    for namelist in atom_label_dict[terminus]:
-                        scheme.append(namelist[schemeid])
-
-                # Check to see if this is the naming scheme
-                for atom in residue.atoms:
-                    #Want to ignore and hydrogens attached to the nitrogen
-                    if atom not in nterm_hydrogens and atom not in cterm_oxygens and atom.id not in scheme:
-                        self._logger.debug(f"Atom: {atom.id} not in scheme: {scheme}")
-                        break
-
-                else:
-                    break # This is the correct naming scheme!
-
-            else:
-                raise ValueError(f"Could not find the naming scheme for {residue.name}{residue.number} {atom}")
-
-            #Loop over all of the atoms
-            self._logger.debug("Found the scheme id")
-            for atom in residue.atoms:
-                if atom in nterm_hydrogens or atom in cterm_oxygens:
-                    #We want to deal with these seperately
-                    continue
-
-                old_atomid = scheme.index(atom.id)
-                if terminus is not None:
-                    atom.id = (atom_label_dict[residue.name] + atom_label_dict[terminus])[old_atomid][newid]
-
-                else:
-                    atom.id = atom_label_dict[residue.name][old_atomid][newid]
-
+            # The terminal atoms are named in a scheme of their own
+            terminal = {id(a) for a in nterm_hydrogens + cterm_oxygens}
+            rename_atoms(residue, labels, [atom for atom in residue.atoms if id(atom) not in terminal])
             if nterm_hydrogens:
-                for schemeid in range(len(schemenames)):
-                    scheme = []
-                    for namelist in atom_label_dict[residue.name]:
-                        self._logger.debug(f"Adding scheme name: {namelist[schemeid]}")
-                        scheme.append(namelist[schemeid])
-
-                    if terminus is not None:
-                        for namelist in atom_label_dict[terminus]:
-                            scheme.append(namelist[schemeid])
-
-                    # Check to see if this is the naming scheme
-                    for atom in nterm_hydrogens:
-                        if atom.id not in scheme:
-                            self._logger.debug(f"Atom: {atom.id} not in scheme: {scheme}")
-                            break
-
-                    else:
-                        break # This is the correct naming scheme!
-
-                else:
-                    raise ValueError(f"Could not find the naming scheme for {residue.name}{residue.number} {atom}")
-            
-                self._logger.debug("Found the scheme id for nterminus hydrogens")
-                for atom in nterm_hydrogens:
-                    old_atomid = scheme.index(atom.id)
-                    if terminus is not None:
-                        atom.id = (atom_label_dict[residue.name] + atom_label_dict[terminus])[old_atomid][newid]
-
-                    else:
-                        atom.id = atom_label_dict[residue.name][old_atomid][newid]
-            
-            if cterm_oxygens:
-                for schemeid in range(len(schemenames)):
-                    scheme = []
-                    for namelist in atom_label_dict[residue.name]:
-                        self._logger.debug(f"Adding scheme name: {namelist[schemeid]}")
-                        scheme.append(namelist[schemeid])
-
-                    if terminus is not None:
-                        for namelist in atom_label_dict[terminus]:
-                            scheme.append(namelist[schemeid])
-
-                    # Check to see if this is the naming scheme
-                    for atom in cterm_oxygens:
-                        if atom.id not in scheme:
-                            self._logger.debug(f"Atom: {atom.id} not in scheme: {scheme}")
-                            break
-
-                    else:
-                        break # This is the correct naming scheme!
-
-                else:
-                    raise ValueError(f"Could not find the naming scheme for {residue.name}{residue.number} {atom}")
-            
-                self._logger.debug("Found the scheme id for nterminus hydrogens")
-                for atom in cterm_oxygens:
-                    old_atomid = scheme.index(atom.id)
-                    if terminus is not None:
-                        atom.id = (atom_label_dict[residue.name] + atom_label_dict[terminus])[old_atomid][newid]
-
-                    else:
-                        atom.id = atom_label_dict[residue.name][old_atomid][newid]
+                rename_atoms(residue, labels, nterm_hydrogens)
 
+            if cterm_oxygens:
+                rename_atoms(residue, labels, cterm_oxygens)
 
             # TODO add Jacks glycine hydrogen fixed so that naming convention is always the same with Chimera
 
         for chain in self.chains:
-            index = 0
             rename_residue(chain.residues[0], "NTERM")
             rename_residue(chain.residues[-1], "CTERM")
-            cterm = chain.residues[-1]
-
             for residue in chain.residues[1:-1]:
-                self._logger.debug(f"Relabeling residue: {residue.name} {residue.number}")
                 rename_residue(residue)
 
+        # Atom ids have changed
+        self._index = None
+        self._topology = None
+
     #TODO, better way of determinging what is 'bound' to the metal my guess.
     def atoms_near_metal(self, metal, cutoff = 3.05):
-        atom_list = [atom for c in self.chains[:-1]\
-                            for r in c.residues\
-                                for atom in r.atoms\
-                                if atom.element.lower() in constants.HEAVY_ATOMS\
-                                and np.linalg.norm(atom.coords - metal.coords) < cutoff]
-
-        if not self.sub_chain.residues:
-            atom_list.extend([atom for r in self.chains[-1].residues\
-                                    for atom in r.atoms\
-                                        if atom.element.lower() in constants.HEAVY_ATOMS\
-                                        and np.linalg.norm(atom.coords - metal.coords) < cutoff])
-       
-        return atom_list
+        atoms = self.get_atoms()
+
+        # The substrate chain is always the last chain and is not searched
+        searched = len(atoms)
+        if self.sub_chain.residues and self.chains:
+            searched -= sum(len(r.atoms) for r in self.chains[-1].residues)
+
+        near, distances = self.spatial_index().radius(metal.coords, cutoff)
+        near = near[(near < searched) & (distances < cutoff)]
+        return [atoms[i] for i in near if atoms[i].element.lower() in constants.HEAVY_ATOMS]
+
+    def make_bond_table(self, method: str = "native"):
+        """
+        Fills in the bonds of every atom
+
+        :param method: "native" to perceive the bonds in process (see bonding.perceive_bonds), "babel" to convert the
+        protein to a mol2 with babel and read the bonds back from it
+        """
+        if method == "babel":
+            self._babel_bond_table()
+            return
+
+        elif method != "native":
+            self._logger.error(f"Unknown bond perception method: {method}")
+            raise ValueError(method)
+
+        self._bond_graph = bonding.BondGraph(self.get_atoms(), *bonding.perceive_bonds(self))
+        self._topology = None
+        self._logger.info("Succesfully created the bond lists for each atom")
 
-    def make_bond_table(self):
+    def get_bond_graph(self):
+        """
+        The BondGraph of the protein with its atoms in the same order as get_atoms. If atoms were moved around or
+        removed since make_bond_table, the graph is carried over onto the current atoms.
+
+        :return: BondGraph, None if make_bond_table has not been called
+        """
+        # Building the atoms of a clone is what gives it its graph, so that has to happen before the graph is looked at
+        atoms = self.get_atoms()
+        graph = self._bond_graph
+        if graph is None or graph.atoms is atoms:
+            return graph
+
+        if len(graph.atoms) == len(atoms) and all(old is new for old, new in zip(graph.atoms, atoms)):
+            graph.atoms = atoms
+            return graph
+
+        position = {id(atom): index for index, atom in enumerate(atoms)}
+        renumber = np.array([position.get(id(atom), -1) for atom in graph.atoms], dtype=np.int64)
+        for atom in graph.atoms:
+            if id(atom) not in position:
+                atom.detach_bond_graph()
+
+        i, j = graph.pairs()
+        i, j = renumber[i], renumber[j]
+        both = (i >= 0) & (j >= 0)
+        self._bond_graph = bonding.BondGraph(atoms, i[both], j[both])
+        return self._bond_graph
+
+    def _babel_bond_table(self):
         self.write_pdb("bond.pdb")
 
         successful = False
@@ -449,13 +719,9 @@ class Protein:
             self._logger.error("Could not create {residue.name} mol2 file!")
             raise OSError("mol2_file")
 
-        #Clear the bond lists first:
-        for chain in self.chains:
-            for residue in chain.residues:
-                for atom in residue.atoms:
-                    atom.bonds.clear()
-
-        atom_list = [atom for c in self.chains for r in c.residues for atom in r.atoms]
+        atom_list = self.get_atoms()
+        bond_i = []
+        bond_j = []
 
         with open("bond.mol2") as mol_file:
             bond_section = False
@@ -465,19 +731,90 @@ class Protein:
 
                 elif bond_section:
                     line = line.split()
-                    atom_list[int(line[1])-1].add_bond(atom_list[int(line[2]) - 1])
+                    bond_i.append(int(line[1]) - 1)
+                    bond_j.append(int(line[2]) - 1)
 
+        self._bond_graph = bonding.BondGraph(atom_list, bond_i, bond_j)
+        self._topology = None
         self._logger.info("Succesfully created the bond lists for each atom")
         self._logger.debug("Cleaning up files created")
         os.remove("bond.pdb")
         os.remove("bond.mol2")
 
+    def get_atoms(self):
+        """Flat list of every atom in chain, residue order. Cached until clear_cache is called"""
+        if self._atoms is None:
+            self._atoms = [atom for chain in self.chains for residue in chain.residues for atom in residue.atoms]
+
+        return self._atoms
+
     def get_coords(self):
-        if self.coords is None:
-            self.coords = [atom.coords for chain in self.chains for residue in chain.residues for atom in residue.atoms]
-        
+        """
+        The (N, 3) coordinate array of the protein, in the same order as get_atoms. The protein owns this one contiguous
+        array and the coords of every atom is a view into its row, so writing to either is seen by both.
+
+        :return: numpy array of shape (N, 3)
+        """
+        if self._pending is not None:
+            return self.coords
+
+        atoms = self.get_atoms()
+        if self.coords is None or len(self.coords) != len(atoms):
+            self._shared = False
+            self.coords = np.array([atom.coords for atom in atoms], dtype=float).reshape(len(atoms), 3)
+            for atom, row in zip(atoms, self.coords):
+                atom.coords = row
+
         return self.coords
-        
+
+    def clear_cache(self):
+        """
+        Drops the cached atom list, coordinate array and lookup index. Must be called whenever atoms are added, removed
+        or reordered, the atoms keep their current coordinates and are given views into a new array the next time it is
+        needed.
+        """
+        if self._pending is not None:
+            self._materialize()
+
+        self._atoms = None
+        self._topology = None
+        self.coords = None
+        self._index = None
+        self._spatial = None
+
+    def spatial_index(self, cell_size: float = spatial.DEFAULT_CELL_SIZE):
+        """
+        Cell grid over the coordinates of the protein (indices are into get_atoms) for radius, nearest neighbour and
+        pair queries. The grid is kept until the atoms or their coordinates change.
+
+        :param cell_size: edge length of a grid cell in Angstrom
+        :return: SpatialIndex
+        """
+        coords = self.get_coords()
+        if self._spatial is None or self._spatial.cell_size != cell_size or not np.array_equal(self._spatial.coords, coords):
+            self._spatial = spatial.SpatialIndex(coords, cell_size)
+
+        return self._spatial
+
+    def set_coords(self, coords):
+        """Overwrites the coordinates of every atom at once (ie. with a new frame of a movie)"""
+        self._own_coords()[:] = coords
+
+    def center_of_geometry(self):
+        return self.get_coords().mean(axis=0)
+
+    def translate(self, vector):
+        coords = self._own_coords()
+        coords += vector
+
+    def center(self):
+        """Moves the center of geometry of the protein to the origin"""
+        self.translate(-self.center_of_geometry())
+
+    def distances_to(self, point):
+        """Distance from every atom to a point, in the same order as get_atoms"""
+        return np.linalg.norm(self.get_coords() - point, axis=1)
+
     def aa_rmsd(self, pro):
         
         if pro is self:
@@ -485,12 +822,11 @@ class Protein:
 
         #Makes it easier to work with this sort of stuff
 
-        this_coords = self.get_coords() - np.average(self.get_coords(), axis=0)
-        other_coords = pro.get_coords() - np.average(pro.get_coords(), axis=0)
+        this_coords = self.get_coords() - self.center_of_geometry()
+        other_coords = pro.get_coords() - pro.center_of_geometry()
 
         #Now the coords have been centered, now we can start the rotation
         assert(len(this_coords) == len(other_coords))
-        n_vec = np.shape(this_coords)[0]
 
         h = np.dot(np.transpose(this_coords), other_coords)
         v, s, w = np.linalg.svd(h)
@@ -507,29 +843,122 @@ class Protein:
         return np.sqrt((diff*diff).sum()/ len(this_coords))
 
     def remove_h(self):
-        for chain in self.chains[:-1]:
-            for res in chain.residues:
-                remove_atoms = []
-                for a in res.atoms:
-                    if a.element.lower() == "h":
-                        remove_atoms.append(a)                    
-                        for b in a.bonds:
-                            b.bonds.remove(a)
-
-                for a in remove_atoms:
-                    res.atoms.remove(a)
-
-        if not self.sub_chain.residues:
-            for res in self.chains[-1]:
-                remove_atoms= []
+        # The last chain (the substrate/metal chain once reformatted) keeps its hydrogens
+        n_searched = sum(len(res.atoms) for ch in self.chains[:-1] for res in ch.residues)
+
+        hydrogens = np.array([a.element.lower() == "h" for a in self.get_atoms()], dtype=bool)
+        hydrogens[n_searched:] = False
+        self.delete_atoms(hydrogens, renumber=False)
+
+    def renumber_atoms(self):
+        """Numbers the atoms of every chain from 1, in order, the same way reformat_protein does"""
+        for ch in self.chains:
+            number = 1
+            for res in ch.residues:
                 for a in res.atoms:
-                    if a.element.lower() == "h":
-                        remove_atoms.append(a)
-                        for b in a.bonds:
-                            b.bonds.remove(a)
-                    
-                for a in remove_atoms:
-                    res.atoms.remove(a)
-
-
-        
+                    a.number = number
+                    number += 1
+
+    def delete_atoms(self, mask, renumber: bool = True):
+        """
+        Removes many atoms in one pass over the protein. The residues, metals, bond graph and coordinate array are all
+        updated at once (residues left without atoms are kept).
+
+        :param mask: boolean mask over get_atoms of the atoms to remove, or a selection expression
+        :param renumber: renumber the atoms of every chain afterwards (see renumber_atoms)
+        :return: number of atoms removed
+        """
+        atoms = self.get_atoms()
+        if isinstance(mask, str):
+            mask = selection.Selection(mask).mask(self)
+
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (len(atoms),):
+            self._logger.error(f"Mask of shape {mask.shape} does not match the {len(atoms)} atoms of the protein")
+            raise ValueError("mask")
+
+        if not mask.any():
+            return 0
+
+        graph = self.get_bond_graph()
+        deleted = mask.tolist()
+        removed = {id(a) for a, gone in zip(atoms, deleted) if gone}
+
+        # Bonds kept as plain lists (atoms outside of the bond graph) are unlinked by hand
+        for a, gone in zip(atoms, deleted):
+            if gone and a.bond_graph() is None:
+                for bonded in a.bonds:
+                    if id(bonded) not in removed:
+                        bonded.bonds.remove(a)
+
+        position = 0
+        for ch in self.chains:
+            for res in ch.residues:
+                end = position + len(res.atoms)
+                if any(deleted[position:end]):
+                    res.atoms[:] = [a for a, gone in zip(res.atoms, deleted[position:end]) if not gone]
+                    res._atom_index = None
+
+                position = end
+
+        self.metals[:] = [metal for metal in self.metals if id(metal) not in removed]
+
+        if graph is not None:
+            self._bond_graph = graph.subgraph(~mask)
+
+        self.clear_cache()
+        if renumber:
+            self.renumber_atoms()
+
+        self._logger.debug(f"Deleted {len(removed)} atoms")
+        return len(removed)
+
+    def insert_atoms(self, res, names, coords, elements=None, bonded_to=None, renumber: bool = True):
+        """
+        Adds many atoms to the end of a residue in one pass, with their bonds
+
+        :param res: residue of this protein to add the atoms to
+        :param names: id of every new atom
+        :param coords: (len(names), 3) coordinates of the new atoms
+        :param elements: element of every new atom, defaults to the first letter of its name
+        :param bonded_to: for every new atom None or the atom (or the id of an atom in res) it is bonded to
+        :param renumber: renumber the atoms of every chain afterwards (see renumber_atoms)
+        :return: list of the new atoms
+        """
+        names = list(names)
+        coords = np.array(coords, dtype=float).reshape(len(names), 3)
+        if elements is None:
+            elements = [name.lstrip("0123456789")[0] for name in names]
+
+        if len(elements) != len(names) or (bonded_to is not None and len(bonded_to) != len(names)):
+            self._logger.error("Need an element and a bonded atom (or None) for every new atom")
+            raise ValueError("insert_atoms")
+
+        if not any(other is res for ch in self.chains for other in ch.residues):
+            self._logger.error(f"Residue {res} is not part of the protein")
+            raise ValueError("insert_atoms")
+
+        partners = [res.get_atom(partner) if isinstance(partner, str) else partner for partner in (bonded_to or [None] * len(names))]
+
+        graph = self.get_bond_graph()
+        new_atoms = [atom.Atom(element=element.capitalize(), coords=row, id=name.upper(), number=0) for name, element, row in zip(names, elements, coords)]
+        res.add_atoms(new_atoms)
+        res._atom_index = None
+        self.clear_cache()
+
+        bonds = [(new_atom, partner) for new_atom, partner in zip(new_atoms, partners) if partner is not None]
+        if graph is not None:
+            # The graph is carried over onto the new atom order and the new bonds go in with one rebuild
+            graph = self.get_bond_graph()
+            position = {id(a): k for k, a in enumerate(self.get_atoms())}
+            graph.add_bonds([position[id(new_atom)] for new_atom, _ in bonds], [position[id(partner)] for _, partner in bonds])
+
+        else:
+            for new_atom, partner in bonds:
+                new_atom.add_bond(partner)
+
+        if renumber:
+            self.renumber_atoms()
+
+        self._logger.debug(f"Inserted {len(new_atoms)} atoms into {res}")
+        return new_atoms
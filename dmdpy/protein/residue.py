@@ -18,7 +18,7 @@ __all__=[
 
 class Residue:
 
-    __slots__ = ["number", "name", "chain", "atoms", "inConstr_number"]
+    __slots__ = ["number", "name", "chain", "atoms", "inConstr_number", "_atom_index"]
 
     def __init__(self, line: str=None, name: str=None, number: int=None):
         if line is None:
@@ -32,22 +32,48 @@ class Residue:
         self.atoms = []
         self.chain = None
         self.inConstr_number = self.number
+        self._atom_index = None
 
     def add_atom(self, atom):
         atom.residue = self
         atom.verify_element()
         atom.chain = self.chain
         self.atoms.append(atom)
+        self._atom_index = None
+
+    def add_atoms(self, atoms):
+        for atom in atoms:
+            atom.residue = self
+            atom.chain = self.chain
+            atom.verify_element()
+
+        self.atoms.extend(atoms)
+        self._atom_index = None
 
     def set_chain(self, chain):
         pass
 
     def get_atom(self, name):
-        for atom in self.atoms:
-            if atom.id == name:
-                return atom
+        # Atom id -> position of the first atom with that id. The index is only rebuilt after it is dropped, which
+        # renaming (see Atom.id), adding or deleting atoms does, so a miss does not cost a rebuild. A hit is still
+        # checked since the list of atoms can be rearranged directly
+        if self._atom_index is None:
+            self._build_atom_index()
+
+        position = self._atom_index.get(name)
+        if position is not None and (position >= len(self.atoms) or self.atoms[position].id != name):
+            self._build_atom_index()
+            position = self._atom_index.get(name)
 
-        raise ValueError(f"Could not find atom: {name}")
+        if position is None:
+            raise ValueError(f"Could not find atom: {name}")
+
+        return self.atoms[position]
+
+    def _build_atom_index(self):
+        self._atom_index = {}
+        for position, atom in enumerate(self.atoms):
+            self._atom_index.setdefault(atom.id, position)
 
     def write_inConstr(self):
         if self.name in constants.AMINO_ACID_RESIDUES:
@@ -86,14 +112,12 @@ class Residue:
         result = cls.__new__(cls)
         memo[id(self)] = result
 
-        result.name = copy.deepcopy(self.name, memo)
-        result.number = copy.deepcopy(self.number, memo)
-        result.chain = self.chain
-        for atom in self.atoms:
-            copy_atom = copy.deepcopy(atom)
-            result.add_atom(copy_atom)
-
-        result.inConstr_number = copy.deepcopy(self.inConstr_number, memo)
+        result.name = self.name
+        result.number = self.number
+        result.inConstr_number = self.inConstr_number
+        result.chain = memo.get(id(self.chain))
+        result._atom_index = None
+        result.atoms = [copy.deepcopy(atom, memo) for atom in self.atoms]
         return result
 
 
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import fnmatch
+import logging
+import re
+import numpy as np
+
+#PHD3 Imports
+from ..utility import constants, spatial
+
+__all__ = [
+    'Selection',
+    'is_label'
+]
+
+logger = logging.getLogger(__name__)
+
+# "A:12" or "A:12:CA", the explicit residue/atom labels dmdinput.json has always accepted
+LABEL = re.compile(r"^[A-Za-z]+:-?\d+(:[^\s:]+)?$")
+
+TOKEN = re.compile(r"\s*(\(|\)|[^\s()]+)")
+
+RANGE = re.compile(r"^(-?\d+)(?:[-:](-?\d+))?$")
+
+BACKBONE = ('N', 'CA', 'C', 'O')
+
+# Keyword -> column of the protein it matches against
+STRING_KEYWORDS = {
+    "chain": "chain",
+    "resname": "resname",
+    "name": "id",
+    "id": "id",
+    "element": "element"
+}
+
+NUMBER_KEYWORDS = {
+    "resid": "resnum",
+    "resnum": "resnum",
+    "serial": "number",
+    "index": "index"
+}
+
+RESERVED = {'and', 'or', 'not', 'of', 'as', '(', ')'}
+
+def is_label(text: str):
+    """Whether text is an explicit "chain:resnum" or "chain:resnum:id" label rather than a selection expression"""
+    return LABEL.match(text.strip()) is not None
+
+class Selection:
+    """
+    Atom selection expression compiled to a function of the protein's columns. Evaluating it combines boolean masks
+    over every atom at once, so the cost does not depend on how many atoms end up being selected.
+
+    Grammar, keywords are case insensitive and "and" binds tighter than "or":
+
+        all, none, protein, backbone, metal
+        chain A B            resname HIS ZN*        name CA CB       element Zn
+        resid 10-40 52       serial 1 to 20         index 0:99       (ranges are inclusive)
+        within 6 of <selection>
+        same residue as <selection>
+        not <selection>,  <selection> and <selection>,  <selection> or <selection>,  ( <selection> )
+
+    Names accept the shell wildcards * and ?. For example "chain A and resid 10-40 and not element H" or
+    "within 6 of resname ZN1".
+    """
+
+    __slots__ = ['expression', '_tokens', '_position', '_evaluate']
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self._tokens = TOKEN.findall(expression)
+        if ''.join(self._tokens) != re.sub(r"\s+", '', expression):
+            logger.error(f"Could not split selection into words: {expression}")
+            raise ValueError(expression)
+
+        self._position = 0
+        self._evaluate = self._parse_or()
+        if self._position != len(self._tokens):
+            self._error(f"unexpected '{self._tokens[self._position]}'")
+
+    def __str__(self):
+        return self.expression
+
+    def mask(self, pro, columns: dict = None):
+        """
+        :param pro: Protein to select from
+        :param columns: pro.get_columns(), passed in when many selections are evaluated on the same protein
+        :return: boolean mask over pro.get_atoms()
+        """
+        if columns is None:
+            columns = pro.get_columns()
+
+        return self._evaluate(_Context(columns))
+
+    def atoms(self, pro, columns: dict = None):
+        """
+        :return: selected atoms in the order of pro.get_atoms()
+        """
+        atoms = pro.get_atoms()
+        return [atoms[i] for i in np.flatnonzero(self.mask(pro, columns)).tolist()]
+
+    def residues(self, pro, columns: dict = None):
+        """
+        :return: every residue with at least one selected atom, in chain order
+        """
+        residues = []
+        for atom in self.atoms(pro, columns):
+            if not residues or residues[-1] is not atom.residue:
+                residues.append(atom.residue)
+
+        return residues
+
+    def _error(self, message: str):
+        logger.error(f"Invalid selection '{self.expression}': {message}")
+        raise ValueError(self.expression)
+
+    def _peek(self):
+        return self._tokens[self._position].lower() if self._position < len(self._tokens) else None
+
+    def _next(self):
+        if self._position >= len(self._tokens):
+            self._error("unexpected end of selection")
+
+        self._position += 1
+        return self._tokens[self._position - 1]
+
+    def _expect(self, word: str):
+        if self._next().lower() != word:
+            self._error(f"expected '{word}' after '{self._tokens[self._position - 2]}'")
+
+    def _parse_or(self):
+        terms = [self._parse_and()]
+        while self._peek() == 'or':
+            self._next()
+            terms.append(self._parse_and())
+
+        if len(terms) == 1:
+            return terms[0]
+
+        return lambda context: np.logical_or.reduce([term(context) for term in terms])
+
+    def _parse_and(self):
+        terms = [self._parse_not()]
+        while self._peek() == 'and':
+            self._next()
+            terms.append(self._parse_not())
+
+        if len(terms) == 1:
+            return terms[0]
+
+        return lambda context: np.logical_and.reduce([term(context) for term in terms])
+
+    def _parse_not(self):
+        if self._peek() == 'not':
+            self._next()
+            term = self._parse_not()
+            return lambda context: ~term(context)
+
+        return self._parse_primary()
+
+    def _parse_primary(self):
+        word = self._next()
+        keyword = word.lower()
+
+        if keyword == '(':
+            term = self._parse_or()
+            self._expect(')')
+            return term
+
+        if keyword == 'all':
+            return lambda context: np.ones(context.n_atoms, dtype=bool)
+
+        if keyword == 'none':
+            return lambda context: np.zeros(context.n_atoms, dtype=bool)
+
+        if keyword == 'protein':
+            return lambda context: np.isin(context.upper("resname"), constants.AMINO_ACID_RESIDUES)
+
+        if keyword == 'backbone':
+            return lambda context: np.isin(context.upper("resname"), constants.AMINO_ACID_RESIDUES) & np.isin(context.upper("id"), BACKBONE)
+
+        if keyword == 'metal':
+            return lambda context: np.isin(context.lower("element"), constants.METALS)
+
+        if keyword == 'within':
+            try:
+                cutoff = float(self._next())
+
+            except ValueError:
+                self._error("within needs a distance")
+
+            if cutoff < 0:
+                self._error("within needs a positive distance")
+
+            self._expect('of')
+            term = self._parse_not()
+            return lambda context: context.within(cutoff, term(context))
+
+        if keyword == 'same':
+            self._expect('residue')
+            self._expect('as')
+            term = self._parse_not()
+            return lambda context: context.same_residue(term(context))
+
+        if keyword in STRING_KEYWORDS:
+            return self._string_term(STRING_KEYWORDS[keyword], self._values(word))
+
+        if keyword in NUMBER_KEYWORDS:
+            return self._number_term(NUMBER_KEYWORDS[keyword], self._values(word))
+
+        self._error(f"unknown keyword '{word}'")
+
+    def _values(self, keyword: str):
+        values = []
+        while self._peek() is not None and self._peek() not in RESERVED:
+            values.append(self._next())
+
+        if not values:
+            self._error(f"'{keyword}' needs at least one value")
+
+        return values
+
+    def _string_term(self, column: str, patterns: list):
+        # Chains are case sensitive, everything else is compared in upper case. Names are compared without the padding
+        # of their pdb column, ie. the residue name "ZN " matches "resname ZN"
+        patterns = [pattern.strip() if column == "chain" else pattern.strip().upper() for pattern in patterns]
+
+        def term(context):
+            values = context.stripped(column) if column == "chain" else context.upper(column)
+            unique = np.unique(values).tolist()
+            matched = [value for value in unique if any(fnmatch.fnmatchcase(value, pattern) for pattern in patterns)]
+            return np.isin(values, matched)
+
+        return term
+
+    def _number_term(self, column: str, values: list):
+        # "10 to 40" is the same as "10-40"
+        ranges = []
+        position = 0
+        while position < len(values):
+            match = RANGE.match(values[position])
+            if match is None:
+                self._error(f"'{values[position]}' is not a number or range")
+
+            low = int(match.group(1))
+            high = int(match.group(2)) if match.group(2) is not None else low
+            if match.group(2) is None and position + 1 < len(values) and values[position + 1].lower() == 'to':
+                if position + 2 >= len(values) or RANGE.match(values[position + 2]) is None:
+                    self._error("'to' needs a number after it")
+
+                high = int(values[position + 2])
+                position += 2
+
+            ranges.append((low, high))
+            position += 1
+
+        lows = np.array([low for low, _ in ranges])
+        highs = np.array([high for _, high in ranges])
+
+        def term(context):
+            values = context.column(column)
+            return np.any((values[:, None] >= lows) & (values[:, None] <= highs), axis=1)
+
+        return term
+
+class _Context:
+    """Columns of the protein a selection is evaluated on, with the derived arrays built once and shared"""
+
+    __slots__ = ['columns', 'n_atoms', '_derived']
+
+    def __init__(self, columns: dict):
+        self.columns = columns
+        self.n_atoms = len(columns["coords"])
+        self._derived = {}
+
+    def column(self, name: str):
+        if name == "index":
+            return np.arange(self.n_atoms)
+
+        return self.columns[name]
+
+    def stripped(self, name: str):
+        """Text column without surrounding blanks"""
+        if ("stripped", name) not in self._derived:
+            self._derived[("stripped", name)] = np.char.strip(np.asarray(self.columns[name]).astype(str))
+
+        return self._derived[("stripped", name)]
+
+    def upper(self, name: str):
+        if ("upper", name) not in self._derived:
+            self._derived[("upper", name)] = np.char.upper(self.stripped(name))
+
+        return self._derived[("upper", name)]
+
+    def lower(self, name: str):
+        if ("lower", name) not in self._derived:
+            self._derived[("lower", name)] = np.char.lower(self.stripped(name))
+
+        return self._derived[("lower", name)]
+
+    def residue_labels(self):
+        """Residue (0, 1, ...) of every atom, a new residue starts wherever the chain or residue number changes"""
+        if "residue" not in self._derived:
+            chains = self.columns["chain"]
+            resnums = self.columns["resnum"]
+            new_residue = np.ones(self.n_atoms, dtype=bool)
+            new_residue[1:] = (chains[1:] != chains[:-1]) | (resnums[1:] != resnums[:-1])
+            self._derived["residue"] = np.cumsum(new_residue) - 1
+
+        return self._derived["residue"]
+
+    def same_residue(self, mask):
+        labels = self.residue_labels()
+        return np.isin(labels, labels[mask])
+
+    def within(self, cutoff: float, mask):
+        coords = np.asarray(self.columns["coords"], dtype=float)
+        if not np.any(mask):
+            return np.zeros(self.n_atoms, dtype=bool)
+
+        return spatial.SpatialIndex(coords[mask], cutoff if cutoff > 0 else spatial.DEFAULT_CELL_SIZE).within(coords, cutoff)
@@ -14,17 +14,110 @@ import logging
 import pkg_resources
 import shutil
 import random
+import numpy as np
 
 #PHD3 Imports
 from dmdpy.utility import utilities, exceptions, constants
 import dmdpy.protein.protein as protein
+from dmdpy.protein import selection
+from dmdpy.protein.atom import Atom
 
 __all__ = [
     'setupDMDjob',
+    'selector',
+    'displacement_pairs',
+    'metal_ligand_restraints'
 ]
 
 logger = logging.getLogger(__name__)
 
+# Atoms this close to a metal are frozen, and the atoms bonded to them are held at their distance to the metal
+METAL_LIGAND_CUTOFF = 3.1
+METAL_LIGAND_TOLERANCE = 0.05
+
+def selector(pro: protein.Protein):
+    """
+    :return: function of a selection expression (and whether to return residues instead) giving the matching atoms of
+    pro, the protein's columns are only gathered once however many selections are made
+    """
+    columns = None
+    def select(expression: str, residues: bool = False):
+        nonlocal columns
+        if columns is None:
+            columns = pro.get_columns()
+
+        compiled = selection.Selection(expression)
+        return compiled.residues(pro, columns) if residues else compiled.atoms(pro, columns)
+
+    return select
+
+def displacement_pairs(pro: protein.Protein, specifications: list, select=None, resolve_selections: bool = True):
+    """
+    Resolves the "Restrict Displacement" entries of dmdinput.json
+
+    :param pro: Protein
+    :param specifications: list of [atom, atom, tolerance], each atom either ["Chain", ResNum, "ID"], a "Chain:ResNum:ID"
+    label, a selection expression matching exactly one atom or an Atom that was already resolved
+    :param select: selector of pro, made if not given
+    :param resolve_selections: False to leave the selection expressions in the pairs, ie. until pro has been reformatted
+    :return: list of [Atom, Atom, tolerance]
+    """
+    if select is None:
+        select = selector(pro)
+
+    displacement = []
+    for atom_pair in specifications:
+        pair = []
+        for spec in atom_pair[:2]:
+            if isinstance(spec, Atom):
+                pair.append(spec)
+
+            elif type(spec) == list:
+                pair.append(pro.get_atom(spec))
+
+            elif type(spec) == str and selection.is_label(spec):
+                pair_split = spec.split(":")
+                pair.append(pro.get_atom([pair_split[0], int(pair_split[1]), pair_split[2]]))
+
+            elif type(spec) == str and not resolve_selections:
+                pair.append(spec)
+
+            elif type(spec) == str:
+                selected = select(spec)
+                if len(selected) != 1:
+                    logger.error(f"Displacement selection '{spec}' matches {len(selected)} atoms instead of 1")
+                    raise ValueError
+
+                pair.append(selected[0])
+
+            else:
+                logger.error("Invalid specification of displacement atom")
+                raise ValueError
+
+        displacement.append([pair[0], pair[1], atom_pair[2]])
+
+    return displacement
+
+def metal_ligand_restraints(pro: protein.Protein):
+    """
+    The restraints "Restrict Metal Ligands" puts on the metal sites of a reformatted protein (with its bond table)
+
+    :param pro: Protein
+    :return: list of (atom near a metal, [[heavy atom bonded to it, metal, tolerance], ...]) in inConstr order
+    """
+    restraints = []
+    for metal in pro.metals:
+        logger.debug(f"Looking at metal: {metal}")
+        for atoms in pro.atoms_near_metal(metal, METAL_LIGAND_CUTOFF):
+            pairs = []
+            for bonded_atoms in atoms.bonds:
+                if bonded_atoms.element.lower() != "h" and bonded_atoms.element.lower() not in constants.METALS:
+                    pairs.append([bonded_atoms, metal, METAL_LIGAND_TOLERANCE])
+
+            restraints.append((atoms, pairs))
+
+    return restraints
+
 class setupDMDjob:
 
     def __init__(self, parameters: dict=None, dir: str="./", pro: protein.Protein=None):
@@ -114,34 +207,15 @@ class setupDMDjob:
         if self._protein is None:
             raise ValueError("No Protein!")
 
+        # Labels are resolved now, selection expressions once the protein has been reformatted (see
+        # _resolve_selections) so that they see the residue names and numbers of initial.pdb
         self._displacement = []
         if "Restrict Displacement" in self._raw_parameters.keys():
-            for atom_pair in self._raw_parameters["Restrict Displacement"]:
-                if type(atom_pair[0]) == list:
-                    res1 = self._protein.get_atom(atom_pair[0])
-
-                elif type(atom_pair[0]) == str:
-                    pair_split = atom_pair[0].split(":")
-                    res1 = self._protein.get_atom([pair_split[0], int(pair_split[1]), pair_split[2]])
-            
-                else:
-                    logger.error("Invalid specification of displacement atom")
-                    raise ValueError
-                
-                if type(atom_pair[1]) == list:
-                    res2 = self._protein.get_atom(atom_pair[1])
-                
-                elif type(atom_pair[1]) == str:
-                    pair_split = atom_pair[1].split(":")
-                    res2 = self._protein.get_atom([pair_split[0], int(pair_split[1]), pair_split[2]])
-
-                else:
-                    logger.error("Invalid specification of displacement atom")
-                    raise ValueError
-
-                self._displacement.append([res1, res2, atom_pair[2]])
+            self._displacement = displacement_pairs(self._protein, self._raw_parameters["Restrict Displacement"],
+                                                    resolve_selections=False)
 
         self._static = []
+        self._static_selections = []
         if "Frozen atoms" in self._raw_parameters.keys():
             for chain in self._raw_parameters["Frozen atoms"]["Chains"]:
                 try:
@@ -156,12 +230,16 @@ class setupDMDjob:
             for residue in self._raw_parameters["Frozen atoms"]["Residues"]:
                 try:
                     if type(residue) == list:
-                        residue = self._protein.get_atom(residue)
+                        res = self._protein.get_residue(residue)
 
-                    elif type(residue) == str:
+                    elif type(residue) == str and selection.is_label(residue):
                         residue_split = residue.split(":")
                         res = self._protein.get_residue([residue_split[0], int(residue_split[1])])
-                    
+
+                    elif type(residue) == str:
+                        self._static_selections.append((residue, f"same residue as ({residue})"))
+                        continue
+
                     else:
                         logger.error("Invalid specification of frozen residue")
                         raise ValueError
@@ -177,10 +255,13 @@ class setupDMDjob:
                     if type(atom) == list:
                         self._static.append(self._protein.get_atom(atom))
 
-                    elif type(atom) == str:
+                    elif type(atom) == str and selection.is_label(atom):
                         atom_split = atom.split(":")
                         self._static.append(self._protein.get_atom([atom_split[0], int(atom_split[1]), atom_split[2]]))
 
+                    elif type(atom) == str:
+                        self._static_selections.append((atom, atom))
+
                     else:
                         logger.error("Invalid specification of frozen atom")
                         raise ValueError
@@ -191,26 +272,59 @@ class setupDMDjob:
 
         # These holds all of the residues with weird protonation or deprotonation states
         self._protonate = []
+        self._protonate_selections = []
         if "Custom protonation states" in self._raw_parameters.keys():
             for item in self._raw_parameters["Custom protonation states"]:
-                if type(item[1]) == str:
+                if type(item[1]) == str and selection.is_label(item[0]):
                     tmp_item = item[0].split(":")
-                    res_id = [tmp_item[0], int(tmp_item[1])]
-                
+                    residues = [self._protein.get_residue([tmp_item[0], int(tmp_item[1])])]
+                    state = item[1:]
+
+                elif type(item[1]) == str:
+                    # Every residue the selection touches gets the same state
+                    self._protonate_selections.append([item[0], item[1:]])
+                    continue
+
                 elif type(item[1]) == int:
-                    res_id = [item[0], item[1]]
+                    residues = [self._protein.get_residue([item[0], item[1]])]
+                    state = item[2:]
                 
                 else:
                     logger.error("Invalid specification of residue in protonation state")
                     raise ValueError
 
-                self._protonate.append([self._protein.get_residue(res_id), item[2:]])
+                for res in residues:
+                    self._protonate.append([res, state])
+
+    def _resolve_selections(self):
+        """
+        Resolves the selection expressions of the frozen atoms, custom protonation states and displacement restraints
+        on the reformatted protein. A selection that matches nothing is warned about.
+        """
+        select = selector(self._protein)
+        for expression, resolved in self._static_selections:
+            atoms = select(resolved)
+            if not atoms:
+                logger.warning(f"Frozen atoms selection '{expression}' does not match any atoms")
+
+            self._static.extend(atoms)
+
+        for expression, state in self._protonate_selections:
+            residues = select(expression, residues=True)
+            if not residues:
+                logger.warning(f"Protonation state selection '{expression}' does not match any residues")
 
+            self._protonate.extend([res, state] for res in residues)
+
+        self._displacement = displacement_pairs(self._protein, self._displacement, select)
+        self._static_selections.clear()
+        self._protonate_selections.clear()
 
     def full_setup(self):
 
         logger.debug("Changing protein name to initial.pdb and writing out")
         self._protein.reformat_protein()
+        self._resolve_selections()
         self._protein.name = 'initial.pdb'
         self._protein.write_pdb()
 
@@ -225,6 +339,7 @@ class setupDMDjob:
     def titrate_setup(self):
         logger.debug("Skipping short dmd step")
         self._protein.reformat_protein()
+        self._resolve_selections()
         self._protein.name = 'initial.pdb'
         self._protein.write_pdb()
 
@@ -270,7 +385,7 @@ class setupDMDjob:
 
         logger.debug("Finished the short DMD step successfully")
 
-        utilities.make_movie("initial.pdb", "movie", "check.pdb")
+        utilities.make_movie("initial.pdb", "movie", "check.pdb", cache=False)
 
         if not os.path.isfile("check.pdb"):
             logger.error("check.pdb not found, complex_M2P.linux did not run properly")
@@ -320,9 +435,18 @@ class setupDMDjob:
                         logger.debug(f"Freezing residue: {residue}")
                         inConstr_file.write(f"Static {residue.write_inConstr()}\n")
 
-                for static_atom in self._static:
-                    logger.debug(f"Freezing atom: {static_atom}")
-                    inConstr_file.write(f"Static {static_atom.write_inConstr()}\n")
+                # Each frozen atom once, in the order of the protein, however many times it was selected
+                atoms = self._protein.get_atoms()
+                position = {id(a): k for k, a in enumerate(atoms)}
+                static = np.zeros(len(atoms), dtype=bool)
+                missing = [a for a in self._static if id(a) not in position]
+                for a in missing:
+                    logger.warning(f"Frozen atom {a} is no longer in the protein, it is not frozen")
+
+                static[[position[id(a)] for a in self._static if id(a) in position]] = True
+                for k in np.flatnonzero(static).tolist():
+                    logger.debug(f"Freezing atom: {atoms[k]}")
+                    inConstr_file.write(f"Static {atoms[k].write_inConstr()}\n")
 
                 for state in self._protonate:
                     logger.debug(f"Adding protonation state: {state[0]} and {state[1]}")
@@ -372,18 +496,14 @@ class setupDMDjob:
 
                 if self._raw_parameters["Restrict Metal Ligands"]:
                     logger.debug("Restricting distance between atoms and metals!")
-                    for metal in self._protein.metals:
-                        logger.debug(f"Looking at metal: {metal}")
-                        atoms_near_metal = self._protein.atoms_near_metal(metal, 3.1)
-                        for atoms in atoms_near_metal:
-                            logger.debug(f"Freezing atom: {atoms} since too close to a metal")
-                            inConstr_file.write(f"Static {atoms.write_inConstr()}\n")
-
-                            for bonded_atoms in atoms.bonds:
-                                if bonded_atoms.element.lower() != "h" and bonded_atoms.element.lower() not in constants.METALS:
-                                    logger.debug(f"Restricting motion of atom {bonded_atoms} and atom {metal} by {0.05}")
-                                    inConstr_file.write(
-                                        f"AtomPairRel {bonded_atoms.write_inConstr()} {metal.write_inConstr()} -{0.05} +{0.05}\n")
+                    for atoms, pairs in metal_ligand_restraints(self._protein):
+                        logger.debug(f"Freezing atom: {atoms} since too close to a metal")
+                        inConstr_file.write(f"Static {atoms.write_inConstr()}\n")
+
+                        for bonded_atoms, metal, tolerance in pairs:
+                            logger.debug(f"Restricting motion of atom {bonded_atoms} and atom {metal} by {tolerance}")
+                            inConstr_file.write(
+                                f"AtomPairRel {bonded_atoms.write_inConstr()} {metal.write_inConstr()} -{tolerance} +{tolerance}\n")
 
                 for disp_atom in self._displacement:
                     logger.debug(
@@ -401,13 +521,9 @@ class setupDMDjob:
         #TODO make sure that this is correct
         new_parameters = self._raw_parameters.copy()
 
-        # Update the custom protonation states
-        for new_state, state in zip(new_parameters["Custom protonation states"], self._protonate):
-            new_state[0] = state[0].chain.name
-            new_state[1] = state[0].number
-            new_state[2] = state[1][0]
-            if len(new_state) == 4:
-                new_state[3] = state[1][1]
+        # Update the custom protonation states, a selection is written out as the residues it matched
+        new_parameters["Custom protonation states"] = [[state[0].chain.name, state[0].number, *state[1]] for state in self._protonate]
+        new_parameters["Custom protonation states"].extend([expression, *state] for expression, state in self._protonate_selections)
 
         # Update the frozen atoms
         new_parameters["Frozen atoms"]["Chains"].clear()
@@ -417,9 +533,13 @@ class setupDMDjob:
         for a in self._static:
             new_parameters["Frozen atoms"]["Atoms"].append(a.label())
 
+        # Selections that have not been resolved yet are kept as they were given
+        for expression, resolved in self._static_selections:
+            new_parameters["Frozen atoms"]["Atoms"].append(resolved)
+
         # Update the displacement atoms
         new_parameters["Restrict Displacement"].clear()
         for state in self._displacement:
-            new_parameters["Restrict Displacement"].append([state[0].label(), state[1].label(), state[2]])
+            new_parameters["Restrict Displacement"].append([a if type(a) == str else a.label() for a in state[:2]] + [state[2]])
 
         return new_parameters
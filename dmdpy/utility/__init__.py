@@ -1,3 +1,8 @@
 from .constants import *
 from .utilities import *
 from .exceptions import *
+from .pdbio import *
+from .trajectory import *
+from .echo import *
+from .progress import *
+from .spatial import *
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import logging
+import os
+import numpy as np
+
+#PHD3 Imports
+
+__all__ = [
+    'ECHO_COLUMNS',
+    'EchoData'
+]
+
+logger = logging.getLogger(__name__)
+
+# Columns of a piDMD echo file that we know the meaning of
+ECHO_COLUMNS = {
+    "time": 0,
+    "temperature": 1,
+    "pressure": 2,
+    "potential": 4,
+    "kinetic": 5
+}
+
+class EchoData:
+    """
+    Contents of a piDMD echo file as a (rows, columns) numpy array. The file is parsed once, later calls to update()
+    only read the lines written since the last read. If the file was truncated or rewritten in the meantime (for example
+    when a titration step is rolled back) it is parsed again from the beginning.
+    """
+
+    __slots__ = ['echo_file', 'data', '_offset', '_tail']
+
+    def __init__(self, echo_file: str):
+        if not os.path.isfile(echo_file):
+            logger.error(f"Echo file does not exist: {echo_file}")
+            raise FileNotFoundError("Echo File")
+
+        self.echo_file = echo_file
+        self.data = None
+        self._offset = 0
+        self._tail = b''
+        self.update()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, column):
+        return self.column(column)
+
+    def column(self, column):
+        """
+        :param column: name from ECHO_COLUMNS or index of the column
+        :return: values of the column in every row
+        """
+        if isinstance(column, str):
+            if column not in ECHO_COLUMNS:
+                logger.error(f"Unknown echo column: {column}")
+                raise ValueError(column)
+
+            column = ECHO_COLUMNS[column]
+
+        return self.data[:, column]
+
+    def update(self):
+        """
+        Reads any complete lines added to the echo file since the last read
+
+        :return: number of new rows
+        """
+        with open(self.echo_file, 'rb') as echo:
+            size = echo.seek(0, os.SEEK_END)
+            if self._offset and (size < self._offset or not self._unchanged(echo)):
+                logger.debug(f"{self.echo_file} was rewritten, reading it again")
+                self.data = None
+                self._offset = 0
+                self._tail = b''
+
+            echo.seek(self._offset)
+            chunk = echo.read(size - self._offset)
+
+        # A line that is still being written is left for the next read
+        end = chunk.rfind(b'\n') + 1
+        lines = [line for line in chunk[:end].split(b'\n') if line.strip() and not line.startswith(b'#')]
+        if end:
+            self._tail = chunk[:end][-min(end, 256):]
+            self._offset += end
+
+        if not lines:
+            if self.data is None:
+                self.data = np.zeros((0, len(ECHO_COLUMNS) + 1))
+
+            return 0
+
+        n_columns = len(lines[0].split())
+        try:
+            rows = np.array(b' '.join(lines).split(), dtype=float).reshape(len(lines), n_columns)
+
+        except ValueError:
+            logger.exception(f"Inconsistent rows in {self.echo_file}")
+            raise
+
+        if self.data is None or not len(self.data):
+            self.data = rows
+
+        elif self.data.shape[1] != n_columns:
+            logger.error(f"New rows of {self.echo_file} have {n_columns} columns instead of {self.data.shape[1]}")
+            raise ValueError(self.echo_file)
+
+        else:
+            self.data = np.concatenate((self.data, rows))
+
+        return len(rows)
+
+    def _unchanged(self, echo):
+        """Whether the bytes just before the last read offset are still the ones that were read"""
+        echo.seek(self._offset - len(self._tail))
+        return echo.read(len(self._tail)) == self._tail
+
+    def select(self, start_time: float = None, end_time: float = None):
+        """
+        :param start_time: first time to include, None for the beginning
+        :param end_time: last time to include, None for the end
+        :return: boolean mask over the rows
+        """
+        time = self.column("time")
+        mask = np.ones(len(time), dtype=bool)
+        if start_time is not None:
+            mask &= time >= start_time
+
+        if end_time is not None:
+            mask &= time <= end_time
+
+        return mask
+
+    def stats(self, column, start_time: float = None, end_time: float = None):
+        """
+        :param column: name from ECHO_COLUMNS or index of the column
+        :param start_time: first time to include, None for the beginning
+        :param end_time: last time to include, None for the end
+        :return: dictionary of the mean, std, min and max of the column
+        """
+        values = self.column(column)[self.select(start_time, end_time)]
+        if not len(values):
+            logger.error(f"No rows of {self.echo_file} between {start_time} and {end_time}")
+            raise ValueError(self.echo_file)
+
+        return {"mean": values.mean(), "std": values.std(), "min": values.min(), "max": values.max()}
+
+    def windowed_stats(self, column, window: int, start_time: float = None, end_time: float = None):
+        """
+        Statistics over consecutive, non-overlapping windows of rows (a trailing partial window is dropped)
+
+        :param column: name from ECHO_COLUMNS or index of the column
+        :param window: number of rows in each window
+        :param start_time: first time to include, None for the beginning
+        :param end_time: last time to include, None for the end
+        :return: dictionary of the start time and the mean, std, min and max of the column for each window
+        """
+        if window < 1:
+            logger.error(f"Invalid window: {window}")
+            raise ValueError("window")
+
+        mask = self.select(start_time, end_time)
+        values = self.column(column)[mask]
+        n_windows = len(values) // window
+        blocks = values[:n_windows * window].reshape(n_windows, window)
+
+        return {
+            "time": self.column("time")[mask][:n_windows * window:window],
+            "mean": blocks.mean(axis=1),
+            "std": blocks.std(axis=1),
+            "min": blocks.min(axis=1),
+            "max": blocks.max(axis=1)
+        }
+
+    def summary(self, start_time: float = None, end_time: float = None):
+        """
+        :param start_time: first time to include, None for the beginning
+        :param end_time: last time to include, None for the end
+        :return: dictionary of column name -> stats() for every column in ECHO_COLUMNS except the time
+        """
+        return {name: self.stats(name, start_time, end_time) for name in ECHO_COLUMNS if name != "time"}
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import gc
+import itertools
+import logging
+import numpy as np
+
+#PHD3 Imports
+from ..protein import atom, chain, residue, protein
+from . import constants
+
+__all__ = [
+    'read_pdb_columns',
+    'read_pdb_coords',
+    'columns_to_protein',
+    'pdb_template',
+    'write_pdb_models'
+]
+
+logger = logging.getLogger(__name__)
+
+# Every field lies within the first PDB_LINE_WIDTH columns of a record
+PDB_LINE_WIDTH = 80
+
+_SPACE = ord(' ')
+_MINUS = ord('-')
+_POINT = ord('.')
+
+class _Records:
+    """
+    Start and end offset of every ATOM/HETATM line in the raw bytes of a pdb. The file is never split into lines, each
+    fixed-width field is gathered for all of the records at once straight out of the one byte buffer.
+    """
+
+    __slots__ = ['buffer', 'starts', 'ends']
+
+    def __init__(self, data: bytes):
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        ends = np.flatnonzero(buffer == ord('\n'))
+        if len(buffer) and buffer[-1] != ord('\n'):
+            ends = np.append(ends, len(buffer))
+
+        starts = np.zeros(len(ends), dtype=np.int64)
+        starts[1:] = ends[:-1] + 1
+
+        # Blanks on the end so that gathering the fields of a short last line stays inside the buffer
+        self.buffer = np.concatenate((buffer, np.full(PDB_LINE_WIDTH, _SPACE, dtype=np.uint8)))
+        record = np.zeros(len(starts), dtype=bool)
+        for name in (b"ATOM", b"HETATM"):
+            matches = ends - starts >= len(name)
+            for k, byte in enumerate(name):
+                matches &= self.buffer[starts + k] == byte
+
+            record |= matches
+
+        self.starts = starts[record]
+        self.ends = ends[record]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def field(self, start: int, end: int):
+        """(N, end - start) bytes of columns start:end of every record, blank past the end of a short line"""
+        raw = np.lib.stride_tricks.sliding_window_view(self.buffer, end - start)[self.starts + start]
+        short = self.ends - self.starts < end
+        if short.any():
+            raw[short[:, None] & (np.arange(start, end) >= (self.ends - self.starts)[:, None])] = _SPACE
+
+        raw[(raw == ord('\r')) | (raw == 0)] = _SPACE
+        return raw
+
+    def strings(self, start: int, end: int, transform=None):
+        """
+        Decodes a text field. Only the distinct values are decoded (there are few of them, ie. atom and residue
+        names), every record then takes its value by index.
+
+        :param transform: applied to each distinct decoded value
+        :return: numpy unicode array
+        """
+        raw = self.field(start, end)
+        keys = np.zeros(len(raw), dtype=np.int64)
+        for column in raw.T:
+            keys = (keys << 8) | column
+
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        values = [raw[row].tobytes() for row in first.tolist()]
+        if transform is not None:
+            values = [transform(value) for value in values]
+
+        return np.array([value.decode() for value in values], dtype=f"U{end - start}")[inverse.reshape(-1)]
+
+    def numbers(self, start: int, end: int, dtype=float):
+        """
+        Parses a numeric field with arithmetic on the digits. This needs the usual pdb layout: right-aligned numbers
+        with an optional leading minus sign and, for floats, the decimal point in the same column on every record. Any
+        other field (ie. in exponent notation) is left to numpy's own parser.
+        """
+        raw = self.field(start, end)
+        width = end - start
+        filled = raw != _SPACE
+        minus = raw == _MINUS
+        point = raw == _POINT
+        digit = raw - np.uint8(ord('0')) < 10
+        point_column = int(np.argmax(point[0])) if len(raw) else 0
+        decimals = width - 1 - point_column if point.any() else 0
+        plain = (digit[:, -1].all()
+                 and (digit | minus | point | ~filled).all()
+                 and not _followed(filled, ~filled)
+                 and not _followed(filled, minus)
+                 and (not decimals or (dtype is float and point[:, point_column].all()
+                                       and np.count_nonzero(point) == len(raw))))
+        if not plain:
+            return np.ascontiguousarray(raw).view(f"S{width}").reshape(len(raw)).astype(dtype)
+
+        # Place value of every column, the decimal point does not take one
+        columns = np.arange(width)
+        weights = 10.0**(width - 1 - columns - ((columns < point_column) if decimals else 0))
+        if decimals:
+            weights[point_column] = 0.0
+
+        value = ((raw - np.uint8(ord('0'))) * digit).astype(float) @ weights
+        if decimals:
+            # Dividing the exact integer by a power of ten rounds the same way float() does
+            value /= 10.0**decimals
+
+        # The sign goes on last so that -0.000 stays negative zero
+        if minus.any():
+            value[minus.astype(float) @ np.ones(width) > 0] *= -1
+
+        return value if dtype is float else value.astype(dtype)
+
+def _followed(first, second):
+    """Whether an element of first is directly followed by one of second within any row of the (N, W) masks"""
+    pairs = first.ravel()[:-1] & second.ravel()[1:]
+    pairs[first.shape[1] - 1::first.shape[1]] = False
+    return pairs.any()
+
+def _element(value: bytes):
+    value = value.strip().capitalize()
+    return b'h' if value.lower() == b'eh' else value
+
+def read_pdb_columns(data: bytes):
+    """
+    Parses the ATOM/HETATM records of a pdb in a single vectorized pass. The records are located in the raw bytes with
+    numpy, then every fixed-width field is gathered from the buffer and parsed as a whole column at once.
+
+    :param data: raw contents of a pdb file (or a single model of a movie file)
+    :return: dictionary of numpy arrays with the keys number, id, resname, resnum, chain, element (each of shape (N,))
+    and coords (shape (N, 3))
+    """
+    records = _Records(data)
+    return {
+        "number": records.numbers(6, 11, int),
+        "id": records.strings(12, 16, lambda value: value.strip().upper()),
+        "resname": records.strings(17, 20),
+        "chain": records.strings(21, 22),
+        "resnum": records.numbers(22, 26, int),
+        "element": records.strings(76, 78, _element),
+        "coords": _record_coords(records)
+    }
+
+def _record_coords(records: _Records):
+    return np.stack([records.numbers(start, start + 8) for start in (30, 38, 46)], axis=1)
+
+def read_pdb_coords(data: bytes):
+    """
+    Same as read_pdb_columns but only parses the coordinates
+
+    :param data: raw contents of a pdb file (or a single model of a movie file)
+    :return: (N, 3) numpy array
+    """
+    return _record_coords(_Records(data))
+
+def columns_to_protein(name: str, columns: dict):
+    """
+    Builds the Chain/Residue/Atom hierarchy from the arrays produced by read_pdb_columns. A new chain is started
+    whenever the chain letter changes and a new residue whenever the residue number changes, exactly as the line by line
+    reader did. Each atom's coordinates are a row of the columns coordinate array.
+
+    :param name: name to give the protein
+    :param columns: dictionary returned by read_pdb_columns
+    :return: Protein
+    """
+    chain_ids = columns["chain"]
+    resnums = columns["resnum"]
+    n_atoms = len(chain_ids)
+
+    new_chain = np.ones(n_atoms, dtype=bool)
+    new_chain[1:] = chain_ids[1:] != chain_ids[:-1]
+
+    new_residue = new_chain.copy()
+    new_residue[1:] |= resnums[1:] != resnums[:-1]
+
+    chain_starts = set(np.flatnonzero(new_chain).tolist())
+    residue_starts = np.flatnonzero(new_residue).tolist()
+    residue_ends = residue_starts[1:] + [n_atoms]
+
+    # Only the first atom of each residue and chain is needed for their names and numbers
+    resnames = columns["resname"][residue_starts].tolist()
+    resnum_list = resnums[residue_starts].tolist()
+    chain_list = chain_ids[residue_starts].tolist()
+
+    # None of the objects created here can be garbage, so don't let the collector rescan the growing graph
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        # Iterating over the coordinate array hands out its rows as views
+        atoms = list(map(atom.Atom, itertools.repeat(None), columns["element"].tolist(), list(columns["coords"]),
+                         columns["id"].tolist(), columns["number"].tolist()))
+
+        chains = []
+        for k, (start, end) in enumerate(zip(residue_starts, residue_ends)):
+            if start in chain_starts:
+                chains.append(chain.Chain(chain_list[k]))
+
+            res = residue.Residue(name=resnames[k], number=resnum_list[k])
+            chains[-1].add_residue(res)
+            res.add_atoms(atoms[start:end])
+
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return protein.Protein(name, chains)
+
+def pdb_template(columns: dict, ter_after=(), endmdl: bool = True):
+    """
+    Formats every ATOM/HETATM line of a model in one pass, leaving %8.3f placeholders where the coordinates go. Filling
+    the template (template % tuple(coords.ravel())) is then a single string operation, and the same template can be
+    reused for every frame of a movie. The lines are identical to Atom.pdb_line.
+
+    :param columns: dictionary with the number, id, resname, chain, resnum and element of every atom
+    :param ter_after: atom counts after which a TER line is written (non-decreasing, repeats give repeated TERs)
+    :param endmdl: whether to finish the model with ENDMDL
+    :return: template string for one model
+    """
+    metals = set(constants.METALS)
+    amino_acids = set(constants.AMINO_ACID_RESIDUES)
+
+    lines = []
+    for number, id, resname, chain_name, resnum, element in zip(*[np.asarray(columns[key]).tolist() for key in
+            ("number", "id", "resname", "chain", "resnum", "element")]):
+        if element.lower() in metals:
+            head = f"HETATM{number:>5} {id:<4} {resname} {chain_name}{resnum:>4}    "
+
+        else:
+            head = f"{'ATOM' if resname in amino_acids else 'HETATM':<6}{number:>5} {id if len(id) > 3 else f' {id}':<4} {resname} {chain_name}{resnum:>4}    "
+
+        lines.append(f"{head.replace('%', '%%')}%8.3f%8.3f%8.3f  1.00  0.00          {element.capitalize().replace('%', '%%'):>2}\n")
+
+    pieces = []
+    previous = 0
+    for position in ter_after:
+        pieces.extend(lines[previous:position])
+        pieces.append("TER\n")
+        previous = position
+
+    pieces.extend(lines[previous:])
+    if endmdl:
+        pieces.append("ENDMDL\n")
+
+    return ''.join(pieces)
+
+def write_pdb_models(file_name: str, template: str, frames, mode: str = 'w'):
+    """
+    Writes one model per frame to a single (multi-model) pdb, each model is formatted and written as one buffer
+
+    :param file_name: pdb to write
+    :param template: template from pdb_template
+    :param frames: iterable of (N, 3) coordinate arrays
+    :param mode: 'w' to overwrite the file or 'a' to append to it
+    """
+    with open(file_name, mode) as pdb:
+        for coords in frames:
+            pdb.write(template % tuple(np.asarray(coords, dtype=float).ravel().tolist()))
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import numpy as np
+
+#PHD3 Imports
+from .echo import ECHO_COLUMNS, EchoData
+
+__all__ = [
+    'STATUS_FILE',
+    'ProgressMonitor'
+]
+
+logger = logging.getLogger(__name__)
+
+# Written in the run directory, rewritten in place every poll
+STATUS_FILE = "dmd_status.json"
+
+# Seconds between reads of the echo file
+POLL_INTERVAL = 30
+
+# Number of the most recent echo rows the rolling statistics are taken over
+ROLLING_ROWS = 100
+
+# Seconds without the simulation time moving before a run is reported as stalled
+STALL_AFTER = 600
+
+class ProgressMonitor(threading.Thread):
+    """
+    Background thread that follows the echo file while pdmd.linux runs. Every poll only reads the lines added since the
+    last one (see EchoData.update) and publishes the simulation time, the rate (simulation time per wall second, over
+    the whole command and since the last poll), the estimated time left and rolling statistics of the energies and
+    temperature. The status goes to the debug log and to a JSON file that is replaced atomically, so other tools can read
+    it at any time.
+
+    Usage:
+        monitor = ProgressMonitor("echo", start_time, end_time)
+        monitor.start()
+        ... run pdmd.linux ...
+        monitor.stop()
+    """
+
+    def __init__(self, echo_file: str, start_time: float, end_time: float, status_file: str = STATUS_FILE,
+                 interval: float = POLL_INTERVAL, window: int = ROLLING_ROWS, stall_after: float = STALL_AFTER):
+        """
+        :param echo_file: echo file pdmd.linux writes to
+        :param start_time: simulation time the command starts at
+        :param end_time: simulation time the command stops at
+        :param status_file: JSON file to write the status to, None to only log it
+        :param interval: seconds between polls
+        :param window: echo rows the rolling statistics are taken over
+        :param stall_after: seconds without progress before the run is reported as stalled, a poll that finds no
+        progress since the previous one also reports it
+        """
+        super().__init__(name=f"ProgressMonitor({echo_file})", daemon=True)
+        self.echo_file = echo_file
+        self.start_time = start_time
+        self.end_time = end_time
+        self.status_file = status_file
+        self.interval = interval
+        self.window = window
+        self.stall_after = stall_after
+        self.status = {}
+
+        self._echo = None
+        self._stop_event = threading.Event()
+        self._wall_start = time.time()
+        self._last_poll = None
+        self._last_progress = (self._wall_start, start_time)
+        self._stalled = False
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.poll()
+
+            except (OSError, ValueError):
+                # A malformed line or a file being swapped out should not end the monitoring
+                logger.exception(f"Could not read the progress of {self.echo_file}")
+
+    def stop(self, state: str = "finished"):
+        """
+        Stops the thread and publishes a last status
+
+        :param state: state to record, ie. "finished" or "failed"
+        :return: the last status
+        """
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+        try:
+            return self.poll(state)
+
+        except (OSError, ValueError):
+            logger.exception(f"Could not read the progress of {self.echo_file}")
+            return self.status
+
+    def poll(self, state: str = "running"):
+        """
+        Reads the new lines of the echo file and publishes the status
+
+        :param state: state to record
+        :return: status dictionary
+        """
+        now = time.time()
+        wall_elapsed = now - self._wall_start
+        status = {
+            "state": state,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "echo file": self.echo_file,
+            "updated": now,
+            "wall elapsed": wall_elapsed,
+            "start time": self.start_time,
+            "end time": self.end_time,
+            "sim time": None,
+            "progress": 0.0,
+            "rate": None,
+            "recent rate": None,
+            "eta": None,
+            "stalled": False,
+            "rolling": {}
+        }
+
+        if self._echo is None and os.path.isfile(self.echo_file):
+            self._echo = EchoData(self.echo_file)
+
+        elif self._echo is not None:
+            self._echo.update()
+
+        rows = None
+        if self._echo is not None and len(self._echo):
+            rows = self._echo.data[self._echo.select(self.start_time)]
+
+        if rows is not None and len(rows):
+            sim_time = float(rows[-1, ECHO_COLUMNS["time"]])
+            length = self.end_time - self.start_time
+            status["sim time"] = sim_time
+            status["progress"] = min(1.0, (sim_time - self.start_time) / length) if length > 0 else 1.0
+            if wall_elapsed > 0:
+                status["rate"] = (sim_time - self.start_time) / wall_elapsed
+
+            if self._last_poll is not None and now > self._last_poll[0]:
+                status["recent rate"] = (sim_time - self._last_poll[1]) / (now - self._last_poll[0])
+
+            # No progress since the last poll leaves the eta unknown (the run is reported as stalled below) instead of
+            # falling back on the average rate
+            rate = status["recent rate"] if status["recent rate"] is not None else status["rate"]
+            if rate is not None and rate > 0:
+                status["eta"] = max(0.0, (self.end_time - sim_time) / rate)
+
+            recent = rows[-self.window:]
+            for name, column in ECHO_COLUMNS.items():
+                if name != "time" and column < recent.shape[1]:
+                    values = recent[:, column]
+                    status["rolling"][name] = {"mean": float(values.mean()), "std": float(values.std())}
+
+            if sim_time > self._last_progress[1]:
+                self._last_progress = (now, sim_time)
+
+            self._last_poll = (now, sim_time)
+
+        status["stalled"] = state == "running" and (status["recent rate"] == 0 or now - self._last_progress[0] > self.stall_after)
+        self.status = status
+        self._report(status)
+        self._write(status)
+        return status
+
+    def _report(self, status: dict):
+        # The polls while running only go to the debug log (and the status file), the final status is always logged
+        log = logger.debug if status["state"] == "running" else logger.info
+        if status["sim time"] is None:
+            log(f"[Progress]         ==>> {status['state']}, waiting for {self.echo_file}")
+
+        else:
+            eta = f"{status['eta']:.0f} s" if status["eta"] is not None else "unknown"
+            rolling = status["rolling"]
+            energies = ' '.join(f"{name}: {rolling[name]['mean']:.3f} ({rolling[name]['std']:.3f})"
+                                for name in ("potential", "temperature") if name in rolling)
+            rate = f"{status['rate']:.4f}" if status["rate"] is not None else "unknown"
+            log(f"[Progress]         ==>> {status['state']} time: {status['sim time']:.1f} "
+                        f"({100 * status['progress']:.1f}%) rate: {rate}/s eta: {eta} {energies}")
+
+        if status["stalled"] and not self._stalled:
+            logger.warning(f"No progress in {self.echo_file} for {status['updated'] - self._last_progress[0]:.0f} s, the run "
+                           f"may be stalled")
+
+        self._stalled = status["stalled"]
+
+    def _write(self, status: dict):
+        if self.status_file is None:
+            return
+
+        try:
+            with open(f"{self.status_file}.tmp", 'w') as out:
+                json.dump(status, out, indent=4, default=_json_default)
+
+            os.replace(f"{self.status_file}.tmp", self.status_file)
+
+        except OSError:
+            logger.exception(f"Could not write {self.status_file}")
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+
+    raise TypeError(type(value))
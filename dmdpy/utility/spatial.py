@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import logging
+import numpy as np
+
+#PHD3 Imports
+
+__all__ = [
+    'SpatialIndex',
+    'concatenated_ranges'
+]
+
+logger = logging.getLogger(__name__)
+
+# Default edge length of a grid cell in Angstrom, a little over the longest bond/coordination distance we look for
+DEFAULT_CELL_SIZE = 4.0
+
+# Number of atoms whose neighbours are gathered at once in pairs(), bounds the memory used for the candidate pairs
+PAIR_CHUNK = 65536
+
+class SpatialIndex:
+    """
+    Uniform cell grid over an (N, 3) coordinate array. The atoms are sorted by the cell they fall in, so the atoms of
+    any cell are one contiguous slice of the sorted order and a query only ever looks at the cells around it.
+    Building the grid is a single sort, radius and nearest neighbour queries touch only the nearby cells and
+    pairs() finds every pair within a cutoff in time proportional to the number of atoms.
+    """
+
+    __slots__ = ['coords', 'cell_size', 'origin', 'shape', 'order', 'cell_keys', 'cell_starts', 'cell_ends']
+
+    def __init__(self, coords, cell_size: float = DEFAULT_CELL_SIZE):
+        if cell_size <= 0:
+            logger.error(f"Invalid cell size: {cell_size}")
+            raise ValueError("cell_size")
+
+        self.coords = np.array(coords, dtype=float).reshape(-1, 3)
+        self.cell_size = float(cell_size)
+
+        if len(self.coords):
+            self.origin = self.coords.min(axis=0)
+            cells = self._cells(self.coords)
+            self.shape = cells.max(axis=0) + 1
+
+        else:
+            self.origin = np.zeros(3)
+            cells = np.zeros((0, 3), dtype=np.int64)
+            self.shape = np.ones(3, dtype=np.int64)
+
+        keys = self._keys(cells)
+        self.order = np.argsort(keys, kind='stable')
+        self.cell_keys, self.cell_starts, counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+        self.cell_ends = self.cell_starts + counts
+
+    def __len__(self):
+        return len(self.coords)
+
+    def _cells(self, points):
+        return np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+
+    def _keys(self, cells):
+        return (cells[:, 0] * self.shape[1] + cells[:, 1]) * self.shape[2] + cells[:, 2]
+
+    def _cell_slices(self, cells):
+        """
+        :param cells: (M, 3) cell coordinates, may lie outside of the grid
+        :return: (starts, ends) into the sorted order of the atoms in each cell, empty for cells without atoms
+        """
+        if not len(self.cell_keys):
+            empty = np.zeros(len(cells), dtype=np.int64)
+            return empty, empty
+
+        inside = np.all((cells >= 0) & (cells < self.shape), axis=1)
+        keys = self._keys(cells)
+        position = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        found = inside & (self.cell_keys[position] == keys)
+        return np.where(found, self.cell_starts[position], 0), np.where(found, self.cell_ends[position], 0)
+
+    def radius(self, point, radius: float):
+        """
+        Every atom within radius of a point
+
+        :param point: (3,) coordinates
+        :param radius: distance in Angstrom (inclusive)
+        :return: (indices in ascending order, distances to point)
+        """
+        point = np.asarray(point, dtype=float).reshape(3)
+        low = np.maximum(self._cells((point - radius)[None])[0], 0)
+        high = np.minimum(self._cells((point + radius)[None])[0], self.shape - 1)
+        if np.any(high < low):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        cells = np.stack(np.meshgrid(*[np.arange(l, h + 1) for l, h in zip(low, high)], indexing='ij'), axis=-1).reshape(-1, 3)
+        candidates = self.order[concatenated_ranges(*self._cell_slices(cells))[1]]
+
+        distances = np.linalg.norm(self.coords[candidates] - point, axis=1)
+        within = distances <= radius
+        candidates, distances = candidates[within], distances[within]
+
+        ordered = np.argsort(candidates)
+        return candidates[ordered], distances[ordered]
+
+    def nearest(self, point, k: int = 1):
+        """
+        The k atoms closest to a point. The search radius starts at one cell and is doubled until at least k atoms are
+        inside of it, at which point the k closest of those are the k closest overall.
+
+        :param point: (3,) coordinates
+        :param k: number of atoms to return
+        :return: (indices, distances) sorted from the closest atom out
+        """
+        if k < 1:
+            logger.error(f"Invalid number of neighbours: {k}")
+            raise ValueError("k")
+
+        point = np.asarray(point, dtype=float).reshape(3)
+        k = min(k, len(self))
+        if not k:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        radius = self.cell_size
+        while True:
+            indices, distances = self.radius(point, radius)
+            if len(indices) >= k:
+                break
+
+            radius *= 2
+
+        closest = np.argsort(distances, kind='stable')[:k]
+        return indices[closest], distances[closest]
+
+    def pairs(self, cutoff: float):
+        """
+        Every pair of atoms within cutoff of each other
+
+        :param cutoff: distance in Angstrom (inclusive)
+        :return: (i, j, distances) with i < j, sorted by i then j
+        """
+        # Cells much bigger than the cutoff only add candidates that are too far away
+        if cutoff < self.cell_size:
+            return SpatialIndex(self.coords, cutoff).pairs(cutoff)
+
+        # Neighbouring cells have to cover the cutoff. Only half of them are visited (plus the cell itself) so that
+        # every pair of cells, and so every pair of atoms, is looked at once
+        reach = int(np.ceil(cutoff / self.cell_size))
+        offsets = np.stack(np.meshgrid(*[np.arange(-reach, reach + 1)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+        offsets = offsets[len(offsets) // 2:]
+
+        sorted_cells = self._cells(self.coords[self.order])
+        found_i = []
+        found_j = []
+        found_d = []
+        for chunk in range(0, len(self), PAIR_CHUNK):
+            rows = np.arange(chunk, min(chunk + PAIR_CHUNK, len(self)))
+            cells = (sorted_cells[rows][:, None, :] + offsets[None, :, :]).reshape(-1, 3)
+            owner, neighbours = concatenated_ranges(*self._cell_slices(cells))
+
+            first = rows[owner // len(offsets)]
+            # The first offset is the cell itself, where each pair shows up twice
+            keep = (owner % len(offsets) != 0) | (first < neighbours)
+            i = self.order[first[keep]]
+            j = self.order[neighbours[keep]]
+
+            delta = self.coords[i] - self.coords[j]
+            squared = np.einsum('ij,ij->i', delta, delta)
+            within = squared <= cutoff * cutoff
+            i, j = i[within], j[within]
+            found_i.append(np.minimum(i, j))
+            found_j.append(np.maximum(i, j))
+            found_d.append(np.sqrt(squared[within]))
+
+        if not found_i:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        i, j, distances = np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+        ordered = np.lexsort((j, i))
+        return i[ordered], j[ordered], distances[ordered]
+
+    def within(self, points, radius: float):
+        """
+        Which points have at least one atom of the index within radius of them
+
+        :param points: (M, 3) coordinates
+        :param radius: distance in Angstrom (inclusive)
+        :return: boolean array of shape (M,)
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        found = np.zeros(len(points), dtype=bool)
+        if not len(self):
+            return found
+
+        reach = int(np.ceil(radius / self.cell_size))
+        offsets = np.stack(np.meshgrid(*[np.arange(-reach, reach + 1)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+
+        # Only points inside the grid (grown by the radius) can have anything near them
+        low = self.origin - radius
+        high = self.origin + self.shape * self.cell_size + radius
+        near = np.flatnonzero(np.all((points >= low) & (points <= high), axis=1))
+
+        point_cells = self._cells(points)
+        for chunk in range(0, len(near), PAIR_CHUNK):
+            rows = near[chunk:chunk + PAIR_CHUNK]
+            cells = (point_cells[rows][:, None, :] + offsets[None, :, :]).reshape(-1, 3)
+            owner, candidates = concatenated_ranges(*self._cell_slices(cells))
+
+            rows = rows[owner // len(offsets)]
+            delta = points[rows] - self.coords[self.order[candidates]]
+            found[rows[np.einsum('ij,ij->i', delta, delta) <= radius * radius]] = True
+
+        return found
+
+def concatenated_ranges(starts, ends):
+    """
+    Concatenates the ranges [start, end) without a python loop
+
+    :return: (index of the range each value came from, values)
+    """
+    counts = ends - starts
+    owner = np.repeat(np.arange(len(starts)), counts)
+    values = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+    return owner, values
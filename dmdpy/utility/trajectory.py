@@ -0,0 +1,819 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import logging
+import json
+import os
+import shutil
+import struct
+import zlib
+import numpy as np
+
+#PHD3 Imports
+from . import pdbio
+from .echo import EchoData
+
+__all__ = [
+    'Trajectory',
+    'iter_frame_data',
+    'last_frame_data',
+    'trajectory_cache_files',
+    'trajectory_cache_is_fresh',
+    'write_trajectory_cache',
+    'load_trajectory',
+    'step_index_file',
+    'append_frames',
+    'record_step',
+    'rollback_step',
+    'is_compressed_movie',
+    'write_compressed_movie',
+    'read_compressed_topology',
+    'iter_compressed_coords',
+    'iter_compressed_movie',
+    'compressed_last_frame',
+    'frame_index_file',
+    'write_frame_index',
+    'read_frame_index',
+    'time_window',
+    'iter_indexed_frame_data'
+]
+
+logger = logging.getLogger(__name__)
+
+# Coordinates in a pdb only carry three decimals, which float32 holds exactly enough to round back to
+PDB_COORD_DECIMALS = 3
+
+TOPOLOGY_KEYS = ("number", "id", "resname", "chain", "resnum", "element")
+
+# Every record of a step index has the same width so the last one can be reached with a single seek. The last field
+# is 1 once the files have been rolled back to the record
+STEP_RECORD = "{:>20d} {:>20d} {:>12d} {:>1d}\n"
+STEP_RECORD_SIZE = len(STEP_RECORD.format(0, 0, 0, 0))
+
+# Compressed movies: a header with the topology, then blocks of frames. Each block stores the coordinates as integer
+# multiples of 1/FIXED_POINT_SCALE Angstrom (exactly what a pdb holds), the first frame as is and every later frame as the
+# difference to the one before it, deflated with zlib. Blocks never depend on each other so they can be appended to or
+# skipped over without decompressing the rest of the file.
+COMPRESSED_MAGIC = b"DMDZ"
+COMPRESSED_BLOCK = b"DMDF"
+COMPRESSED_VERSION = 1
+COMPRESSED_HEADER = struct.Struct("<4sII")  # magic, version, length of the topology
+COMPRESSED_BLOCK_HEADER = struct.Struct("<4sIII")  # marker, frames, atoms, length of the compressed data
+FIXED_POINT_SCALE = 1000
+FRAMES_PER_BLOCK = 100
+TOPOLOGY_DTYPES = {"number": int, "id": 'U4', "resname": 'U3', "chain": 'U1', "resnum": int, "element": 'U2'}
+
+# Frame index: a header with the size of the movie that was indexed, then a record for every frame with the byte offset
+# it starts at (the block it is in for a compressed movie) and its simulation time. An index that does not cover the
+# whole movie is brought up to date by scanning only what was added since.
+FRAME_INDEX_MAGIC = b"DMDI"
+FRAME_INDEX_HEADER = struct.Struct("<4sqq")  # magic, size of the movie indexed, end of its last frame
+FRAME_INDEX_DTYPE = np.dtype([("offset", "<i8"), ("time", "<f8")])
+
+def iter_frame_data(movie_file: str, start: int = 0, stop: int = None, stride: int = 1):
+    """
+    Splits a movie pdb into its ENDMDL terminated models without parsing them. Models with no atoms are skipped (and
+    not counted), lines of models that are not selected are never kept.
+
+    :param movie_file: name of the movie pdb
+    :param start: index of the first frame to yield
+    :param stop: index of the frame to stop at (not yielded), None for the end of the movie
+    :param stride: yield every stride-th frame starting from start
+    :return: (frame number, raw ATOM/HETATM records of the frame) for each selected frame
+    """
+    if start < 0 or stride < 1:
+        logger.error(f"Invalid frame selection start: {start} stride: {stride}")
+        raise ValueError("frame selection")
+
+    if stop is not None and stop <= start:
+        return
+
+    frame_lines = []
+    has_atoms = False
+    frame_number = 0
+    with open(movie_file, 'rb') as mf:
+        for line in mf:
+            if line[0:4] == b"ATOM" or line[0:6] == b"HETATM":
+                has_atoms = True
+                if frame_number >= start and (frame_number - start) % stride == 0:
+                    frame_lines.append(line)
+
+            elif b"ENDMDL" in line:
+                if not has_atoms:
+                    logger.warning("Empty chain while loading in movie")
+                    continue
+
+                if frame_lines:
+                    yield frame_number, b''.join(frame_lines)
+
+                frame_lines = []
+                has_atoms = False
+                frame_number += 1
+                if stop is not None and frame_number >= stop:
+                    break
+
+def last_frame_data(movie_file: str):
+    """
+    Reads only the final frame of a movie pdb. The file is read backwards from the end in growing blocks until the
+    ENDMDL that precedes the last model is found, so the cost does not depend on the length of the movie.
+
+    :param movie_file: name of the movie pdb
+    :return: raw ATOM/HETATM records of the last frame
+    """
+    block = 1 << 16
+    with open(movie_file, 'rb') as mf:
+        size = mf.seek(0, os.SEEK_END)
+        while True:
+            offset = max(0, size - block)
+            mf.seek(offset)
+            lines = mf.read(size - offset).split(b'\n')
+            # The first line is only complete when we read from the very beginning
+            frame = _last_frame_lines(lines[1:] if offset else lines, offset == 0)
+            if frame is not None:
+                return b'\n'.join(frame)
+
+            if not offset:
+                logger.error(f"No frames found in {movie_file}")
+                raise ValueError(movie_file)
+
+            block *= 4
+
+def _last_frame_lines(lines, at_beginning: bool):
+    """
+    Scans the lines at the end of a movie backwards for the last ENDMDL terminated model that has atoms in it
+
+    :param lines: complete lines from the end of the movie file
+    :param at_beginning: whether lines starts at the beginning of the file
+    :return: ATOM/HETATM lines of the last model, or None if the lines do not reach back far enough to tell
+    """
+    terminated = False
+    frame = []
+    for line in reversed(lines):
+        if line[0:4] == b"ATOM" or line[0:6] == b"HETATM":
+            if terminated:
+                frame.append(line)
+
+        elif b"ENDMDL" in line:
+            if frame:
+                frame.reverse()
+                return frame
+
+            terminated = True
+
+    if at_beginning and frame:
+        frame.reverse()
+        return frame
+
+    return None
+
+def step_index_file(movie_file: str):
+    """
+    :param movie_file: name of the movie pdb
+    :return: name of the index of titration steps appended to the movie
+    """
+    return f"{movie_file}.steps"
+
+def append_frames(movie_file: str, new_movie: str, compress: bool = False):
+    """
+    Appends the models of new_movie onto the end of movie_file as a single block copy
+
+    :param movie_file: movie pdb to grow
+    :param new_movie: movie pdb whose models are appended
+    :param compress: whether movie_file is a compressed movie, new_movie is then compressed onto the end of it
+    :return: number of frames appended
+    """
+    if compress:
+        return write_compressed_movie(new_movie, movie_file, append=True)
+
+    with open(new_movie, 'rb') as new, open(movie_file, 'ab') as movie:
+        data = new.read()
+        movie.write(data)
+
+    return data.count(b"ENDMDL")
+
+def _last_step(index):
+    """Reads the last record of an open step index, None if the index is empty"""
+    size = index.seek(0, os.SEEK_END)
+    if size < STEP_RECORD_SIZE:
+        return None
+
+    index.seek(size - STEP_RECORD_SIZE)
+    movie_size, echo_size, frames, rolled_back = (int(field) for field in index.read(STEP_RECORD_SIZE).split())
+    return size - STEP_RECORD_SIZE, movie_size, echo_size, frames, bool(rolled_back)
+
+def record_step(movie_file: str, echo_file: str):
+    """
+    Appends the current sizes of the movie and echo file to the step index of the movie, along with the number of
+    frames in the movie. Only the bytes appended since the previous record are read to count the frames, so recording a
+    step does not get slower as the movie grows.
+
+    :param movie_file: movie pdb that the titration steps are appended to
+    :param echo_file: echo file of the run
+    :return: (movie size, echo size, frames) that were recorded
+    """
+    movie_size = os.path.getsize(movie_file)
+    echo_size = os.path.getsize(echo_file)
+
+    with open(step_index_file(movie_file), 'a+b') as index:
+        last = _last_step(index)
+        previous_size, frames = (0, 0) if last is None or last[1] > movie_size else (last[1], last[3])
+
+        frames += _count_frames(movie_file, previous_size, movie_size)
+
+        index.seek(0, os.SEEK_END)
+        index.write(STEP_RECORD.format(movie_size, echo_size, frames, 0).encode())
+
+    logger.debug(f"Recorded step of {movie_file}: {frames} frames")
+    return movie_size, echo_size, frames
+
+def _count_frames(movie_file: str, start: int, end: int):
+    """Number of frames stored between two byte offsets of a movie (offsets of a compressed movie are block boundaries)"""
+    with open(movie_file, 'rb') as movie:
+        if not is_compressed_movie(movie_file):
+            movie.seek(start)
+            return movie.read(end - start).count(b"ENDMDL")
+
+        if start == 0:
+            _read_compressed_header(movie)
+
+        else:
+            movie.seek(start)
+
+        frames = 0
+        for n_frames, n_atoms, data_size in _compressed_blocks(movie):
+            if movie.tell() + data_size > end:
+                break
+
+            frames += n_frames
+            movie.seek(data_size, os.SEEK_CUR)
+
+        return frames
+
+def rollback_step(movie_file: str, echo_file: str):
+    """
+    Truncates the movie and echo file back to the last step recorded in the index, and the frame index of the movie
+    (see write_frame_index) back to the frames that are left. Rolling back costs the same no matter how long the run
+    has been going.
+
+    The record is kept (the files are at that step again, so a repeated step is appended after it) but marked as rolled
+    back to. A second rollback before another step is recorded raises a ValueError instead of going further back over
+    a step that had succeeded.
+
+    :param movie_file: movie pdb that the titration steps are appended to
+    :param echo_file: echo file of the run
+    :return: (movie size, echo size, frames) that the files were rolled back to
+    """
+    index_file = step_index_file(movie_file)
+    if not os.path.isfile(index_file):
+        logger.error(f"No steps recorded for {movie_file}")
+        raise ValueError(index_file)
+
+    with open(index_file, 'r+b') as index:
+        last = _last_step(index)
+        if last is None:
+            logger.error(f"No steps recorded for {movie_file}")
+            raise ValueError(index_file)
+
+        record_offset, movie_size, echo_size, frames, rolled_back = last
+        if rolled_back:
+            logger.error(f"{movie_file} was already rolled back to its last recorded step, cannot go back further")
+            raise ValueError(index_file)
+
+        if movie_size > os.path.getsize(movie_file) or echo_size > os.path.getsize(echo_file):
+            logger.error(f"{movie_file} or {echo_file} is shorter than the recorded step, cannot roll back")
+            raise ValueError(index_file)
+
+        os.truncate(movie_file, movie_size)
+        os.truncate(echo_file, echo_size)
+        index.seek(record_offset)
+        index.write(STEP_RECORD.format(movie_size, echo_size, frames, 1).encode())
+
+    _truncate_frame_index(movie_file, frames)
+
+    logger.debug(f"Rolled {movie_file} back to {frames} frames")
+    return movie_size, echo_size, frames
+
+def is_compressed_movie(movie_file: str):
+    """Whether movie_file is a compressed movie rather than a pdb"""
+    with open(movie_file, 'rb') as movie:
+        return movie.read(len(COMPRESSED_MAGIC)) == COMPRESSED_MAGIC
+
+def write_compressed_movie(movie_file: str, output_file: str, append: bool = False):
+    """
+    Writes the frames of a movie pdb as a compressed movie. The topology is taken from the first frame and written
+    once, the coordinates are stored in fixed-point, delta encoded between frames and deflated.
+
+    :param movie_file: movie pdb to compress
+    :param output_file: compressed movie to write
+    :param append: add the frames onto the end of output_file if it already holds a compressed movie (the number of
+    atoms has to match)
+    :return: number of frames written
+    """
+    append = append and os.path.isfile(output_file) and os.path.getsize(output_file) > 0
+    n_atoms = None
+    if append:
+        n_atoms = len(read_compressed_topology(output_file)["id"])
+
+    n_frames = 0
+    with open(output_file, 'ab' if append else 'wb') as output:
+        block = []
+        for frame_number, data in iter_frame_data(movie_file):
+            if n_atoms is None:
+                columns = pdbio.read_pdb_columns(data)
+                topology = json.dumps({key: columns[key].tolist() for key in TOPOLOGY_KEYS}).encode()
+                output.write(COMPRESSED_HEADER.pack(COMPRESSED_MAGIC, COMPRESSED_VERSION, len(topology)))
+                output.write(topology)
+                n_atoms = len(columns["id"])
+                coords = columns["coords"]
+
+            else:
+                coords = pdbio.read_pdb_coords(data)
+
+            if len(coords) != n_atoms:
+                logger.error(f"Frame {frame_number} of {movie_file} has {len(coords)} atoms instead of {n_atoms}")
+                raise ValueError(movie_file)
+
+            block.append(coords)
+            if len(block) == FRAMES_PER_BLOCK:
+                output.write(_encode_block(block))
+                n_frames += len(block)
+                block = []
+
+        if block:
+            output.write(_encode_block(block))
+            n_frames += len(block)
+
+    logger.debug(f"Compressed {n_frames} frames of {movie_file} into {output_file}")
+    return n_frames
+
+def _encode_block(frames):
+    fixed = np.rint(np.asarray(frames) * FIXED_POINT_SCALE).astype(np.int32)
+    deltas = np.diff(fixed, axis=0, prepend=np.zeros((1,) + fixed.shape[1:], dtype=np.int32))
+    data = zlib.compress(deltas.tobytes())
+    return COMPRESSED_BLOCK_HEADER.pack(COMPRESSED_BLOCK, fixed.shape[0], fixed.shape[1], len(data)) + data
+
+def _decode_block(n_frames: int, n_atoms: int, data: bytes):
+    deltas = np.frombuffer(zlib.decompress(data), dtype=np.int32).reshape(n_frames, n_atoms, 3)
+    return np.cumsum(deltas, axis=0, dtype=np.int64) / FIXED_POINT_SCALE
+
+def _read_compressed_header(movie):
+    """Reads the header of an open compressed movie, leaving the file at the first block"""
+    magic, version, topology_size = COMPRESSED_HEADER.unpack(movie.read(COMPRESSED_HEADER.size))
+    if magic != COMPRESSED_MAGIC or version != COMPRESSED_VERSION:
+        logger.error(f"{movie.name} is not a compressed movie this version can read")
+        raise ValueError(movie.name)
+
+    topology = json.loads(movie.read(topology_size))
+    return {key: np.array(topology[key], dtype=TOPOLOGY_DTYPES[key]) for key in TOPOLOGY_KEYS}
+
+def _compressed_blocks(movie):
+    """Yields (frames, atoms, compressed length) of each block, the file is left at the start of the block's data"""
+    while True:
+        header = movie.read(COMPRESSED_BLOCK_HEADER.size)
+        if len(header) < COMPRESSED_BLOCK_HEADER.size:
+            return
+
+        marker, n_frames, n_atoms, data_size = COMPRESSED_BLOCK_HEADER.unpack(header)
+        if marker != COMPRESSED_BLOCK:
+            logger.error(f"Corrupt block in {movie.name}")
+            raise ValueError(movie.name)
+
+        yield n_frames, n_atoms, data_size
+
+def read_compressed_topology(movie_file: str):
+    """
+    :param movie_file: compressed movie
+    :return: dictionary of the number, id, resname, chain, resnum and element arrays
+    """
+    with open(movie_file, 'rb') as movie:
+        return _read_compressed_header(movie)
+
+def iter_compressed_coords(movie_file: str, start: int = 0, stop: int = None, stride: int = 1):
+    """
+    Generator over the coordinates of a compressed movie, blocks without any selected frame are skipped over without
+    being decompressed
+
+    :param movie_file: compressed movie
+    :param start: index of the first frame to yield
+    :param stop: index of the frame to stop at (not yielded), None for the end of the movie
+    :param stride: yield every stride-th frame starting from start
+    :return: (frame number, (N, 3) coordinates) for each selected frame
+    """
+    if start < 0 or stride < 1:
+        logger.error(f"Invalid frame selection start: {start} stride: {stride}")
+        raise ValueError("frame selection")
+
+    with open(movie_file, 'rb') as movie:
+        _read_compressed_header(movie)
+        first = 0
+        for n_frames, n_atoms, data_size in _compressed_blocks(movie):
+            if stop is not None and first >= stop:
+                return
+
+            end = first + n_frames if stop is None else min(first + n_frames, stop)
+            # First selected frame at or after the start of this block
+            index = max(start, first)
+            index += (start - index) % stride
+            if index >= end:
+                movie.seek(data_size, os.SEEK_CUR)
+
+            else:
+                frames = _decode_block(n_frames, n_atoms, movie.read(data_size))
+                for frame_number in range(index, end, stride):
+                    yield frame_number, frames[frame_number - first]
+
+            first += n_frames
+
+def iter_compressed_movie(movie_file: str, start: int = 0, stop: int = None, stride: int = 1):
+    """Same as iter_compressed_coords but yields a Protein for each selected frame"""
+    topology = read_compressed_topology(movie_file)
+    for frame_number, coords in iter_compressed_coords(movie_file, start, stop, stride):
+        yield pdbio.columns_to_protein(f"{movie_file.split('.')[0]}_{frame_number:0>4d}", dict(topology, coords=coords))
+
+def compressed_last_frame(movie_file: str):
+    """
+    Reads the last frame of a compressed movie, only the last block is decompressed
+
+    :param movie_file: compressed movie
+    :return: Protein of the last frame
+    """
+    with open(movie_file, 'rb') as movie:
+        topology = _read_compressed_header(movie)
+        last = None
+        for n_frames, n_atoms, data_size in _compressed_blocks(movie):
+            last = (n_frames, n_atoms, movie.tell(), data_size)
+            movie.seek(data_size, os.SEEK_CUR)
+
+        if last is None:
+            logger.error(f"No frames found in {movie_file}")
+            raise ValueError(movie_file)
+
+        n_frames, n_atoms, offset, data_size = last
+        movie.seek(offset)
+        coords = _decode_block(n_frames, n_atoms, movie.read(data_size))[-1]
+
+    return pdbio.columns_to_protein(f"{movie_file.split('.')[0]}_last", dict(topology, coords=coords))
+
+def trajectory_cache_files(movie_file: str):
+    """
+    :param movie_file: name of the movie pdb
+    :return: (topology file, coordinate file) that cache the movie
+    """
+    return f"{movie_file}.top.npz", f"{movie_file}.coords.npy"
+
+def _source_stamp(movie_file: str):
+    stat = os.stat(movie_file)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+def trajectory_cache_is_fresh(movie_file: str):
+    """
+    Whether both cache files exist and were written from the movie as it is now: the size and modification time of the
+    movie are stored with the cache and have to match exactly. Comparing the time of the cache against the movie is not
+    enough on file systems with coarse timestamps, where frames appended in the same tick as the cache was written
+    would go unnoticed.
+    """
+    if not os.path.isfile(movie_file):
+        return False
+
+    topology_file, coords_file = trajectory_cache_files(movie_file)
+    if not os.path.isfile(topology_file) or not os.path.isfile(coords_file):
+        return False
+
+    try:
+        with np.load(topology_file) as top:
+            if "source" not in top.files:
+                return False
+
+            return np.array_equal(top["source"], _source_stamp(movie_file))
+
+    except (ValueError, OSError):
+        return False
+
+def write_trajectory_cache(movie_file: str):
+    """
+    Converts a movie pdb into its binary cache in a single pass over the text. The topology (names, residues, chains
+    and elements) is taken from the first frame and stored once, the coordinates of every frame are stored as a float32
+    (frames, atoms, 3) .npy array. Both files are written under temporary names and moved into place at the end so that
+    a half written cache is never picked up.
+
+    :param movie_file: name of the movie pdb
+    :return: Trajectory over the new cache
+    """
+    topology_file, coords_file = trajectory_cache_files(movie_file)
+    raw_file = f"{coords_file}.raw.tmp"
+
+    logger.debug(f"Writing the trajectory cache for {movie_file}")
+    # Taken before reading, so frames appended while the cache is written leave it stale
+    source = _source_stamp(movie_file)
+    topology = None
+    n_frames = 0
+    try:
+        with open(raw_file, 'wb') as raw:
+            for frame_number, data in iter_frame_data(movie_file):
+                if topology is None:
+                    columns = pdbio.read_pdb_columns(data)
+                    topology = {key: columns[key] for key in TOPOLOGY_KEYS}
+                    coords = columns["coords"]
+
+                else:
+                    coords = pdbio.read_pdb_coords(data)
+
+                if len(coords) != len(topology["id"]):
+                    logger.error(f"Frame {frame_number} of {movie_file} has {len(coords)} atoms instead of {len(topology['id'])}")
+                    raise ValueError(movie_file)
+
+                raw.write(coords.astype(np.float32).tobytes())
+                n_frames += 1
+
+        if topology is None:
+            logger.error(f"No frames found in {movie_file}")
+            raise ValueError(movie_file)
+
+        # Now that the number of frames is known the .npy header can go in front of the coordinates
+        with open(f"{coords_file}.tmp", 'wb') as npy, open(raw_file, 'rb') as raw:
+            np.lib.format.write_array_header_1_0(npy, {
+                "descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                "fortran_order": False,
+                "shape": (n_frames, len(topology["id"]), 3)
+            })
+            shutil.copyfileobj(raw, npy)
+
+        with open(f"{topology_file}.tmp", 'wb') as top:
+            np.savez(top, source=source, **topology)
+
+    finally:
+        if os.path.isfile(raw_file):
+            os.remove(raw_file)
+
+    os.replace(f"{topology_file}.tmp", topology_file)
+    os.replace(f"{coords_file}.tmp", coords_file)
+    logger.debug(f"Cached {n_frames} frames of {movie_file}")
+
+    return Trajectory(movie_file, topology, np.load(coords_file, mmap_mode='r'))
+
+def load_trajectory(movie_file: str, create: bool = True):
+    """
+    Opens the binary cache of a movie pdb, the coordinates are memory mapped so any frame can be reached without
+    reading the rest of the file.
+
+    :param movie_file: name of the movie pdb
+    :param create: whether to (re)write the cache when it is missing or older than the movie
+    :return: Trajectory, or None if there is no up to date cache and create is False
+    """
+    if not trajectory_cache_is_fresh(movie_file):
+        if not create:
+            return None
+
+        return write_trajectory_cache(movie_file)
+
+    topology_file, coords_file = trajectory_cache_files(movie_file)
+    with np.load(topology_file) as top:
+        topology = {key: top[key] for key in TOPOLOGY_KEYS}
+
+    return Trajectory(movie_file, topology, np.load(coords_file, mmap_mode='r'))
+
+class Trajectory:
+    """
+    Topology plus memory mapped (frames, atoms, 3) coordinates of a movie. Indexing returns the coordinates of a frame
+    as a view into the map, frame() builds a full Protein.
+    """
+
+    __slots__ = ['movie_file', 'topology', 'coords']
+
+    def __init__(self, movie_file: str, topology: dict, coords: np.ndarray):
+        self.movie_file = movie_file
+        self.topology = topology
+        self.coords = coords
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __getitem__(self, index):
+        return self.coords[index]
+
+    def frame_coords(self, index: int):
+        """Coordinates of a frame as float64, rounded back to the precision of the pdb they came from"""
+        return np.round(self.coords[index].astype(float), PDB_COORD_DECIMALS)
+
+    def frame(self, index: int, name: str = None):
+        if index < 0:
+            index += len(self)
+
+        if name is None:
+            name = f"{self.movie_file.split('.')[0]}_{index:0>4d}"
+
+        return pdbio.columns_to_protein(name, dict(self.topology, coords=self.frame_coords(index)))
+
+    def frames(self, start: int = 0, stop: int = None, stride: int = 1):
+        for index in range(len(self))[start:stop:stride]:
+            yield self.frame(index)
+
+def frame_index_file(movie_file: str):
+    """
+    :param movie_file: movie pdb or compressed movie
+    :return: name of the frame index of the movie
+    """
+    return f"{movie_file}.frames"
+
+def _scan_frame_offsets(movie_file: str, start: int = 0):
+    """
+    Byte offsets at which the frames of a movie pdb begin, counted the same way as iter_frame_data
+
+    :param start: offset to start scanning from, the end of a frame
+    :return: (offsets, offset just after the last complete frame)
+    """
+    offsets = []
+    position = frame_start = start
+    has_atoms = False
+    with open(movie_file, 'rb') as mf:
+        mf.seek(start)
+        for line in mf:
+            if line[0:4] == b"ATOM" or line[0:6] == b"HETATM":
+                has_atoms = True
+
+            elif b"ENDMDL" in line:
+                if has_atoms:
+                    offsets.append(frame_start)
+
+                frame_start = position + len(line)
+                has_atoms = False
+
+            position += len(line)
+
+    return offsets, frame_start
+
+def _compressed_frame_offsets(movie_file: str):
+    """Offset of the block every frame of a compressed movie is stored in"""
+    offsets = []
+    with open(movie_file, 'rb') as movie:
+        _read_compressed_header(movie)
+        for n_frames, n_atoms, data_size in _compressed_blocks(movie):
+            offsets.extend([movie.tell() - COMPRESSED_BLOCK_HEADER.size] * n_frames)
+            movie.seek(data_size, os.SEEK_CUR)
+
+    return offsets, os.path.getsize(movie_file)
+
+def write_frame_index(movie_file: str, echo_file: str = None, update: bool = True):
+    """
+    Writes (or brings up to date) the frame index of a movie. Only the part of a movie pdb past the end of an existing
+    index is scanned, so indexing a movie as it grows costs as much as the frames that were added.
+
+    The time of every frame is taken from the echo file of the run, which piDMD writes at the same interval as the
+    movie: the last rows of the echo are matched with the last frames. Without an echo file (or with one that has fewer
+    rows than there are frames) the time of a frame is its number.
+
+    :param movie_file: movie pdb or compressed movie
+    :param echo_file: echo file of the run that wrote the movie
+    :param update: extend an existing index, only valid when frames were appended to the movie since (see append_frames)
+    :return: (offsets, times) of every frame
+    """
+    compressed = is_compressed_movie(movie_file)
+    size = os.path.getsize(movie_file)
+    index = _read_frame_index_records(movie_file) if update and not compressed else None
+    if index is not None and index[0] <= size and _ends_frame(movie_file, index[1]):
+        # Only what comes after the end of the last indexed frame is scanned
+        new_offsets, scanned = _scan_frame_offsets(movie_file, index[1])
+        offsets = np.concatenate((index[2]["offset"], np.array(new_offsets, dtype=np.int64)))
+
+    else:
+        new_offsets, scanned = _compressed_frame_offsets(movie_file) if compressed else _scan_frame_offsets(movie_file)
+        offsets = np.array(new_offsets, dtype=np.int64)
+
+    times = np.arange(len(offsets), dtype=float)
+    if echo_file is not None:
+        echo_times = EchoData(echo_file).column("time")
+        if len(echo_times) >= len(offsets):
+            times = echo_times[len(echo_times) - len(offsets):].astype(float)
+
+        else:
+            logger.warning(f"{echo_file} has {len(echo_times)} rows for {len(offsets)} frames, using frame numbers as times")
+
+    records = np.empty(len(offsets), dtype=FRAME_INDEX_DTYPE)
+    records["offset"] = offsets
+    records["time"] = times
+
+    index_file = frame_index_file(movie_file)
+    with open(f"{index_file}.tmp", 'wb') as out:
+        out.write(FRAME_INDEX_HEADER.pack(FRAME_INDEX_MAGIC, size, scanned))
+        out.write(records.tobytes())
+
+    os.replace(f"{index_file}.tmp", index_file)
+    logger.debug(f"Indexed {len(records)} frames of {movie_file}")
+    return records["offset"], records["time"]
+
+def _truncate_frame_index(movie_file: str, frames: int):
+    """
+    Cuts the frame index of a movie that was truncated back to its first frames, the index is removed if it does not
+    cover them
+    """
+    index = _read_frame_index_records(movie_file)
+    if index is None:
+        return
+
+    index_file = frame_index_file(movie_file)
+    size = os.path.getsize(movie_file)
+    records = index[2]
+    if len(records) < frames or (frames and records["offset"][frames - 1] >= size):
+        logger.debug(f"{index_file} does not cover the first {frames} frames of {movie_file}, removing it")
+        os.remove(index_file)
+        return
+
+    with open(f"{index_file}.tmp", 'wb') as out:
+        out.write(FRAME_INDEX_HEADER.pack(FRAME_INDEX_MAGIC, size, size))
+        out.write(records[:frames].tobytes())
+
+    os.replace(f"{index_file}.tmp", index_file)
+
+def _ends_frame(movie_file: str, offset: int):
+    """Whether an ENDMDL line ends right at offset, as it does at the end of the last indexed frame"""
+    if not offset:
+        return True
+
+    with open(movie_file, 'rb') as mf:
+        mf.seek(max(0, offset - 80))
+        return mf.read(offset - max(0, offset - 80)).rstrip(b'\r\n').split(b'\n')[-1].find(b"ENDMDL") != -1
+
+def _read_frame_index_records(movie_file: str):
+    """(size of the movie indexed, end of its last frame, records) of a frame index, None if there is no readable index"""
+    index_file = frame_index_file(movie_file)
+    if not os.path.isfile(index_file):
+        return None
+
+    with open(index_file, 'rb') as index:
+        header = index.read(FRAME_INDEX_HEADER.size)
+        if len(header) < FRAME_INDEX_HEADER.size:
+            return None
+
+        magic, size, scanned = FRAME_INDEX_HEADER.unpack(header)
+        data = index.read()
+
+    if magic != FRAME_INDEX_MAGIC or len(data) % FRAME_INDEX_DTYPE.itemsize:
+        logger.warning(f"{index_file} is not a frame index")
+        return None
+
+    return size, scanned, np.frombuffer(data, dtype=FRAME_INDEX_DTYPE)
+
+def read_frame_index(movie_file: str):
+    """
+    :param movie_file: movie pdb or compressed movie
+    :return: (offsets, times) of every frame, None if the movie has no index or has changed since it was indexed
+    """
+    index = _read_frame_index_records(movie_file)
+    if index is None or index[0] != os.path.getsize(movie_file):
+        return None
+
+    return index[2]["offset"], index[2]["time"]
+
+def time_window(times, time_range: tuple, start: int = 0, stop: int = None):
+    """
+    Narrows a frame selection down to the frames within a time range
+
+    :param times: time of every frame, in increasing order
+    :param time_range: (first time, last time) both included, either can be None to leave that side open
+    :param start: index of the first frame that may be selected
+    :param stop: index of the frame to stop at, None for the end of the movie
+    :return: (start, stop) frame indices
+    """
+    low, high = time_range
+    first = 0 if low is None else int(np.searchsorted(times, low, side='left'))
+    last = len(times) if high is None else int(np.searchsorted(times, high, side='right'))
+    start = max(start, first)
+    stop = last if stop is None else min(stop, last)
+    return start, max(start, stop)
+
+def iter_indexed_frame_data(movie_file: str, offsets, start: int = 0, stop: int = None, stride: int = 1):
+    """
+    Same as iter_frame_data but seeks straight to every selected frame of a movie pdb using its frame index, only the
+    bytes of the selected frames are read
+
+    :param movie_file: name of the movie pdb
+    :param offsets: offset of every frame, from read_frame_index
+    :return: (frame number, raw ATOM/HETATM records of the frame) for each selected frame
+    """
+    if start < 0 or stride < 1:
+        logger.error(f"Invalid frame selection start: {start} stride: {stride}")
+        raise ValueError("frame selection")
+
+    with open(movie_file, 'rb') as mf:
+        for frame_number in range(len(offsets))[start:stop:stride]:
+            mf.seek(offsets[frame_number])
+            if frame_number + 1 < len(offsets):
+                data = mf.read(offsets[frame_number + 1] - offsets[frame_number])
+
+            else:
+                # The last frame ends at the next ENDMDL, whatever follows it is not part of any frame
+                data = b''
+                while b"ENDMDL" not in data:
+                    block = mf.read(1 << 16)
+                    if not block:
+                        break
+
+                    data += block
+
+            data = data.split(b"ENDMDL", 1)[0]
+            lines = [line for line in data.split(b'\n') if line[0:4] == b"ATOM" or line[0:6] == b"HETATM"]
+            yield frame_number, b'\n'.join(lines) + b'\n'
@@ -11,19 +11,21 @@ import pkg_resources
 import logging
 import shutil
 import random
+from concurrent.futures import ProcessPoolExecutor
 from logging.config import dictConfig
 from subprocess import Popen, PIPE
 import subprocess
 from random import shuffle
 
 #PHD3 Imports
-from ..protein import atom, chain, residue, protein
+from ..protein import atom, chain, residue, protein, selection
 
-from . import constants
+from . import constants, pdbio, trajectory
 from .exceptions import ParameterError
 
 __all__=[
     'load_pdb',
+    'load_pdbs',
     'make_mol2',
     'make_start_file',
     'make_state_file',
@@ -31,6 +33,8 @@ __all__=[
     'setup_dmd_environ',
     'valid_qm_parameters',
     'load_movie',
+    'iter_movie',
+    'last_frame',
     'setup_turbomole_env',
     'valid_dmd_parameters',
     'create_config',
@@ -397,7 +401,11 @@ def valid_dmd_parameters(parameters: dict):
         for state in parameters["Custom protonation states"]:
             try:
                 assert(type(state[0]) == str)
-                if ":" in state[0]:
+                if type(state[1]) == str:
+                    # "chain:resnum" or a selection expression
+                    if not selection.is_label(state[0]):
+                        selection.Selection(state[0])
+
                     assert(len(state) == 2 or len(state) == 3)
                     assert(type(state[1]) == str)
                     if len(state) == 3:
@@ -436,6 +444,9 @@ def valid_dmd_parameters(parameters: dict):
                         assert(type(residue[0]) == str and residue[0].isalpha())
                         assert(type(residue[1]) == int and residue[1] > 0)
 
+                    elif type(residue) == str and not selection.is_label(residue):
+                        selection.Selection(residue)
+
                     elif type(residue) == str:
                         tmp = residue.split(":")
                         assert(len(tmp) == 2)
@@ -459,6 +470,9 @@ def valid_dmd_parameters(parameters: dict):
                         assert(type(atom[1]) is int and atom[1] > 0)
                         assert(type(atom[2]) is str)
 
+                    elif type(atom) == str and not selection.is_label(atom):
+                        selection.Selection(atom)
+
                     elif type(atom) == str:
                         tmp = atom.split(":")
                         assert(len(tmp) == 3)
@@ -480,6 +494,9 @@ def valid_dmd_parameters(parameters: dict):
                     assert(type(id[0][1]) is int and id[0][1] > 0)
                     assert(type(id[0][2]) is str)
 
+                elif type(id[0]) == str and not selection.is_label(id[0]):
+                    selection.Selection(id[0])
+
                 elif type(id[0]) == str:
                     tmp = id[0].split(":")
                     assert(len(tmp) == 3)
@@ -495,6 +512,9 @@ def valid_dmd_parameters(parameters: dict):
                     assert (type(id[1][1]) is int and id[1][1] > 0)
                     assert (type(id[1][2]) is str)
 
+                elif type(id[1]) is str and not selection.is_label(id[1]):
+                    selection.Selection(id[1])
+
                 elif type(id[1]) is str:
                     tmp = id[1].split(":")
                     assert(len(tmp) == 3)
@@ -506,6 +526,13 @@ def valid_dmd_parameters(parameters: dict):
             except ValueError:
                 raise ParameterError(f"Invalid definition of Restrict Displacement: {id}")
 
+    if "Compress Movie" in parameters.keys():
+        try:
+            assert(type(parameters["Compress Movie"]) == bool)
+
+        except ValueError:
+            raise ParameterError("Compress Movie MUST be a bool")
+
     if "Commands" not in parameters.keys():
         raise ValueError("Missing commands definition")
 
@@ -521,27 +548,10 @@ def valid_dmd_parameters(parameters: dict):
 def load_pdb(file: str):
     logger.debug(f"Finding file: {file}")
 
-    chains = []
-
-    resNum = 0
-    chainLet = ""
-    lineNumber = 1
     try:
-        with open(file, 'r') as pdb:
-            for line in pdb:
-                if "ATOM" == line[0:4] or "HETATM" == line[0:6]:
-                    tmpAtom = atom.Atom(line)
-                    if chainLet != line[21:22]:
-                        chainLet = line[21:22]
-                        chains.append(chain.Chain(chainLet))
-                        resNum = 0
-
-                    if resNum != int(line[22:26]):
-                        resNum = int(line[22:26])
-                        chains[-1].add_residue(residue.Residue(line))
-
-                    chains[-1].residues[-1].add_atom(tmpAtom)
-                lineNumber += 1
+        with open(file, 'rb') as pdb:
+            columns = pdbio.read_pdb_columns(pdb.read())
+
     except IOError:
         logger.exception(f"Error opening {file}")
         raise
@@ -550,7 +560,55 @@ def load_pdb(file: str):
         raise
 
     logger.debug("Successfully loaded in the file!")
-    return protein.Protein(file, chains)
+    return pdbio.columns_to_protein(file, columns)
+
+def load_pdbs(files: list, workers: int = None):
+    """
+    Parses many pdbs at once across a pool of processes. Only the columns of each pdb (see pdbio.read_pdb_columns) are
+    sent back from the workers, these are compact to pickle and can be turned into a Protein with
+    pdbio.columns_to_protein when needed. A file that cannot be read does not stop the rest of the batch.
+
+    :param files: pdb files to load
+    :param workers: number of processes to use, defaults to the number of cores
+    :return: (list of column dictionaries in the same order as files with None for the files that failed,
+    dictionary of file -> error message for the files that failed)
+    """
+    files = list(files)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers < 1:
+        logger.error(f"Invalid number of workers: {workers}")
+        raise ValueError("workers")
+
+    workers = min(workers, len(files))
+    logger.debug(f"Loading {len(files)} pdbs with {workers} workers")
+    if workers <= 1:
+        results = [_read_pdb_columns(file) for file in files]
+
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_read_pdb_columns, files, chunksize=max(1, len(files) // (workers * 4))))
+
+    structures = []
+    errors = {}
+    for file, (columns, error) in zip(files, results):
+        if error is not None:
+            logger.warning(f"Could not load {file}: {error}")
+            errors[file] = error
+
+        structures.append(columns)
+
+    return structures, errors
+
+def _read_pdb_columns(file: str):
+    """Worker for load_pdbs, errors are returned rather than raised so that one bad file does not end the pool"""
+    try:
+        with open(file, 'rb') as pdb:
+            return pdbio.read_pdb_columns(pdb.read()), None
+
+    except (IOError, ValueError) as error:
+        return None, f"{type(error).__name__}: {error}"
 
 
 def make_mol2(res: residue, reformat: bool=True):
@@ -730,12 +788,16 @@ def make_state_file(parameters: dict, pdbName):
 
     logger.debug("Made the state file!")
 
-def make_movie(initial_pdb, movie_file, output_pdb):
+def make_movie(initial_pdb, movie_file, output_pdb, cache: bool = True, compress: bool = False, echo_file: str = None):
     """
 
     :param initial_pdb: name of the initial pdb for the dmd run
     :param movie_file: name of the movie file created from dmd
     :param output_pdb: name of the output pdb that is generated from the movie file
+    :param cache: whether to also write the binary trajectory cache and the frame index of output_pdb
+    :param compress: whether to write output_pdb as a compressed movie (see trajectory.write_compressed_movie) instead
+    of a pdb, the cache is then not needed
+    :param echo_file: echo file of the run, gives the frame index the simulation time of every frame
     :return:
     """
     try:
@@ -753,62 +815,153 @@ def make_movie(initial_pdb, movie_file, output_pdb):
     if not os.path.isfile(output_pdb):
         raise FileNotFoundError(output_pdb)
 
-def load_movie(movie_file:str):
+    if compress:
+        trajectory.write_compressed_movie(output_pdb, f"{output_pdb}.tmp")
+        os.replace(f"{output_pdb}.tmp", output_pdb)
+
+    elif cache:
+        try:
+            trajectory.write_trajectory_cache(output_pdb)
+
+        except (ValueError, OSError):
+            logger.warning(f"Could not write the trajectory cache for {output_pdb}")
+
+    if cache:
+        try:
+            trajectory.write_frame_index(output_pdb, echo_file, update=False)
+
+        except (ValueError, OSError):
+            logger.warning(f"Could not write the frame index for {output_pdb}")
+
+def iter_movie(movie_file: str, start: int = 0, stop: int = None, stride: int = 1, time_range: tuple = None):
+    """
+    Generator over the frames of a movie pdb, only one frame is ever held in memory. Frames that are not selected are
+    skipped over without being parsed. An up to date trajectory cache is used in place of the text when there is one,
+    otherwise an up to date frame index lets the selected frames be read without going through the rest of the file.
+
+    :param movie_file: name of the movie pdb (ENDMDL separates the frames) or of a compressed movie
+    :param start: index of the first frame to yield
+    :param stop: index of the frame to stop at (not yielded), None for the end of the movie
+    :param stride: yield every stride-th frame starting from start
+    :param time_range: (first time, last time) of the frames to yield, needs a frame index (see make_movie)
+    :return: Protein for each selected frame
+    """
     if not os.path.isfile(movie_file):
         logger.error(f"File does not exist: {movie_file}")
         raise ValueError(movie_file)
 
-    #ENDMDL is what seperates the proteins in the movie file
-    proteins = []
-    try:
-        with open(movie_file, 'r') as mf:
-            chains = []
-            resNum = 0
-            chainLet = ""
+    index = trajectory.read_frame_index(movie_file)
+    if time_range is not None:
+        start, stop = _time_window(movie_file, index, time_range, start, stop)
 
-            protein_number = 0
+    if trajectory.is_compressed_movie(movie_file):
+        yield from trajectory.iter_compressed_movie(movie_file, start, stop, stride)
+        return
 
-            for line in mf:
-                try:
-                    if "ATOM" == line[0:4] or "HETATM" == line[0:6]:
-                        tmpAtom = atom.Atom(line)
-                        if chainLet != line[21:22]:
-                            chainLet = line[21:22]
-                            chains.append(chain.Chain(chainLet))
-                            resNum = 0
-
-                        if resNum != int(line[22:26]):
-                            resNum = int(line[22:26])
-                            chains[-1].add_residue(residue.Residue(line))
-               
-                        chains[-1].residues[-1].add_atom(tmpAtom)
-
-                    elif "ENDMDL" in line:
-                        if chains:
-                            proteins.append(protein.Protein(f"{movie_file.split('.')[0]}_{protein_number:0>4d}", chains.copy()))   
+    traj = trajectory.load_trajectory(movie_file, create=False)
+    if traj is not None:
+        logger.debug(f"Reading frames of {movie_file} from the trajectory cache")
+        yield from traj.frames(start, stop, stride)
+        return
 
-                        else:
-                            logger.warn("Empty chain while loading in movie")
-                            protein_number -= 1
+    if index is not None:
+        logger.debug(f"Reading frames of {movie_file} through its frame index")
+        frames = trajectory.iter_indexed_frame_data(movie_file, index[0], start, stop, stride)
 
-                        chains = []
-                        resNum = 0
-                        chainLet = ""
-                        protein_number += 1
+    else:
+        frames = trajectory.iter_frame_data(movie_file, start, stop, stride)
 
-                except ValueError:
-                    logger.exception(f"Error reading in model {protein_number} in {movie_file}")
-                    raise
+    try:
+        for protein_number, data in frames:
+            try:
+                yield _frame_to_protein(f"{movie_file.split('.')[0]}_{protein_number:0>4d}", data)
+
+            except ValueError:
+                logger.exception(f"Error reading in model {protein_number} in {movie_file}")
+                raise
 
     except IOError:
-        logger.exception(f"Error opening {file}")
+        logger.exception(f"Error opening {movie_file}")
         raise
 
+def load_movie(movie_file: str, start: int = 0, stop: int = None, stride: int = 1, cache: bool = True, time_range: tuple = None):
+    """
+    Loads the frames of a movie pdb. With cache on, the movie is converted to (or read from) its binary trajectory
+    cache so that the text only ever has to be parsed once, whether or not the movie also has a frame index.
+
+    :param movie_file: name of the movie pdb or of a compressed movie
+    :param start: index of the first frame to load
+    :param stop: index of the frame to stop at (not loaded), None for the end of the movie
+    :param stride: load every stride-th frame starting from start
+    :param cache: whether to write and reuse the binary trajectory cache
+    :param time_range: (first time, last time) of the frames to load, both included and either can be None. Needs a
+    frame index (see make_movie and trajectory.write_frame_index), start, stop and stride then apply within the range.
+    :return: list of Proteins
+    """
+    if not os.path.isfile(movie_file):
+        logger.error(f"File does not exist: {movie_file}")
+        raise ValueError(movie_file)
+
+    index = trajectory.read_frame_index(movie_file)
+    if time_range is not None:
+        start, stop = _time_window(movie_file, index, time_range, start, stop)
+
+    if cache and not trajectory.is_compressed_movie(movie_file):
+        try:
+            proteins = list(trajectory.load_trajectory(movie_file).frames(start, stop, stride))
+            logger.debug("Successfully loaded in the file!")
+            return proteins
+
+        except (ValueError, OSError):
+            logger.warning(f"Could not use the trajectory cache for {movie_file}, reading the text instead")
+
+    proteins = list(iter_movie(movie_file, start, stop, stride))
     logger.debug("Successfully loaded in the file!")
     return proteins
 
-def last_frame(movie_file):
-    return load_movie(movie_file)[-1]
+def _time_window(movie_file: str, index, time_range: tuple, start: int, stop: int):
+    """Frames of a movie within a time range, from its frame index"""
+    if index is None:
+        logger.error(f"{movie_file} has no up to date frame index, write one with trajectory.write_frame_index")
+        raise ValueError(movie_file)
+
+    return trajectory.time_window(index[1], time_range, start, stop)
+
+def last_frame(movie_file: str):
+    """
+    Reads only the final frame of a movie pdb, either from an up to date trajectory cache or by reading the text
+    backwards from the end of the file, so the cost does not depend on the length of the movie.
+
+    :param movie_file: name of the movie pdb or of a compressed movie
+    :return: Protein of the last frame
+    """
+    if not os.path.isfile(movie_file):
+        logger.error(f"File does not exist: {movie_file}")
+        raise ValueError(movie_file)
+
+    if trajectory.is_compressed_movie(movie_file):
+        return trajectory.compressed_last_frame(movie_file)
+
+    traj = trajectory.load_trajectory(movie_file, create=False)
+    if traj is not None:
+        return traj.frame(-1, f"{movie_file.split('.')[0]}_last")
+
+    try:
+        data = trajectory.last_frame_data(movie_file)
+
+    except IOError:
+        logger.exception(f"Error opening {movie_file}")
+        raise
+
+    try:
+        return _frame_to_protein(f"{movie_file.split('.')[0]}_last", data)
+
+    except ValueError:
+        logger.exception(f"Error reading in the last model in {movie_file}")
+        raise
+
+def _frame_to_protein(name: str, data: bytes):
+    return pdbio.columns_to_protein(name, pdbio.read_pdb_columns(data))
 
 def print_header():
     main_logger = logging.getLogger("phd3")
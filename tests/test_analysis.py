@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import os
+import numpy as np
+import pytest
+
+#PHD3 Imports
+from dmdpy.analysis import clustering, kabsch
+from dmdpy.utility import pdbio, utilities
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+def _rotation(rng):
+    q, r = np.linalg.qr(rng.normal(size=(3, 3)))
+    q *= np.sign(np.diag(r))
+    return q if np.linalg.det(q) > 0 else -q
+
+def _brute_rmsd(reference, frame):
+    # Kabsch one frame at a time, the reflection fixed through the determinant of the covariance
+    reference = reference - reference.mean(axis=0)
+    frame = frame - frame.mean(axis=0)
+    u, _, vt = np.linalg.svd(frame.T @ reference)
+    d = np.sign(np.linalg.det(u @ vt))
+    rotation = u @ np.diag([1, 1, d]) @ vt
+    return np.sqrt(((frame @ rotation - reference)**2).sum() / len(reference))
+
+@pytest.fixture
+def peptide():
+    return np.array(utilities.load_pdb(os.path.join(DATA, "peptide.pdb")).get_coords(), dtype=float)
+
+@pytest.fixture
+def states(peptide):
+    # Three well separated conformations, with 8 noisy, rotated and moved frames around each
+    rng = np.random.default_rng(11)
+    centers = [peptide + rng.normal(scale=1.5, size=peptide.shape) for _ in range(3)]
+    frames = [centers[k % 3] + rng.normal(scale=0.1, size=peptide.shape) for k in range(24)]
+    return np.stack([frame @ _rotation(rng) + rng.normal(size=3) for frame in frames])
+
+def test_rmsd_matches_brute_force(peptide, states):
+    expected = [_brute_rmsd(peptide, frame) for frame in states]
+    assert np.allclose(kabsch.rmsd(peptide, states), expected)
+
+    mask = np.arange(len(peptide)) % 3 == 0
+    assert np.allclose(kabsch.rmsd(peptide, states, mask), [_brute_rmsd(peptide[mask], frame[mask]) for frame in states])
+
+def test_superpose_recovers_a_rigid_motion(peptide):
+    rng = np.random.default_rng(5)
+    moved = peptide @ _rotation(rng) + [3.0, -2.0, 7.0]
+    assert kabsch.rmsd(peptide, moved) == pytest.approx(0.0, abs=1e-9)
+    assert np.allclose(kabsch.superpose(peptide, moved[None])[0], peptide)
+
+@pytest.mark.parametrize("workers, block", [(1, 5), (2, 7), (1, 64)])
+def test_pairwise_rmsd_matches_brute_force(states, workers, block):
+    expected = np.array([[_brute_rmsd(first, second) for second in states] for first in states])
+    np.fill_diagonal(expected, 0.0)
+    distances = clustering.pairwise_rmsd(states, workers=workers, block=block)
+    assert distances.shape == (len(states), len(states))
+    assert np.array_equal(distances, distances.T)
+    assert np.allclose(distances, expected, atol=1e-4)
+
+def _brute_gromos(distances, cutoff):
+    labels = np.full(len(distances), -1)
+    remaining = np.ones(len(distances), dtype=bool)
+    centers = []
+    while remaining.any():
+        neighbours = ((distances <= cutoff) & remaining[None] & remaining[:, None]).sum(axis=1)
+        center = int(np.argmax(np.where(remaining, neighbours, -1)))
+        members = remaining & (distances[center] <= cutoff)
+        labels[members] = len(centers)
+        centers.append(center)
+        remaining &= ~members
+
+    return labels, centers
+
+def test_gromos_matches_brute_force(states, tmp_path):
+    distances = clustering.pairwise_rmsd(states, workers=1, out=str(tmp_path / "rmsd.npy"))
+    for cutoff in (0.5, 2.0, 100.0):
+        labels, centers = _brute_gromos(np.asarray(distances, dtype=float), cutoff)
+        result = clustering.gromos(np.load(str(tmp_path / "rmsd.npy"), mmap_mode='r'), len(states), cutoff)
+        assert sorted(result.medoids) == sorted(centers)
+        for member, label in enumerate(labels.tolist()):
+            assert result.medoids[result.labels[member]] == centers[label]
+
+    condensed = np.asarray(distances)[np.triu_indices(len(states), 1)]
+    assert clustering.gromos(condensed, len(states), 0.5).labels.tolist() == clustering.gromos(distances, len(states), 0.5).labels.tolist()
+
+def test_k_medoids_finds_the_states(states):
+    distances = clustering.pairwise_rmsd(states, workers=1)
+    result = clustering.k_medoids(distances, len(states), 3, seed=0)
+    assert result.sizes.tolist() == [8, 8, 8]
+    for state in range(3):
+        assert len(set(result.labels[state::3].tolist())) == 1
+
+    for cluster in range(3):
+        members = result.members(cluster)
+        totals = distances[np.ix_(members, members)].sum(axis=1)
+        assert result.medoids[cluster] == members[np.argmin(totals)]
+
+def test_movie_pairwise_rmsd(states, tmp_path):
+    pro = utilities.load_pdb(os.path.join(DATA, "peptide.pdb"))
+    movie = str(tmp_path / "movie.pdb")
+    pdbio.write_pdb_models(movie, pdbio.pdb_template(pro.get_columns()), states)
+
+    distances, frame_numbers = clustering.movie_pairwise_rmsd(movie, "name CA", stride=2, workers=1)
+    mask = np.array([atom.id == "CA" for atom in pro.get_atoms()])
+    assert frame_numbers == list(range(0, len(states), 2))
+    assert np.allclose(distances, clustering.pairwise_rmsd(states[::2].round(3), mask, workers=1), atol=1e-4)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import os
+import numpy as np
+import pytest
+
+#PHD3 Imports
+from dmdpy.protein import bonding
+from dmdpy.utility import utilities
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+def _babel_bonds(mol2_file: str):
+    with open(mol2_file) as mol2:
+        section = mol2.read().split("@<TRIPOS>BOND")[1].split("@<TRIPOS>")[0]
+
+    bonds = set()
+    for line in section.splitlines():
+        if len(line.split()) >= 3:
+            first, second = int(line.split()[1]) - 1, int(line.split()[2]) - 1
+            bonds.add((min(first, second), max(first, second)))
+
+    return bonds
+
+def _zinc_bonds(pro):
+    atoms = pro.get_atoms()
+    zinc = next(k for k, a in enumerate(atoms) if a.element.lower() == "zn")
+    i, j = bonding.perceive_bonds(pro)
+    return sorted(atoms[b if a == zinc else a].label() for a, b in zip(i.tolist(), j.tolist()) if zinc in (a, b))
+
+@pytest.fixture
+def zinc_site():
+    return utilities.load_pdb(os.path.join(DATA, "zinc_site.pdb"))
+
+def test_zinc_site_matches_babel(zinc_site):
+    # zinc_site.mol2 was written by openbabel from zinc_site.pdb
+    i, j = bonding.perceive_bonds(zinc_site)
+    assert set(zip(i.tolist(), j.tolist())) == _babel_bonds(os.path.join(DATA, "zinc_site.mol2"))
+    assert _zinc_bonds(zinc_site) == ["A:18:NE2", "A:201:O", "A:202:O", "A:203:O"]
+
+def test_metal_not_bonded_to_ring_carbons(zinc_site):
+    # Pull the zinc over towards CD2, it comes within the covalent radius limit of the carbon but only NE2 is a donor
+    atoms = zinc_site.get_atoms()
+    coords = np.array(zinc_site.get_coords(), dtype=float)
+    zinc = next(k for k, a in enumerate(atoms) if a.element.lower() == "zn")
+    cd2 = next(k for k, a in enumerate(atoms) if a.label() == "A:18:CD2")
+    coords[zinc] += 0.35 * (coords[cd2] - coords[zinc])
+    zinc_site.set_coords(coords)
+
+    assert np.linalg.norm(coords[zinc] - coords[cd2]) < bonding.COVALENT_RADII["zn"] + bonding.COVALENT_RADII["c"] + bonding.BOND_TOLERANCE
+    assert "A:18:CD2" not in _zinc_bonds(zinc_site)
+    assert "A:18:NE2" in _zinc_bonds(zinc_site)
+
+def test_bond_graph_edits_match_a_bond_set(zinc_site):
+    atoms = zinc_site.get_atoms()
+    i, j = bonding.perceive_bonds(zinc_site)
+    graph = bonding.BondGraph(atoms, i, j)
+    bonds = set(zip(i.tolist(), j.tolist()))
+
+    rng = np.random.default_rng(7)
+    for step in range(300):
+        first, second = sorted(rng.choice(len(atoms), 2, replace=False).tolist())
+        edit = rng.integers(3)
+        if edit == 0:
+            graph.add_bond(second, first)
+            bonds.add((first, second))
+
+        elif edit == 1:
+            graph.remove_bond(first, second)
+            bonds.discard((first, second))
+
+        else:
+            graph.clear_atom(first)
+            bonds = {bond for bond in bonds if first not in bond}
+
+        assert (atoms[second] in atoms[first].bonds) == ((first, second) in bonds)
+        if step % 50 == 0:
+            assert set(zip(*(k.tolist() for k in graph.pairs()))) == bonds
+
+    assert set(zip(*(k.tolist() for k in graph.pairs()))) == bonds
+    assert sorted(b.label() for b in atoms[0].bonds) == sorted(atoms[b if a == 0 else a].label() for a, b in bonds if 0 in (a, b))
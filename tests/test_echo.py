@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import logging
+import types
+import pytest
+
+#PHD3 Imports
+from dmdpy.dmd_simulation import dmd_simulation
+from dmdpy.utility.echo import EchoData
+
+ROWS = """# time temperature pressure energy potential kinetic
+0.000 0.100 0.010 0.0 -10.0 5.0
+50.000 0.110 0.020 0.0 -11.0 6.0
+100.000 0.120 0.030 0.0 -12.0 7.0
+"""
+
+@pytest.fixture
+def echo_file(tmp_path):
+    path = tmp_path / "echo"
+    path.write_text(ROWS)
+    return str(path)
+
+def _simulation(echo_file, start_time):
+    return types.SimpleNamespace(_echo=None, _raw_parameters={"Echo File": echo_file}, _start_time=start_time)
+
+def test_summary(echo_file):
+    summary = EchoData(echo_file).summary(start_time=50)
+    assert summary["potential"]["mean"] == pytest.approx(-11.5)
+    assert summary["kinetic"]["max"] == pytest.approx(7.0)
+
+def test_stats_empty_window(echo_file):
+    with pytest.raises(ValueError):
+        EchoData(echo_file).stats("potential", start_time=500)
+
+def test_print_summary_empty_window(echo_file, caplog):
+    # ie. pdmd.linux exited before writing anything for the command
+    with caplog.at_level(logging.INFO):
+        dmd_simulation.print_summary(_simulation(echo_file, 500), 0, 10)
+
+    assert any(record.levelno == logging.WARNING for record in caplog.records)
+    assert not any("Ave. Pot. Energy" in record.getMessage() for record in caplog.records)
+
+def test_print_summary(echo_file, caplog):
+    with caplog.at_level(logging.INFO):
+        dmd_simulation.print_summary(_simulation(echo_file, 0), 100, 10)
+
+    assert any("-11.00000" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import csv
+import os
+import pkg_resources
+import pytest
+
+#PHD3 Imports
+from dmdpy.protein import labeling
+from dmdpy.utility import utilities
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+@pytest.fixture
+def table_rows():
+    with open(pkg_resources.resource_filename('dmdpy.resources', 'atom_label.csv')) as csvfile:
+        rows = list(csv.reader(csvfile))
+
+    return rows[0][1:], rows[1:]
+
+def _first_scheme(rows, names):
+    # The linear search relabel used to do: the first column that has every one of the names
+    for column in range(len(rows[0])):
+        if all(any(row[column] == name for row in rows) for name in names):
+            return column
+
+    return None
+
+def test_scheme_matches_linear_search(table_rows):
+    schemes, rows = table_rows
+    table = labeling.label_table()
+    assert table.schemes == schemes
+    for residue_name in ("HIS", "ALA", "CYS"):
+        residue_rows = [row[1:] for row in rows if row[0] == residue_name]
+        labels = table.residue_labels(residue_name)
+        for column in range(len(schemes)):
+            names = [row[column] for row in residue_rows if row[column]]
+            if not names:
+                continue
+
+            scheme = labels.scheme(names)
+            assert scheme == _first_scheme(residue_rows, names)
+            for name in names:
+                assert labels.target(scheme, name, table.scheme_index("DMD")) == next(row[table.scheme_index("DMD")] for row in residue_rows if row[scheme] == name)
+
+def test_terminus_rows(table_rows):
+    table = labeling.label_table()
+    labels = table.residue_labels("HIS", "NTERM")
+    assert labels.scheme(["N", "CA", "H1", "H2", "H3"]) == table.scheme_index("Standard")
+    assert table.residue_labels("HIS").scheme(["N", "CA", "H1"]) is None
+    assert table.residue_labels("HIS").missing(["N", "CA", "H1"]) == "H1"
+    assert table.residue_labels("XYZ") is None
+
+    with pytest.raises(ValueError):
+        table.scheme_index("not a scheme")
+
+def test_relabel_round_trip():
+    pro = utilities.load_pdb(os.path.join(DATA, "peptide.pdb"))
+    original = [atom.id for atom in pro.get_atoms()]
+    pro.relabel("DMD")
+    assert [atom.id for atom in pro.get_atoms()] != original
+    pro.relabel("Standard")
+    assert [atom.id for atom in pro.get_atoms()] == original
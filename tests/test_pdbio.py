@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import os
+import numpy as np
+
+#PHD3 Imports
+from dmdpy.protein import atom
+from dmdpy.utility import pdbio, utilities
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+def _line_by_line(data: bytes):
+    lines = [line for line in data.decode().split('\n') if line[0:4] == "ATOM" or line[0:6] == "HETATM"]
+    atoms = [atom.Atom(line.replace('\r', ' ').ljust(80)) for line in lines]
+    return {
+        "number": [a.number for a in atoms],
+        "id": [a.id for a in atoms],
+        "resname": [line.ljust(80)[17:20] for line in lines],
+        "chain": [line.ljust(80)[21:22] for line in lines],
+        "resnum": [int(line[22:26]) for line in lines],
+        "element": [a.element for a in atoms],
+        "coords": np.array([a.coords for a in atoms]).reshape(-1, 3)
+    }
+
+def _check(data: bytes):
+    columns = pdbio.read_pdb_columns(data)
+    expected = _line_by_line(data)
+    for key in ("number", "id", "resname", "chain", "resnum", "element"):
+        assert columns[key].tolist() == expected[key], key
+
+    assert np.array_equal(columns["coords"], expected["coords"])
+    assert np.array_equal(np.signbit(columns["coords"]), np.signbit(expected["coords"]))
+    assert np.array_equal(pdbio.read_pdb_coords(data), columns["coords"])
+
+def test_read_pdb_columns():
+    for name in ("peptide.pdb", "zinc_site.pdb"):
+        with open(os.path.join(DATA, name), 'rb') as pdb:
+            _check(pdb.read())
+
+def test_read_pdb_columns_unusual_records():
+    _check(b"REMARK 1\n"
+           b"ATOM      1  N   ALA A  -1      -0.000-100.250   2.500  1.00  0.00           N\r\n"
+           b"TER\n"
+           b"HETATM    2 ZN    ZN B 101    1.5e1   -2.00     3.0\n"
+           b"ATOM      3 HH11 ARG B   2      10.000  20.000  30.000  1.00  0.00          EH")
+
+def test_load_pdb_hierarchy():
+    pro = utilities.load_pdb(os.path.join(DATA, "zinc_site.pdb"))
+    assert [(c.name, [r.number for r in c.residues]) for c in pro.chains] == [("A", [17, 18, 19, 101, 201, 202, 203])]
+    coords = pro.get_coords()
+    for k, a in enumerate(pro.get_atoms()):
+        assert a.chain is a.residue.chain
+        assert np.array_equal(a.coords, coords[k])
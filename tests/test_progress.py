@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import logging
+import pytest
+
+#PHD3 Imports
+from dmdpy.utility.progress import ProgressMonitor
+
+ROWS = """# time temperature pressure energy potential kinetic
+0.000 0.100 0.010 0.0 -10.0 5.0
+50.000 0.110 0.020 0.0 -11.0 6.0
+"""
+
+@pytest.fixture
+def monitor(tmp_path):
+    path = tmp_path / "echo"
+    path.write_text(ROWS)
+    return ProgressMonitor(str(path), 0, 100, status_file=None)
+
+def test_no_progress_since_last_poll_is_stalled(monitor, caplog):
+    status = monitor.poll()
+    assert status["eta"] is not None
+    assert not status["stalled"]
+
+    with caplog.at_level(logging.INFO, logger="dmdpy.utility.progress"):
+        status = monitor.poll()
+
+    assert status["recent rate"] == 0
+    assert status["eta"] is None
+    assert status["stalled"]
+    assert [record.levelno for record in caplog.records] == [logging.WARNING]
+
+def test_stop_logs_the_final_status(monitor, caplog):
+    monitor.start()
+    with caplog.at_level(logging.INFO, logger="dmdpy.utility.progress"):
+        status = monitor.stop("failed")
+
+    assert not monitor.is_alive()
+    assert status["state"] == "failed"
+    assert not status["stalled"]
+    assert "failed time: 50.0" in caplog.text
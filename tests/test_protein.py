@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import os
+import numpy as np
+import pytest
+
+#PHD3 Imports
+from dmdpy.utility import utilities
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+@pytest.fixture
+def peptide():
+    pro = utilities.load_pdb(os.path.join(DATA, "peptide.pdb"))
+    pro.make_bond_table()
+    return pro
+
+def test_clone_bond_graph(peptide):
+    clone = peptide.clone()
+    graph = clone.get_bond_graph()
+    assert graph is not None
+    assert graph.atoms is clone.get_atoms()
+    assert np.array_equal(np.stack(graph.pairs()), np.stack(peptide.get_bond_graph().pairs()))
+
+def test_clone_leaves_the_source_writable(peptide):
+    coords = peptide.get_coords()
+    clone = peptide.clone()
+    assert peptide.get_coords() is coords
+    assert coords.flags.writeable
+    peptide.get_atoms()[0].coords[0] = 99.0
+    assert coords[0][0] == 99.0
+
+    # A clone copies the array when its atoms are built, they can be written to like any others
+    clone.get_atoms()[0].coords[0] = 5.0
+    assert clone.get_coords()[0][0] == 5.0
+    assert peptide.get_coords()[0][0] == 99.0
+
+def test_clone_keeps_its_coords_when_the_source_moves(peptide):
+    original = np.array(peptide.get_coords(), dtype=float)
+    clone = peptide.clone()
+    clone_of_clone = clone.clone()
+
+    peptide.set_coords(original + 1.0)
+    assert np.array_equal(clone.get_coords(), original)
+    assert np.array_equal(clone_of_clone.get_coords(), original)
+
+    clone.translate([1.0, 0.0, 0.0])
+    assert np.array_equal(clone_of_clone.get_coords(), original)
+
+def test_clone_changes_stay_local(peptide):
+    clone = peptide.clone()
+    original = np.array(peptide.get_coords(), dtype=float)
+
+    clone.translate([1.0, 0.0, 0.0])
+    clone.get_atoms()[1].coords[1] = 5.0
+    assert np.array_equal(np.array(peptide.get_coords(), dtype=float), original)
+
+    peptide.translate([0.0, 1.0, 0.0])
+    peptide.get_atoms()[0].coords[0] = 99.0
+    assert clone.get_atoms()[0].coords[0] == original[0][0] + 1.0
+
+def test_get_atom_after_rename(peptide):
+    res = peptide.chains[0].residues[1]
+    first, second = res.atoms[0], res.atoms[1]
+    assert res.get_atom(second.id) is second
+
+    # Renaming an earlier atom to the same id makes it the one found
+    first.id = second.id
+    assert res.get_atom(second.id) is first
+
+    first.id = "N"
+    assert res.get_atom("N") is first
+    assert res.get_atom(second.id) is second
+
+def test_remove_h_keeps_the_last_chain(peptide):
+    n_atoms = len(peptide.get_atoms())
+    peptide.remove_h()
+    assert len(peptide.get_atoms()) == n_atoms
+
+def test_lookup_miss_keeps_the_index(peptide):
+    res = peptide.chains[0].residues[1]
+    res.get_atom(res.atoms[0].id)
+    atom_index = res._atom_index
+    with pytest.raises(ValueError):
+        res.get_atom("XX")
+
+    assert res._atom_index is atom_index
+
+    label = (res.chain.name, res.number, res.atoms[0].id)
+    assert peptide.get_atom(label) is res.atoms[0]
+    index = peptide._index
+    with pytest.raises(ValueError):
+        peptide.get_atom((res.chain.name, res.number, "XX"))
+
+    with pytest.raises(ValueError):
+        peptide.get_residue((res.chain.name, 999))
+
+    assert peptide._index is index
+
+def test_protein_get_atom_after_rename(peptide):
+    res = peptide.chains[0].residues[1]
+    peptide.get_atom((res.chain.name, res.number, "N"))
+    res.atoms[0].id = "XX"
+    assert peptide.get_atom((res.chain.name, res.number, "XX")) is res.atoms[0]
+    with pytest.raises(ValueError):
+        peptide.get_atom((res.chain.name, res.number, "N"))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import os
+import numpy as np
+import pytest
+
+#PHD3 Imports
+from dmdpy.protein.selection import Selection
+from dmdpy.utility import utilities
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+@pytest.fixture
+def zinc_site():
+    return utilities.load_pdb(os.path.join(DATA, "zinc_site.pdb"))
+
+def _labels(expression: str, pro):
+    return [atom.label() for atom in Selection(expression).atoms(pro)]
+
+@pytest.mark.parametrize("expression", ["resname ZN", "resname zn", "resname ZN*", "metal", "element Zn"])
+def test_padded_residue_name(zinc_site, expression):
+    # The pdb column holds "ZN " for the zinc
+    assert _labels(expression, zinc_site) == ["A:101:ZN"]
+
+def test_within_matches_brute_force(zinc_site):
+    coords = np.array(zinc_site.get_coords(), dtype=float)
+    zinc = np.array([atom.element.lower() == "zn" for atom in zinc_site.get_atoms()])
+    expected = np.linalg.norm(coords[:, None] - coords[zinc][None], axis=2).min(axis=1) <= 3.0
+    assert np.array_equal(Selection("within 3 of resname ZN").mask(zinc_site), expected)
+    assert _labels("within 2.5 of metal and not metal", zinc_site) == ["A:18:NE2", "A:201:O", "A:202:O", "A:203:O"]
+
+@pytest.mark.parametrize("expression, expected", [
+    ("resname HIS and name NE2 or metal", ["A:18:NE2", "A:101:ZN"]),
+    ("not (protein or metal)", ["A:201:O", "A:202:O", "A:203:O"]),
+    ("resid 17-18 and name CA", ["A:17:CA", "A:18:CA"]),
+    ("backbone and resid 19", ["A:19:N", "A:19:CA", "A:19:C", "A:19:O"]),
+])
+def test_grammar(zinc_site, expression, expected):
+    assert _labels(expression, zinc_site) == expected
+
+def test_same_residue(zinc_site):
+    assert len(Selection("same residue as name NE2").atoms(zinc_site)) == 17
+
+@pytest.mark.parametrize("expression", ["resname CU*", "within 5 of none", "metal and chain B"])
+def test_empty_match(zinc_site, expression):
+    assert _labels(expression, zinc_site) == []
+    assert not Selection(expression).mask(zinc_site).any()
+
+@pytest.mark.parametrize("expression", ["within of metal", "resid", "chain A and", "(metal", "residue 5"])
+def test_invalid_expression(expression):
+    with pytest.raises(ValueError):
+        Selection(expression)
+
+def test_names_before_and_after_reformat(zinc_site):
+    # reformat_protein moves the zinc into its own chain and renames it after its element and position
+    assert _labels("resname ZN1", zinc_site) == []
+    assert _labels("metal", zinc_site) == ["A:101:ZN"]
+
+    zinc_site.reformat_protein()
+    assert _labels("resname ZN1", zinc_site) == ["B:1:ZN"]
+    assert _labels("metal", zinc_site) == ["B:1:ZN"]
+    assert _labels("resname ZN", zinc_site) == []
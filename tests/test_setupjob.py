@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import logging
+import os
+import pytest
+
+#PHD3 Imports
+from dmdpy.setupjob import setupDMDjob, displacement_pairs
+from dmdpy.utility import utilities
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+def _job(pro, frozen=(), protonation=(), displacement=()):
+    # Only the part of setupDMDjob.__init__ that reads the selections, without a phd config or run directory
+    job = setupDMDjob.__new__(setupDMDjob)
+    job._protein = pro
+    job._static = []
+    job._static_selections = [(expression, expression) for expression in frozen]
+    job._protonate = []
+    job._protonate_selections = [[expression, ["protonate"]] for expression in protonation]
+    job._displacement = displacement_pairs(pro, list(displacement), resolve_selections=False)
+    return job
+
+@pytest.fixture
+def zinc_site():
+    return utilities.load_pdb(os.path.join(DATA, "zinc_site.pdb"))
+
+def test_selections_resolved_after_reformat(zinc_site):
+    job = _job(zinc_site, frozen=["within 6 of resname ZN1"], protonation=["resname HIS"],
+               displacement=[["resname ZN1", "chain A and resid 2 and name NE2", 0.1]])
+    assert job._static == []
+
+    zinc_site.reformat_protein()
+    job._resolve_selections()
+    assert len(job._static) == 16
+    assert [(res.name, res.number) for res, _ in job._protonate] == [("HIS", 2)]
+    assert [(a.label(), b.label()) for a, b, _ in job._displacement] == [("B:1:ZN", "A:2:NE2")]
+
+def test_empty_selection_warns(zinc_site, caplog):
+    job = _job(zinc_site, frozen=["resname CU1"], protonation=["resname ASP"])
+    zinc_site.reformat_protein()
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        job._resolve_selections()
+
+    assert job._static == [] and job._protonate == []
+    assert len([record for record in caplog.records if record.levelno == logging.WARNING]) == 2
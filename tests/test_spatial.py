@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import numpy as np
+import pytest
+
+#PHD3 Imports
+from dmdpy.utility.spatial import SpatialIndex
+
+@pytest.fixture
+def coords():
+    # Clustered points, so that some cells are crowded and others empty
+    rng = np.random.default_rng(3)
+    centers = rng.uniform(-15, 15, size=(6, 3))
+    return (centers[rng.integers(6, size=400)] + rng.normal(scale=2.5, size=(400, 3))).round(3)
+
+def _distances(first, second):
+    return np.linalg.norm(first[:, None] - second[None], axis=2)
+
+@pytest.mark.parametrize("cell_size", [1.0, 4.0, 9.0])
+def test_radius(coords, cell_size):
+    index = SpatialIndex(coords, cell_size)
+    for point in (coords[0], coords[17] + 0.5, np.array([100.0, 0.0, 0.0])):
+        distances = np.linalg.norm(coords - point, axis=1)
+        found, found_distances = index.radius(point, 3.5)
+        assert found.tolist() == np.flatnonzero(distances <= 3.5).tolist()
+        assert np.allclose(found_distances, distances[found])
+
+def test_nearest(coords):
+    index = SpatialIndex(coords, 2.0)
+    for point in (coords[5], np.array([40.0, 40.0, 40.0])):
+        distances = np.linalg.norm(coords - point, axis=1)
+        found, found_distances = index.nearest(point, 7)
+        assert np.allclose(found_distances, np.sort(distances)[:7])
+        assert np.allclose(distances[found], found_distances)
+
+    assert len(SpatialIndex(coords[:3]).nearest(coords[0], 10)[0]) == 3
+
+@pytest.mark.parametrize("cell_size, cutoff", [(4.0, 2.0), (4.0, 4.0), (1.5, 5.0)])
+def test_pairs(coords, cell_size, cutoff):
+    distances = _distances(coords, coords)
+    expected_i, expected_j = np.nonzero(np.triu(distances <= cutoff, 1))
+    i, j, found_distances = SpatialIndex(coords, cell_size).pairs(cutoff)
+    assert i.tolist() == expected_i.tolist()
+    assert j.tolist() == expected_j.tolist()
+    assert np.allclose(found_distances, distances[i, j])
+
+def test_within(coords):
+    points = np.concatenate((coords[::7] + 1.0, [[60.0, 0.0, 0.0]]))
+    expected = (_distances(points, coords[:50]) <= 3.0).any(axis=1)
+    assert np.array_equal(SpatialIndex(coords[:50], 2.0).within(points, 3.0), expected)
+
+def test_empty_index():
+    index = SpatialIndex(np.zeros((0, 3)))
+    assert len(index.radius([0.0, 0.0, 0.0], 5.0)[0]) == 0
+    assert len(index.pairs(5.0)[0]) == 0
+    assert not index.within([[0.0, 0.0, 0.0]], 5.0).any()
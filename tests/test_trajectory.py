@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Author  ==>> Matthew R. Hennefarth
+Date    ==>> October 17, 2026
+"""
+
+#Standard Library Imports
+import os
+import numpy as np
+import pytest
+
+#PHD3 Imports
+from dmdpy.utility import pdbio, trajectory, utilities
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+MODEL = "ATOM      1  CA  ALA A   1       0.000   0.000   0.000  1.00  0.00           C\nENDMDL\n"
+
+def _run_step(movie, echo, time: int):
+    with open(movie, 'a') as out:
+        out.write(MODEL)
+
+    with open(echo, 'a') as out:
+        out.write(f"{time}.000 0.1 0.0 0.0 -10.0 5.0\n")
+
+@pytest.fixture
+def run(tmp_path):
+    movie, echo = str(tmp_path / "movie.pdb"), str(tmp_path / "echo")
+    _run_step(movie, echo, 0)
+    trajectory.record_step(movie, echo)
+    return movie, echo
+
+def test_rollback_step(run):
+    movie, echo = run
+    _run_step(movie, echo, 50)
+    assert trajectory.rollback_step(movie, echo)[2] == 1
+    with open(movie) as inp:
+        assert inp.read() == MODEL
+
+    # The repeated step is recorded after the step that was rolled back to
+    _run_step(movie, echo, 50)
+    assert trajectory.record_step(movie, echo)[2] == 2
+
+def test_rollback_twice_keeps_the_last_successful_step(run):
+    movie, echo = run
+    _run_step(movie, echo, 50)
+    trajectory.record_step(movie, echo)
+    _run_step(movie, echo, 100)
+    trajectory.rollback_step(movie, echo)
+
+    # Failing again before another step was recorded cannot go back over the successful step at 50
+    _run_step(movie, echo, 100)
+    with pytest.raises(ValueError):
+        trajectory.rollback_step(movie, echo)
+
+    with open(movie) as inp:
+        assert inp.read() == MODEL * 3
+
+def test_load_movie_caches_indexed_movie(run):
+    movie, echo = run
+    _run_step(movie, echo, 50)
+    trajectory.write_frame_index(movie, echo)
+    assert trajectory.read_frame_index(movie) is not None
+
+    assert len(utilities.load_movie(movie)) == 2
+    assert all(os.path.isfile(cache_file) for cache_file in trajectory.trajectory_cache_files(movie))
+
+def test_cache_stale_after_append_in_the_same_tick(run):
+    movie, echo = run
+    trajectory.write_trajectory_cache(movie)
+    assert trajectory.trajectory_cache_is_fresh(movie)
+
+    # Frames appended with the cache's own modification time, as on a file system with coarse timestamps
+    stamp = os.stat(trajectory.trajectory_cache_files(movie)[1]).st_mtime_ns
+    _run_step(movie, echo, 50)
+    os.utime(movie, ns=(stamp, stamp))
+    assert not trajectory.trajectory_cache_is_fresh(movie)
+    assert len(trajectory.load_trajectory(movie)) == 2
+
+def test_rollback_truncates_frame_index(run):
+    movie, echo = run
+    _run_step(movie, echo, 50)
+    trajectory.record_step(movie, echo)
+    trajectory.write_frame_index(movie, echo)
+    _run_step(movie, echo, 100)
+    trajectory.write_frame_index(movie, echo)
+    assert len(trajectory.read_frame_index(movie)[0]) == 3
+
+    trajectory.rollback_step(movie, echo)
+    offsets, times = trajectory.read_frame_index(movie)
+    assert offsets.tolist() == [0, len(MODEL)]
+    assert times.tolist() == [0.0, 50.0]
+
+    # The repeated step is indexed incrementally onto the cut index
+    _run_step(movie, echo, 100)
+    assert len(trajectory.write_frame_index(movie, echo)[0]) == 3
+
+@pytest.fixture
+def zinc_movie(tmp_path, monkeypatch):
+    # Small blocks, so that a short movie still has several of them
+    monkeypatch.setattr(trajectory, "FRAMES_PER_BLOCK", 4)
+    columns = utilities.load_pdb(os.path.join(DATA, "zinc_site.pdb")).get_columns()
+    rng = np.random.default_rng(1)
+    frames = (columns["coords"] + np.cumsum(rng.normal(scale=0.3, size=(10,) + columns["coords"].shape), axis=0)).round(3)
+    movie = str(tmp_path / "movie.pdb")
+    pdbio.write_pdb_models(movie, pdbio.pdb_template(columns), frames)
+    return movie, columns, frames
+
+def test_compressed_movie_round_trip(zinc_movie, tmp_path):
+    movie, columns, frames = zinc_movie
+    compressed = str(tmp_path / "movie.dmdz")
+    assert trajectory.write_compressed_movie(movie, compressed) == 10
+    assert trajectory.is_compressed_movie(compressed)
+    assert not trajectory.is_compressed_movie(movie)
+
+    topology = trajectory.read_compressed_topology(compressed)
+    for key in trajectory.TOPOLOGY_KEYS:
+        assert topology[key].tolist() == np.asarray(columns[key]).tolist()
+
+    decoded = [coords for _, coords in trajectory.iter_compressed_coords(compressed)]
+    assert np.array_equal(np.stack(decoded), frames)
+
+    selected = list(trajectory.iter_compressed_coords(compressed, start=3, stop=9, stride=2))
+    assert [number for number, _ in selected] == [3, 5, 7]
+    assert np.array_equal(np.stack([coords for _, coords in selected]), frames[3:9:2])
+
+def test_compressed_movie_append(zinc_movie, tmp_path):
+    movie, _, frames = zinc_movie
+    compressed = str(tmp_path / "movie.dmdz")
+    trajectory.write_compressed_movie(movie, compressed)
+    assert trajectory.write_compressed_movie(movie, compressed, append=True) == 10
+
+    decoded = np.stack([coords for _, coords in trajectory.iter_compressed_coords(compressed)])
+    assert np.array_equal(decoded, np.concatenate((frames, frames)))
+
+    with open(movie) as inp:
+        first_model = inp.read().split("ENDMDL")[0]
+
+    with open(str(tmp_path / "other.pdb"), 'w') as out:
+        out.write("\n".join(first_model.splitlines()[:-1]) + "\nENDMDL\n")
+
+    with pytest.raises(ValueError):
+        trajectory.write_compressed_movie(str(tmp_path / "other.pdb"), compressed, append=True)